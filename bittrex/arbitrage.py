@@ -0,0 +1,246 @@
+"""
+   Triangular arbitrage over the currency graph.
+
+   Every market links its two currencies; a 3-cycle of markets is a round
+   trip such as BTC -> ETH -> LTC -> BTC.  :class:`CurrencyGraph` enumerates
+   all of them once from ``/markets``.  :class:`ArbitrageScanner` then prices
+   every cycle against a :class:`bittrex.tickers.TickerSnapshot` in one
+   vectorized pass: a leg selling the base currency earns the bid, a leg
+   buying it pays the ask, and each leg pays ``TRADE_FEE``.  After a poll
+   only the cycles through markets in the poll's diff are repriced.
+"""
+
+import numpy as np
+
+from bittrex.bittrex import TRADE_FEE, DIRECTION_BUY, DIRECTION_SELL
+from bittrex.tickers import BID, ASK
+
+
+def _currencies(market):
+    # v3 symbols are BASE-QUOTE, 1.1 market names were QUOTE-BASE
+    if 'baseCurrencySymbol' in market:
+        return market['symbol'], market['baseCurrencySymbol'], market['quoteCurrencySymbol']
+    return (market['MarketCurrency'] + '-' + market['BaseCurrency'], market['MarketCurrency'],
+            market['BaseCurrency'])
+
+
+class CurrencyGraph(object):
+    """
+    Markets as edges between currencies, with every 3-cycle enumerated.
+
+    :ivar symbols: Market symbol per edge
+    :ivar base: Base (traded) currency per market
+    :ivar quote: Quote (pricing) currency per market
+    :ivar cycles: ``(cycles, 3)`` currencies visited, starting currency first
+    :ivar leg_market: ``(cycles, 3)`` market index of each leg
+    :ivar leg_sell: ``(cycles, 3)`` True where the leg sells the market's base currency
+    """
+
+    def __init__(self, symbols, base, quote):
+        self.symbols = list(symbols)
+        self.base = list(base)
+        self.quote = list(quote)
+        self._index = dict((s, i) for i, s in enumerate(self.symbols))
+
+        links = {}
+        for i, (b, q) in enumerate(zip(self.base, self.quote)):
+            links.setdefault(b, {})[q] = i
+            links.setdefault(q, {})[b] = i
+
+        cycles, legs = [], []
+        for a in sorted(links):
+            for b in sorted(links[a]):
+                if b <= a:
+                    continue
+                for c in sorted(set(links[a]) & set(links[b])):
+                    if c <= b:
+                        continue
+                    # both directions round the triangle
+                    for path in ((a, b, c), (a, c, b)):
+                        cycles.append(path)
+                        legs.append([links[path[k]][path[(k + 1) % 3]] for k in range(3)])
+        self.cycles = np.array(cycles, dtype=object).reshape(-1, 3)
+        self.leg_market = np.array(legs, dtype=np.intp).reshape(-1, 3)
+        # a leg from currency X sells when X is the market's base currency
+        base = np.array(self.base, dtype=object)
+        self.leg_sell = base[self.leg_market] == self.cycles if len(legs) else np.zeros((0, 3), dtype=bool)
+
+        # cycles through each market, as a CSR index for incremental updates
+        order = np.argsort(self.leg_market.ravel(), kind='stable')
+        self._cycles_by_market = order // 3
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(self.leg_market.ravel(),
+                                                                   minlength=len(self.symbols)))])
+
+    @classmethod
+    def from_markets(cls, markets):
+        """
+        :param markets: ``get_markets()['result']``, v3 or 1.1 rows
+        :type markets: list
+        :rtype: CurrencyGraph
+        """
+        rows = [_currencies(m) for m in markets]
+        return cls([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+
+    def market(self, symbol):
+        """
+        :return: Market index of a symbol
+        :rtype: int
+        """
+        return self._index[symbol]
+
+    def has_market(self, symbol):
+        """
+        :rtype: bool
+        """
+        return symbol in self._index
+
+    def cycles_through(self, markets):
+        """
+        :param markets: Market indices
+        :type markets: list
+        :return: Sorted indices of the cycles using any of them
+        :rtype: numpy.ndarray
+        """
+        parts = [self._cycles_by_market[self._offsets[m]:self._offsets[m + 1]] for m in markets]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+
+class LegPrices(object):
+    """
+    Conversion rates of graph markets, read from a ticker snapshot.
+    """
+
+    def __init__(self, graph, snapshot):
+        """
+        :type graph: CurrencyGraph
+        :type snapshot: bittrex.tickers.TickerSnapshot
+        """
+        self.graph = graph
+        self.snapshot = snapshot
+        self._row = np.full(len(graph.symbols), -1, dtype=np.intp)
+        self._mapped = 0
+
+    def map_rows(self):
+        """
+        Find the snapshot row of every market, once per new snapshot symbol.
+        """
+        # snapshot rows only grow, so mapping is redone when new symbols appeared
+        if self._mapped == len(self.snapshot.symbols):
+            return
+        for i in np.flatnonzero(self._row < 0):
+            try:
+                self._row[i] = self.snapshot.row(self.graph.symbols[i])
+            except KeyError:
+                pass
+        self._mapped = len(self.snapshot.symbols)
+
+    def rates(self, markets, sell):
+        """
+        Currency received per unit spent on each leg, before fees: the bid
+        when the leg sells the market's base currency, one over the ask when
+        it buys it.
+
+        :param markets: Market index per leg
+        :type markets: numpy.ndarray
+        :param sell: True where the leg sells, same shape
+        :type sell: numpy.ndarray
+        :return: Rates, NaN where the market has no price
+        :rtype: numpy.ndarray
+        """
+        values = self.snapshot.values
+        rows = self._row[markets]
+        known = rows >= 0
+        rows = np.where(known, rows, 0)
+        bid = np.where(known, values[rows, BID], np.nan) if len(values) else np.full(rows.shape, np.nan)
+        ask = np.where(known, values[rows, ASK], np.nan) if len(values) else np.full(rows.shape, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(sell, bid, 1.0 / ask)
+        return np.where(rate > 0, rate, np.nan)
+
+
+class ArbitrageScanner(object):
+    """
+    Net return of every 3-cycle, kept current from ticker snapshots.
+
+    Example ::
+        >>> graph = CurrencyGraph.from_markets(my_bittrex.get_markets()['result'])
+        >>> snapshot = TickerSnapshot(my_bittrex, summaries=False)
+        >>> scanner = ArbitrageScanner(graph, snapshot)
+        >>> scanner.update(snapshot.poll())
+        >>> scanner.opportunities(min_return=0.001)
+    """
+
+    def __init__(self, graph, snapshot, fee=TRADE_FEE):
+        """
+        :param graph: Markets and cycles to scan
+        :type graph: CurrencyGraph
+        :param snapshot: Source of bid and ask prices
+        :type snapshot: bittrex.tickers.TickerSnapshot
+        :param fee: Fee per leg
+        :type fee: float
+        """
+        self.graph = graph
+        self.snapshot = snapshot
+        self.fee = fee
+        self.returns = np.full(len(graph.leg_market), np.nan)
+        self.prices = LegPrices(graph, snapshot)
+
+    def scan(self):
+        """
+        Reprice every cycle.
+
+        :return: Net return per cycle, NaN where a leg has no price
+        :rtype: numpy.ndarray
+        """
+        self.prices.map_rows()
+        cycles = np.arange(len(self.returns))
+        self.returns = self._evaluate(cycles)
+        return self.returns
+
+    def _evaluate(self, cycles):
+        rates = self.prices.rates(self.graph.leg_market[cycles], self.graph.leg_sell[cycles])
+        return np.prod(rates, axis=-1) * (1.0 - self.fee) ** 3 - 1.0
+
+    def update(self, diff):
+        """
+        Reprice the cycles through markets that changed in a poll.
+
+        :param diff: Result of ``TickerSnapshot.poll()`` or ``load()``
+        :type diff: bittrex.tickers.TickerDiff
+        :return: Indices of the repriced cycles
+        :rtype: numpy.ndarray
+        """
+        self.prices.map_rows()
+        markets = [self.graph.market(s) for s in diff.symbols if self.graph.has_market(s)]
+        cycles = self.graph.cycles_through(markets)
+        if len(cycles):
+            self.returns[cycles] = self._evaluate(cycles)
+        return cycles
+
+    def opportunities(self, min_return=0.0, start=None):
+        """
+        Profitable cycles, best first.
+
+        :param min_return: Smallest net return reported, e.g. 0.001 for 10 bps
+        :type min_return: float
+        :param start: Only cycles starting from this currency
+        :type start: str
+        :return: ``[{'return', 'path', 'legs'}]`` where legs are ``(symbol, direction)``
+        :rtype: list
+        """
+        graph = self.graph
+        with np.errstate(invalid='ignore'):
+            hits = np.flatnonzero(self.returns > min_return)
+        if start is not None and len(hits):
+            # any rotation of a cycle earns the same, so rotate it to start where asked
+            hits = hits[(graph.cycles[hits] == start).any(axis=1)]
+        found = []
+        for i in hits[np.argsort(-self.returns[hits], kind='stable')]:
+            path = list(graph.cycles[i])
+            legs = [(graph.symbols[m], DIRECTION_SELL if sell else DIRECTION_BUY)
+                    for m, sell in zip(graph.leg_market[i], graph.leg_sell[i])]
+            if start is not None:
+                k = path.index(start)
+                path, legs = path[k:] + path[:k], legs[k:] + legs[:k]
+            found.append({'return': float(self.returns[i]), 'path': path + path[:1], 'legs': legs})
+        return found
@@ -0,0 +1,290 @@
+"""
+   Vectorized backtesting over columnar candles.
+
+   A strategy is a plain function ``strategy(columns, **params)`` returning the
+   target fraction of equity to hold in the market currency for every candle
+   (0 = all quote currency, 1 = fully invested).  The target computed on the
+   close of candle ``t`` is acted upon during candle ``t + 1``.
+
+   The simulator steps through time once and evaluates every parameter set in
+   the same NumPy operations; :func:`sweep` additionally splits large grids
+   across a process pool.
+
+   Order semantics:
+
+   * ``ORDERTYPE_MARKET`` fills at the next open.  Market orders never rest,
+     so any quantity beyond the participation cap is dropped.
+   * ``ORDERTYPE_LIMIT`` is placed ``limit_offset`` away from the signal close
+     and fills at the limit (or better, on a gap) once the candle trades
+     through it.
+   * ``TIMEINEFFECT_GOOD_TIL_CANCELLED`` keeps the unfilled remainder working
+     until the target changes, ``TIMEINEFFECT_IMMEDIATE_OR_CANCEL`` cancels it
+     after one candle and ``TIMEINEFFECT_FILL_OR_KILL`` only fills if the whole
+     quantity is available within the participation cap.
+
+   Every fill pays ``fee`` (``TRADE_FEE`` by default) on its notional.
+"""
+
+import itertools
+import multiprocessing
+
+import numpy as np
+
+from bittrex.bittrex import (TRADE_FEE, ORDERTYPE_LIMIT, ORDERTYPE_MARKET, TIMEINEFFECT_GOOD_TIL_CANCELLED,
+                             TIMEINEFFECT_IMMEDIATE_OR_CANCEL, TIMEINEFFECT_FILL_OR_KILL)
+
+FILL_DTYPE = np.dtype([
+    ('set', np.int64),
+    ('index', np.int64),
+    ('side', 'U4'),
+    ('quantity', np.float64),
+    ('price', np.float64),
+    ('fee', np.float64),
+])
+
+_EPSILON = 1e-12
+
+
+def grid(**axes):
+    """
+    Cartesian product of parameter values.
+
+    Example ::
+        >>> grid(fast=[5, 10], slow=[20])
+        [{'fast': 5, 'slow': 20}, {'fast': 10, 'slow': 20}]
+
+    :rtype: list
+    """
+    names = sorted(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+class BacktestResult(object):
+    """
+    Output of :func:`run` and :func:`sweep`.
+
+    :ivar params: Parameter dict per set, in row order
+    :ivar equity: Equity curve in quote currency, shape ``(sets, candles)``
+    :ivar fills: Structured array with :data:`FILL_DTYPE` fields, in time order per set
+    """
+
+    def __init__(self, params, equity, fills):
+        self.params = params
+        self.equity = equity
+        self.fills = fills
+
+    def total_return(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        return self.equity[:, -1] / self.equity[:, 0] - 1.0
+
+    def max_drawdown(self):
+        """
+        :return: Largest peak-to-trough loss per set as a positive fraction
+        :rtype: numpy.ndarray
+        """
+        peak = np.maximum.accumulate(self.equity, axis=1)
+        return np.max(1.0 - self.equity / peak, axis=1)
+
+    def fills_for(self, index):
+        """
+        :param index: Parameter set row
+        :type index: int
+        :rtype: numpy.ndarray
+        """
+        return self.fills[self.fills['set'] == index]
+
+    def best(self):
+        """
+        :return: ``(params, total_return)`` of the best performing set
+        :rtype: tuple
+        """
+        returns = self.total_return()
+        i = int(np.nanargmax(returns))
+        return self.params[i], returns[i]
+
+
+def simulate(columns, targets, order_type=ORDERTYPE_MARKET, time_in_effect=TIMEINEFFECT_GOOD_TIL_CANCELLED,
+             fee=TRADE_FEE, initial_cash=1.0, limit_offset=0.0, participation=None):
+    """
+    Replay target positions for many parameter sets at once.
+
+    :param columns: Columnar candles of one market, see :func:`bittrex.candles.to_columns`
+    :type columns: dict
+    :param targets: Target fraction of equity held, shape ``(sets, candles)`` or ``(candles,)``
+    :type targets: numpy.ndarray
+    :param order_type: ORDERTYPE_MARKET or ORDERTYPE_LIMIT
+    :type order_type: str
+    :param time_in_effect: One of the TIMEINEFFECT_* constants, used for limit orders
+    :type time_in_effect: str
+    :param fee: Fee charged on the notional of every fill
+    :type fee: float
+    :param initial_cash: Starting balance in quote currency
+    :type initial_cash: float
+    :param limit_offset: Limit distance from the signal close as a fraction (buy below, sell above)
+    :type limit_offset: float
+    :param participation: Maximum fraction of a candle's volume one order may fill, None for unlimited
+    :type participation: float
+    :return: ``(equity, fills)``
+    :rtype: tuple
+    """
+    if order_type not in (ORDERTYPE_MARKET, ORDERTYPE_LIMIT):
+        raise ValueError('unsupported order type {0}'.format(order_type))
+    if time_in_effect not in (TIMEINEFFECT_GOOD_TIL_CANCELLED, TIMEINEFFECT_IMMEDIATE_OR_CANCEL,
+                              TIMEINEFFECT_FILL_OR_KILL):
+        raise ValueError('unsupported time in effect {0}'.format(time_in_effect))
+
+    open_ = np.asarray(columns['open'], dtype=np.float64)
+    high = np.asarray(columns['high'], dtype=np.float64)
+    low = np.asarray(columns['low'], dtype=np.float64)
+    close = np.asarray(columns['close'], dtype=np.float64)
+    volume = np.asarray(columns['volume'], dtype=np.float64)
+    targets = np.atleast_2d(np.clip(np.nan_to_num(np.asarray(targets, dtype=np.float64)), 0.0, 1.0))
+    sets, n = targets.shape
+
+    limit = order_type == ORDERTYPE_LIMIT
+    resting = limit and time_in_effect == TIMEINEFFECT_GOOD_TIL_CANCELLED
+    kill = time_in_effect == TIMEINEFFECT_FILL_OR_KILL
+
+    cash = np.full(sets, float(initial_cash))
+    units = np.zeros(sets)
+    pending = np.zeros(sets)
+    price = np.full(sets, np.nan)
+    equity = np.empty((sets, n))
+    if n:
+        equity[:, 0] = cash
+    fills = []
+
+    for t in range(1, n):
+        target = targets[:, t - 1]
+        before = targets[:, t - 2] if t > 1 else np.zeros(sets)
+        changed = target != before
+
+        ref = close[t - 1]
+        wanted = target * (cash + units * ref) / ref
+        delta = wanted - units
+        pending = np.where(changed, delta, pending)
+        if limit:
+            placed = np.where(delta > 0, ref * (1.0 - limit_offset), ref * (1.0 + limit_offset))
+            price = np.where(changed, placed, price)
+
+        buying = pending > _EPSILON
+        selling = pending < -_EPSILON
+        if limit:
+            fill_price = np.where(buying, np.minimum(price, open_[t]), np.maximum(price, open_[t]))
+            hit = (buying & (low[t] <= price)) | (selling & (high[t] >= price))
+        else:
+            fill_price = np.full(sets, open_[t])
+            hit = buying | selling
+
+        wanted_qty = np.abs(pending)
+        qty = wanted_qty if participation is None else np.minimum(wanted_qty, participation * volume[t])
+        qty = np.where(buying, np.minimum(qty, cash / (fill_price * (1.0 + fee))), np.minimum(qty, units))
+        if kill:
+            hit &= qty >= wanted_qty * (1.0 - 1e-9)
+        qty = np.where(hit, qty, 0.0)
+
+        notional = qty * fill_price
+        paid = notional * fee
+        cash = np.maximum(cash + np.where(buying, -(notional + paid), notional - paid), 0.0)
+        units = np.maximum(units + np.where(buying, qty, -qty), 0.0)
+
+        if resting:
+            pending = np.where(buying, pending - qty, np.where(selling, pending + qty, 0.0))
+            pending = np.where(np.abs(pending) > _EPSILON, pending, 0.0)
+        else:
+            pending = np.zeros(sets)
+
+        done = np.nonzero(qty > 0)[0]
+        if len(done):
+            record = np.empty(len(done), dtype=FILL_DTYPE)
+            record['set'] = done
+            record['index'] = t
+            record['side'] = np.where(buying[done], 'BUY', 'SELL')
+            record['quantity'] = qty[done]
+            record['price'] = fill_price[done]
+            record['fee'] = paid[done]
+            fills.append(record)
+
+        equity[:, t] = cash + units * close[t]
+
+    fills = np.concatenate(fills) if fills else np.empty(0, dtype=FILL_DTYPE)
+    return equity, fills[np.argsort(fills['set'], kind='stable')]
+
+
+def _run_chunk(args):
+    columns, strategy, params, options = args
+    targets = np.vstack([np.asarray(strategy(columns, **p), dtype=np.float64) for p in params])
+    return simulate(columns, targets, **options)
+
+
+def run(columns, strategy, params=None, **options):
+    """
+    Backtest one parameter set.
+
+    Example ::
+        >>> def crossover(columns, fast, slow):
+        ...     return (indicators.sma(columns['close'], fast) > indicators.sma(columns['close'], slow)) * 1.0
+        >>> result = run(columns, crossover, {'fast': 10, 'slow': 30}, order_type=ORDERTYPE_LIMIT)
+        >>> result.total_return()
+
+    :param columns: Columnar candles of one market
+    :type columns: dict
+    :param strategy: ``strategy(columns, **params)`` returning target exposure per candle
+    :type strategy: callable
+    :param params: Keyword arguments for the strategy
+    :type params: dict
+    :param options: Passed to :func:`simulate`
+    :rtype: BacktestResult
+    """
+    params = params or {}
+    equity, fills = _run_chunk((columns, strategy, [params], options))
+    return BacktestResult([params], equity, fills)
+
+
+def sweep(columns, strategy, param_sets, processes=None, chunk_size=None, **options):
+    """
+    Backtest many parameter sets, in parallel across a process pool.
+
+    :param columns: Columnar candles of one market
+    :type columns: dict
+    :param strategy: Module-level (picklable) strategy function
+    :type strategy: callable
+    :param param_sets: Parameter dicts, see :func:`grid`
+    :type param_sets: list
+    :param processes: Pool size; defaults to the CPU count, 1 runs in-process
+    :type processes: int
+    :param chunk_size: Parameter sets simulated together per task
+    :type chunk_size: int
+    :param options: Passed to :func:`simulate`
+    :rtype: BacktestResult
+    """
+    param_sets = list(param_sets)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(param_sets) // (processes * 4)))
+    chunks = [param_sets[i:i + chunk_size] for i in range(0, len(param_sets), chunk_size)]
+    tasks = [(columns, strategy, chunk, options) for chunk in chunks]
+
+    if processes == 1 or len(chunks) <= 1:
+        results = [_run_chunk(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_run_chunk, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+    equity = np.vstack([r[0] for r in results]) if results else np.empty((0, len(columns['close'])))
+    fills = []
+    offset = 0
+    for chunk, (_, chunk_fills) in zip(chunks, results):
+        chunk_fills = chunk_fills.copy()
+        chunk_fills['set'] += offset
+        fills.append(chunk_fills)
+        offset += len(chunk)
+    fills = np.concatenate(fills) if fills else np.empty(0, dtype=FILL_DTYPE)
+    return BacktestResult(param_sets, equity, fills)
@@ -1,28 +1,23 @@
 """
    See https://bittrex.com/Home/Api
+
+   Importing this module stays cheap: ``requests``, ``json`` and the optional
+   ``pycrypto`` support are imported the first time they are needed.
 """
 
 import time
 import hmac
 import hashlib
 import sys
+import threading
+from contextlib import contextmanager
 try:
     from urllib import urlencode
 except ImportError:
     from urllib.parse import urlencode
 
-try:
-    from Crypto.Cipher import AES
-except ImportError:
-    encrypted = False
-else:
-    import getpass
-    import ast
-    import json
-
-    encrypted = True
-
-import requests
+from bittrex.scheduler import (PRIORITY_CANCEL, PRIORITY_ORDER, PRIORITY_ACCOUNT, PRIORITY_MARKET_DATA,
+                               RequestExpired)
 
 BUY_ORDERBOOK = 'buy'
 SELL_ORDERBOOK = 'sell'
@@ -36,12 +31,21 @@ TICKINTERVAL_HOUR = 'hour'
 TICKINTERVAL_THIRTYMIN = 'thirtyMin'
 TICKINTERVAL_DAY = 'Day'
 
+# v3 candle intervals; there is no thirty minute interval in v3
+CANDLE_INTERVALS = {
+    TICKINTERVAL_ONEMIN: 'MINUTE_1',
+    TICKINTERVAL_FIVEMIN: 'MINUTE_5',
+    TICKINTERVAL_HOUR: 'HOUR_1',
+    TICKINTERVAL_DAY: 'DAY_1',
+}
+
 ORDERTYPE_LIMIT = 'LIMIT'
 ORDERTYPE_MARKET = 'MARKET'
 
 TIMEINEFFECT_GOOD_TIL_CANCELLED = 'GOOD_TIL_CANCELLED'
 TIMEINEFFECT_IMMEDIATE_OR_CANCEL = 'IMMEDIATE_OR_CANCEL'
 TIMEINEFFECT_FILL_OR_KILL = 'FILL_OR_KILL'
+TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED = 'POST_ONLY_GOOD_TIL_CANCELLED'
 
 CONDITIONTYPE_NONE = 'NONE'
 CONDITIONTYPE_GREATER_THAN = 'GREATER_THAN'
@@ -58,8 +62,26 @@ BASE_PATH = '/v3{path}'
 PROTECTION_PUB = 'pub'  # public methods
 PROTECTION_PRV = 'prv'  # authenticated methods
 
+DIRECTION_BUY = 'BUY'
+DIRECTION_SELL = 'SELL'
+
+OPERAND_GTE = 'GTE'
+OPERAND_LTE = 'LTE'
+
+
+def _crypto():
+    # pycrypto is optional and only needed for encrypted key files
+    try:
+        from Crypto.Cipher import AES
+    except ImportError:
+        raise ImportError('"pycrypto" module has to be installed')
+    import getpass
+    return AES, getpass
+
 
 def encrypt(api_key, api_secret, export=True, export_fn='secrets.json'):
+    import json
+    AES, getpass = _crypto()
     cipher = AES.new(getpass.getpass(
         'Input encryption password (string will not show)'))
     api_key_n = cipher.encrypt(api_key)
@@ -71,92 +93,268 @@ def encrypt(api_key, api_secret, export=True, export_fn='secrets.json'):
     return api
 
 
+def requests_transport(method, request_url, headers, body):
+    """
+    Default transport: performs the HTTP request with ``requests``.
+
+    A transport is any callable taking ``(method, request_url, headers, body)``
+    and returning ``(status_code, response_headers, decoded_json)``.  See
+    :class:`bittrex.simulator.PaperExchange` for an in-process one.
+    """
+    import requests
+    response = requests.request(method, request_url, headers=headers, data=body or None, timeout=10)
+    payload = response.json() if response.content else None
+    return response.status_code, response.headers, payload
+
+
+def requests_stream_transport(method, request_url, headers, body, chunk_size=65536):
+    """
+    Default streaming transport: like :func:`requests_transport` but returns
+    ``(status_code, response_headers, chunks)`` with the body as an iterator
+    of decompressed byte chunks.
+    """
+    import requests
+    response = requests.request(method, request_url, headers=headers, data=body or None, timeout=10, stream=True)
+    return response.status_code, response.headers, response.iter_content(chunk_size)
+
+
+def buffered_stream_transport(transport):
+    """
+    Adapt a buffering transport, e.g. a PaperExchange, to the streaming interface.
+    """
+    def stream(method, request_url, headers, body, chunk_size=65536):
+        import json
+        status, response_headers, payload = transport(method, request_url, headers, body)
+        encoded = json.dumps(payload).encode('utf-8')
+        return status, response_headers, (encoded[i:i + chunk_size] for i in range(0, len(encoded), chunk_size))
+    return stream
+
+
+def format_decimal(value):
+    """
+    Decimal string for a request body.
+
+    Floats are written with at most 8 decimals, the exchange's finest
+    precision, so binary artifacts like ``0.30000000000000004`` or exponent
+    notation never reach the API.  Other values, e.g.
+    :class:`bittrex.fixedpoint.Fixed` or strings, are passed through ``str``.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        text = '{0:.8f}'.format(value).rstrip('0').rstrip('.')
+        return '0' if text in ('', '-0') else text
+    return str(value)
+
+
+def _candle_interval(tick_interval):
+    if tick_interval not in CANDLE_INTERVALS:
+        raise ValueError('v3 has no {0} candles'.format(tick_interval))
+    return CANDLE_INTERVALS[tick_interval]
+
+
+def order_payload(direction, market, order_type, quantity, rate=None, time_in_effect=None):
+    """
+    Build a v3 ``POST /orders`` body, with quantity and rate as exact
+    decimal strings (see :func:`format_decimal`).
+
+    :param direction: DIRECTION_BUY or DIRECTION_SELL
+    :type direction: str
+    :param time_in_effect: Defaults to good-til-cancelled for limit orders and
+        immediate-or-cancel for market orders, which v3 requires to be immediate
+    :type time_in_effect: str
+    :rtype: dict
+    """
+    if time_in_effect is None:
+        time_in_effect = TIMEINEFFECT_IMMEDIATE_OR_CANCEL if order_type == ORDERTYPE_MARKET \
+            else TIMEINEFFECT_GOOD_TIL_CANCELLED
+    order = {
+        'marketSymbol': market,
+        'direction': direction,
+        'type': order_type,
+        'quantity': format_decimal(quantity),
+        'timeInForce': time_in_effect
+    }
+    if order_type != ORDERTYPE_MARKET:
+        order['limit'] = format_decimal(rate)
+    return order
+
+
 class Bittrex(object):
     """
     Used for requesting Bittrex with API key and API secret
     """
 
-    def __init__(self, api_key, api_secret, calls_per_second=1):
+    def __init__(self, api_key, api_secret, calls_per_second=1, scheduler=None, transport=requests_transport,
+                 clock=time.time, stream_transport=None, hedge=None, cache=None):
         self.api_key = str(api_key) if api_key is not None else ''
         self.api_secret = str(api_secret) if api_secret is not None else ''
         self.call_rate = 1.0 / calls_per_second
         self.last_call = None
+        self._wait_lock = threading.Lock()
+        self.scheduler = scheduler
+        self.transport = transport
+        if stream_transport is None:
+            stream_transport = requests_stream_transport if transport is requests_transport \
+                else buffered_stream_transport(transport)
+        self.stream_transport = stream_transport
+        # source of Api-Timestamp, see bittrex.servertime.ServerClock
+        self.clock = clock
+        # optional bittrex.hedging.HedgePolicy for public GETs
+        self.hedge = hedge
+        # optional bittrex.cache.ResponseCache for public GETs
+        self.cache = cache
 
         uri = API_URI
 
         self.base_url = '{uri}{path}'.format(uri=uri, path=BASE_PATH)
 
-    def dispatch(self, request_url, api_timestamp, body):
-        request_body = body if body else ''
+    def _headers(self, request_url, api_timestamp, request_body, method):
         signature = hashlib.sha512(request_body.encode()).hexdigest()
-        pre_sign = api_timestamp + request_url + 'GET' + signature
+        pre_sign = api_timestamp + request_url + method + signature
         api_sign = hmac.new(self.api_secret.encode(), pre_sign.encode(), hashlib.sha512).hexdigest()
-        response = requests.get(
-            request_url,
-            headers={
-                'Api-Key': self.api_key.encode(),
-                'Api-Timestamp': api_timestamp,
-                'Api-Content-Hash': signature,
-                'Api-Signature': api_sign
-            },
-            timeout=10
-        )
-
-        return response.json()
+        headers = {
+            'Api-Key': self.api_key,
+            'Api-Timestamp': api_timestamp,
+            'Api-Content-Hash': signature,
+            'Api-Signature': api_sign,
+            'Accept-Encoding': 'gzip, deflate'
+        }
+        if request_body:
+            headers['Content-Type'] = 'application/json'
+        return headers
+
+    def dispatch(self, request_url, api_timestamp, body, method='GET'):
+        request_body = body if body else ''
+        headers = self._headers(request_url, api_timestamp, request_body, method)
+        status, response_headers, payload = self.transport(method, request_url, headers, request_body)
+
+        success = 200 <= status < 300
+        response = {
+            'success': success,
+            'message': '' if success else (payload or {}).get('code', 'HTTP_{0}'.format(status)),
+            'result': payload if success else None
+        }
+        sequence = response_headers.get('Sequence') if response_headers else None
+        if sequence is not None:
+            response['sequence'] = int(sequence)
+        return response
 
     def decrypt(self):
-        if encrypted:
-            cipher = AES.new(getpass.getpass(
-                'Input decryption password (string will not show)'))
-            try:
-                if isinstance(self.api_key, str):
-                    self.api_key = ast.literal_eval(self.api_key)
-                if isinstance(self.api_secret, str):
-                    self.api_secret = ast.literal_eval(self.api_secret)
-            except Exception:
-                pass
-            self.api_key = cipher.decrypt(self.api_key).decode()
-            self.api_secret = cipher.decrypt(self.api_secret).decode()
-        else:
-            raise ImportError('"pycrypto" module has to be installed')
+        import ast
+        AES, getpass = _crypto()
+        cipher = AES.new(getpass.getpass(
+            'Input decryption password (string will not show)'))
+        try:
+            if isinstance(self.api_key, str):
+                self.api_key = ast.literal_eval(self.api_key)
+            if isinstance(self.api_secret, str):
+                self.api_secret = ast.literal_eval(self.api_secret)
+        except Exception:
+            pass
+        self.api_key = cipher.decrypt(self.api_key).decode()
+        self.api_secret = cipher.decrypt(self.api_secret).decode()
+
+    def _spare_slot(self, priority):
+        # a rate slot for a hedged duplicate, only if one is free without waiting
+        if self.scheduler is not None:
+            if not self.scheduler.try_acquire(priority):
+                return None
+            return lambda: self.scheduler.release(priority)
+        with self._wait_lock:
+            now = time.time()
+            if self.last_call is not None and now - self.last_call < self.call_rate:
+                return None
+            self.last_call = now
+        return lambda: None
+
+    def _send(self, request_url, nonce, body, method, protection, priority):
+        if self.hedge is None or method != 'GET' or protection == PROTECTION_PRV:
+            return self.dispatch(request_url, nonce, body, method)
+        return self.hedge.call(lambda: self.dispatch(request_url, nonce, body, method),
+                               lambda: self._spare_slot(priority))
 
     def wait(self):
-        if self.last_call is None:
-            self.last_call = time.time()
-        else:
-            now = time.time()
-            passed = now - self.last_call
-            if passed < self.call_rate:
-                # print("sleep")
-                time.sleep(self.call_rate - passed)
+        with self._wait_lock:
+            if self.last_call is None:
+                self.last_call = time.time()
+            else:
+                now = time.time()
+                passed = now - self.last_call
+                if passed < self.call_rate:
+                    # print("sleep")
+                    time.sleep(self.call_rate - passed)
+
+                self.last_call = time.time()
+
+    @contextmanager
+    def rate_slot(self, priority=PRIORITY_MARKET_DATA, deadline=None):
+        """
+        Hold one request's share of the rate limit: the scheduler slot if
+        there is a scheduler, otherwise the ``calls_per_second`` gate.
 
-            self.last_call = time.time()
+        :raises bittrex.scheduler.RequestExpired: if the deadline passes while queued
+        """
+        if self.scheduler is None:
+            self.wait()
+            yield
+        else:
+            with self.scheduler.slot(priority, deadline):
+                yield
 
-    def _api_query(self, protection=None, path_dict=None, options=None, body=None):
+    def _api_query(self, protection=None, path_dict=None, options=None, body=None, priority=None,
+                   deadline=None, method='GET'):
         """
         Queries Bittrex
 
         :param request_url: fully-formed URL to request
         :type options: dict
+        :param priority: Scheduler priority class, one of the PRIORITY_* constants.
+            Defaults to account priority for authenticated calls and market data otherwise.
+        :type priority: int
+        :param deadline: Absolute time after which a queued request is dropped
+        :type deadline: float
+        :param method: HTTP method
+        :type method: str
         :return: JSON response from Bittrex
         :rtype : dict
         """
 
-        if not options:
-            options = {}
+        options = dict((k, v) for k, v in (options or {}).items() if v is not None)
+        if isinstance(body, (dict, list)):
+            import json
+            body = json.dumps(body, separators=(',', ':'))
+
+        if priority is None:
+            priority = PRIORITY_ACCOUNT if protection == PROTECTION_PRV else PRIORITY_MARKET_DATA
 
         request_url = self.base_url
         request_url = request_url.format(path=path_dict)
 
-        nonce = str(int(time.time() * 1000))
+        if options:
+            request_url += '?' + urlencode(options)
 
-        request_url += urlencode(options)
+        if self.cache is not None and method == 'GET' and protection != PROTECTION_PRV and \
+                isinstance(path_dict, str):
+            key = path_dict + ('?' + urlencode(options) if options else '')
+            return self.cache.fetch(key, lambda: self._query(request_url, body, method, protection, priority,
+                                                             deadline))
+        return self._query(request_url, body, method, protection, priority, deadline)
 
+    def _query(self, request_url, body, method, protection, priority, deadline):
         try:
-            self.wait()
-
-            return self.dispatch(request_url, nonce, body)
+            with self.rate_slot(priority, deadline):
+                # the nonce is taken once the slot is granted so time spent queued does not age it
+                nonce = str(int(self.clock() * 1000))
+                return self._send(request_url, nonce, body, method, protection, priority)
 
+        except RequestExpired as e:
+            return {
+                'success': False,
+                'message': 'REQUEST_EXPIRED',
+                'result': None,
+                'error': str(e)
+            }
         except Exception as e:
             return {
                 'success': False,
@@ -165,6 +363,67 @@ class Bittrex(object):
                 'error': str(e)
             }
 
+    def stream(self, path_dict, options=None, protection=None, priority=None, deadline=None, chunk_size=65536):
+        """
+        Iterate over the records of an array response while it downloads,
+        instead of buffering and parsing the whole body.
+
+        Example ::
+            >>> for summary in my_bittrex.stream('/markets/summaries'):
+            ...     print(summary['symbol'], summary['volume'])
+
+        :param path_dict: v3 path, e.g. ``/markets/summaries``
+        :type path_dict: str
+        :param options: Query string parameters
+        :type options: dict
+        :param chunk_size: Bytes read from the connection at a time
+        :type chunk_size: int
+        :raises bittrex.streaming.StreamError: on an error status or a malformed body
+        :raises bittrex.scheduler.RequestExpired: if the deadline passes while queued
+        """
+        from bittrex.streaming import StreamError, iter_array
+
+        options = dict((k, v) for k, v in (options or {}).items() if v is not None)
+        if priority is None:
+            priority = PRIORITY_ACCOUNT if protection == PROTECTION_PRV else PRIORITY_MARKET_DATA
+        request_url = self.base_url.format(path=path_dict)
+        if options:
+            request_url += '?' + urlencode(options)
+
+        def send():
+            nonce = str(int(self.clock() * 1000))
+            headers = self._headers(request_url, nonce, '', 'GET')
+            return self.stream_transport('GET', request_url, headers, '', chunk_size)
+
+        # the slot covers the request, not the time spent reading the body
+        with self.rate_slot(priority, deadline):
+            status, _, chunks = send()
+
+        if not 200 <= status < 300:
+            import json
+            try:
+                code = json.loads(b''.join(chunks).decode('utf-8'))['code']
+            except Exception:
+                code = 'HTTP_{0}'.format(status)
+            raise StreamError(code, status)
+        for record in iter_array(chunks):
+            yield record
+
+    def ping(self):
+        """
+        Used to check connectivity and read the exchange clock
+
+        Endpoint:
+        3.0 /ping
+
+        Example ::
+            {'success': True, 'message': '', 'result': {'serverTime': 1594596023162}}
+
+        :return: Server time in milliseconds since the epoch in JSON
+        :rtype : dict
+        """
+        return self._api_query(path_dict='/ping')
+
     def get_markets(self):
         """
         Used to get the open and available trading markets
@@ -257,6 +516,61 @@ class Bittrex(object):
         return self._api_query(
             path_dict='/markets/{marketSymbol}/ticker'.format(marketSymbol=market))
 
+    def get_market_tickers(self):
+        """
+        Used to get the top of book and last trade of every market in one call
+
+        Endpoint:
+        3.0 /markets/tickers
+
+        Example ::
+            {'success': True,
+             'message': '',
+             'result': [{'symbol': 'LTC-BTC', 'lastTradeRate': '0.00512',
+                         'bidRate': '0.00511', 'askRate': '0.00513'},
+                        ...
+                       ]
+            }
+
+        :return: Tickers of all markets in JSON
+        :rtype : dict
+        """
+        return self._api_query(path_dict='/markets/tickers')
+
+    def get_orderbook(self, market, depth_type=BOTH_ORDERBOOK, depth=25):
+        """
+        Used to get retrieve the orderbook for a given market.
+
+        Endpoint:
+        1.1 /public/getorderbook
+        2.0 /pub/Market/GetMarketOrderBook
+        3.0 /markets/{marketSymbol}/orderbook
+
+        Example ::
+            {'success': True,
+             'message': '',
+             'result': {'bid': [{'quantity': '12.37', 'rate': '0.02525'}, ...],
+                        'ask': [{'quantity': '32.55', 'rate': '0.02540'}, ...]}
+            }
+
+        :param market: String literal for the market (ex: BTC-LTC)
+        :type market: str
+        :param depth_type: buy, sell or both to identify the type of
+            orderbook to return.
+            Use constants BUY_ORDERBOOK, SELL_ORDERBOOK, BOTH_ORDERBOOK
+        :type depth_type: str
+        :param depth: Levels per side, the exchange accepts 1, 25 or 500
+        :type depth: int
+        :return: Orderbook of market in JSON
+        :rtype : dict
+        """
+        response = self._api_query(
+            path_dict='/markets/{marketSymbol}/orderbook'.format(marketSymbol=market), options={'depth': depth})
+        if response['success'] and depth_type != BOTH_ORDERBOOK:
+            side = 'bid' if depth_type == BUY_ORDERBOOK else 'ask'
+            response['result'] = {side: response['result'][side]}
+        return response
+
     def buy_limit(self, market, quantity, rate):
         """
         Used to place a buy order in a specific market. Use buylimit to place
@@ -266,6 +580,7 @@ class Bittrex(object):
         Endpoint:
         1.1 /market/buylimit
         2.0 NO Direct equivalent.  Use trade_buy for LIMIT and MARKET buys
+        3.0 POST /orders
 
         :param market: String literal for the market (ex: BTC-LTC)
         :type market: str
@@ -277,11 +592,8 @@ class Bittrex(object):
         :return:
         :rtype : dict
         """
-        return self._api_query(path_dict={
-            API_V1_1: '/market/buylimit',
-        }, options={'market': market,
-                    'quantity': quantity,
-                    'rate': rate}, protection=PROTECTION_PRV)
+        return self.trade_buy(market=market, order_type=ORDERTYPE_LIMIT, quantity=quantity, rate=rate,
+                              time_in_effect=TIMEINEFFECT_GOOD_TIL_CANCELLED)
 
     def sell_limit(self, market, quantity, rate):
         """
@@ -292,6 +604,7 @@ class Bittrex(object):
         Endpoint:
         1.1 /market/selllimit
         2.0 NO Direct equivalent.  Use trade_sell for LIMIT and MARKET sells
+        3.0 POST /orders
 
         :param market: String literal for the market (ex: BTC-LTC)
         :type market: str
@@ -303,11 +616,8 @@ class Bittrex(object):
         :return:
         :rtype : dict
         """
-        return self._api_query(path_dict={
-            API_V1_1: '/market/selllimit',
-        }, options={'market': market,
-                    'quantity': quantity,
-                    'rate': rate}, protection=PROTECTION_PRV)
+        return self.trade_sell(market=market, order_type=ORDERTYPE_LIMIT, quantity=quantity, rate=rate,
+                               time_in_effect=TIMEINEFFECT_GOOD_TIL_CANCELLED)
 
     def cancel(self, uuid):
         """
@@ -316,16 +626,15 @@ class Bittrex(object):
         Endpoint:
         1.1 /market/cancel
         2.0 /key/market/tradecancel
+        3.0 DELETE /orders/{orderId}
 
         :param uuid: uuid of buy or sell order
         :type uuid: str
         :return:
         :rtype : dict
         """
-        return self._api_query(path_dict={
-            API_V1_1: '/market/cancel',
-            API_V2_0: '/key/market/tradecancel'
-        }, options={'uuid': uuid, 'orderid': uuid}, protection=PROTECTION_PRV)
+        return self._api_query(path_dict='/orders/{orderId}'.format(orderId=uuid), method='DELETE',
+                               protection=PROTECTION_PRV, priority=PRIORITY_CANCEL)
 
     def get_open_orders(self, market=None):
         """
@@ -335,16 +644,15 @@ class Bittrex(object):
         Endpoint:
         1.1 /market/getopenorders
         2.0 /key/market/getopenorders
+        3.0 /orders/open
 
         :param market: String literal for the market (ie. BTC-LTC)
         :type market: str
         :return: Open orders info in JSON
         :rtype : dict
         """
-        return self._api_query(path_dict={
-            API_V1_1: '/market/getopenorders',
-            API_V2_0: '/key/market/getopenorders'
-        }, options={'market': market, 'marketname': market} if market else None, protection=PROTECTION_PRV)
+        return self._api_query(path_dict='/orders/open', options={'marketSymbol': market},
+                               protection=PROTECTION_PRV)
 
     def get_balances(self):
         """
@@ -353,6 +661,7 @@ class Bittrex(object):
         Endpoint:
         1.1 /account/getbalances
         2.0 /key/balance/GetBalances
+        3.0 /balances
 
         Example ::
             {'success': True,
@@ -370,10 +679,7 @@ class Bittrex(object):
         :return: Balances info in JSON
         :rtype : dict
         """
-        return self._api_query(path_dict={
-            API_V1_1: '/account/getbalances',
-            API_V2_0: '/key/balance/GetBalances'
-        }, protection=PROTECTION_PRV)
+        return self._api_query(path_dict='/balances', protection=PROTECTION_PRV)
 
     def get_balance(self, currency):
         """
@@ -382,6 +688,7 @@ class Bittrex(object):
         Endpoint:
         1.1 /account/getbalance
         2.0 /key/balance/getbalance
+        3.0 /balances/{currencySymbol}
 
         Example ::
             {'success': True,
@@ -399,10 +706,8 @@ class Bittrex(object):
         :return: Balance info in JSON
         :rtype : dict
         """
-        return self._api_query(path_dict={
-            API_V1_1: '/account/getbalance',
-            API_V2_0: '/key/balance/getbalance'
-        }, options={'currency': currency, 'currencyname': currency}, protection=PROTECTION_PRV)
+        return self._api_query(path_dict='/balances/{currencySymbol}'.format(currencySymbol=currency),
+                               protection=PROTECTION_PRV)
 
     def get_deposit_address(self, currency):
         """
@@ -460,6 +765,7 @@ class Bittrex(object):
         Endpoint:
         1.1 /account/getorderhistory
         2.0 /key/orders/getorderhistory or /key/market/GetOrderHistory
+        3.0 /orders/closed
 
         :param market: optional a string literal for the market (ie. BTC-LTC).
             If omitted, will return for all markets
@@ -467,16 +773,8 @@ class Bittrex(object):
         :return: order history in JSON
         :rtype : dict
         """
-        if market:
-            return self._api_query(path_dict={
-                API_V1_1: '/account/getorderhistory',
-                API_V2_0: '/key/market/GetOrderHistory'
-            }, options={'market': market, 'marketname': market}, protection=PROTECTION_PRV)
-        else:
-            return self._api_query(path_dict={
-                API_V1_1: '/account/getorderhistory',
-                API_V2_0: '/key/orders/getorderhistory'
-            }, protection=PROTECTION_PRV)
+        return self._api_query(path_dict='/orders/closed', options={'marketSymbol': market},
+                               protection=PROTECTION_PRV)
 
     def get_order(self, uuid):
         """
@@ -485,16 +783,14 @@ class Bittrex(object):
         Endpoint:
         1.1 /account/getorder
         2.0 /key/orders/getorder
+        3.0 /orders/{orderId}
 
         :param uuid: uuid of buy or sell order
         :type uuid: str
         :return:
         :rtype : dict
         """
-        return self._api_query(path_dict={
-            API_V1_1: '/account/getorder',
-            API_V2_0: '/key/orders/getorder'
-        }, options={'uuid': uuid, 'orderid': uuid}, protection=PROTECTION_PRV)
+        return self._api_query(path_dict='/orders/{orderId}'.format(orderId=uuid), protection=PROTECTION_PRV)
 
     def get_withdrawal_history(self, currency=None):
         """
@@ -634,6 +930,33 @@ class Bittrex(object):
             API_V2_0: '/key/balance/getpendingdeposits'
         }, options={'currencyname': currency}, protection=PROTECTION_PRV)
 
+    def _trade(self, direction, market, order_type, quantity, rate, time_in_effect, condition_type, target):
+        order_type = order_type or ORDERTYPE_LIMIT
+        order = order_payload(direction, market, order_type, quantity, rate, time_in_effect)
+
+        if condition_type in (None, CONDITIONTYPE_NONE):
+            return self._api_query(path_dict='/orders', method='POST', body=order,
+                                   protection=PROTECTION_PRV, priority=PRIORITY_ORDER)
+
+        if condition_type == CONDITIONTYPE_GREATER_THAN:
+            operand = OPERAND_GTE
+        elif condition_type == CONDITIONTYPE_LESS_THAN:
+            operand = OPERAND_LTE
+        else:
+            # stop losses trigger against the position: sells on the way down, buys on the way up
+            operand = OPERAND_LTE if direction == DIRECTION_SELL else OPERAND_GTE
+        conditional = {
+            'marketSymbol': market,
+            'operand': operand,
+            'orderToCreate': order
+        }
+        if condition_type == CONDITIONTYPE_STOP_LOSS_PERCENTAGE:
+            conditional['trailingStopPercent'] = format_decimal(target)
+        else:
+            conditional['triggerPrice'] = format_decimal(target)
+        return self._api_query(path_dict='/conditional-orders', method='POST', body=conditional,
+                               protection=PROTECTION_PRV, priority=PRIORITY_ORDER)
+
     def trade_sell(self, market=None, order_type=None, quantity=None, rate=None, time_in_effect=None,
                    condition_type=None, target=0.0):
         """
@@ -641,6 +964,7 @@ class Bittrex(object):
         Endpoint
         1.1 NO EQUIVALENT -- see sell_market or sell_limit
         2.0 /key/market/tradesell
+        3.0 POST /orders, or POST /conditional-orders when condition_type is set
 
         :param market: String literal for the market (ex: BTC-LTC)
         :type market: str
@@ -662,17 +986,8 @@ class Bittrex(object):
         :type target: float
         :return:
         """
-        return self._api_query(path_dict={
-            API_V2_0: '/key/market/tradesell'
-        }, options={
-            'marketname': market,
-            'ordertype': order_type,
-            'quantity': quantity,
-            'rate': rate,
-            'timeInEffect': time_in_effect,
-            'conditiontype': condition_type,
-            'target': target
-        }, protection=PROTECTION_PRV)
+        return self._trade(DIRECTION_SELL, market, order_type, quantity, rate, time_in_effect, condition_type,
+                           target)
 
     def trade_buy(self, market=None, order_type=None, quantity=None, rate=None, time_in_effect=None,
                   condition_type=None, target=0.0):
@@ -681,6 +996,7 @@ class Bittrex(object):
         Endpoint
         1.1 NO EQUIVALENT -- see buy_market or buy_limit
         2.0 /key/market/tradebuy
+        3.0 POST /orders, or POST /conditional-orders when condition_type is set
 
         :param market: String literal for the market (ex: BTC-LTC)
         :type market: str
@@ -702,55 +1018,87 @@ class Bittrex(object):
         :type target: float
         :return:
         """
-        return self._api_query(path_dict={
-            API_V2_0: '/key/market/tradebuy'
-        }, options={
-            'marketname': market,
-            'ordertype': order_type,
-            'quantity': quantity,
-            'rate': rate,
-            'timeInEffect': time_in_effect,
-            'conditiontype': condition_type,
-            'target': target
-        }, protection=PROTECTION_PRV)
+        return self._trade(DIRECTION_BUY, market, order_type, quantity, rate, time_in_effect, condition_type,
+                           target)
+
+    def batch(self, operations):
+        """
+        Place and cancel several orders in one request.
+
+        Endpoint:
+        3.0 POST /batch
+
+        Example ::
+            >>> my_bittrex.batch([
+            ...     {'resource': 'ORDER', 'operation': 'POST',
+            ...      'payload': order_payload(DIRECTION_BUY, 'LTC-BTC', ORDERTYPE_LIMIT, 1, 0.005)},
+            ...     {'resource': 'ORDER', 'operation': 'DELETE', 'payload': {'id': '<order id>'}}])
+            {'success': True,
+             'message': '',
+             'result': [{'status': 201, 'payload': {'id': ..., 'status': 'OPEN', ...}},
+                        {'status': 200, 'payload': {'id': ..., 'status': 'CLOSED', ...}}]
+            }
+
+        :param operations: Operations executed in order
+        :type operations: list
+        :return: One ``status``/``payload`` entry per operation
+        :rtype : dict
+        """
+        cancels_only = operations and all(op['operation'] == 'DELETE' for op in operations)
+        return self._api_query(path_dict='/batch', method='POST', body=operations, protection=PROTECTION_PRV,
+                               priority=PRIORITY_CANCEL if cancels_only else PRIORITY_ORDER)
 
     def get_candles(self, market, tick_interval):
         """
-        Used to get all tick candles for a market.
+        Used to get the recent candles of a market.
 
         Endpoint:
         1.1 NO EQUIVALENT
         2.0 /pub/market/GetTicks
+        3.0 /markets/{marketSymbol}/candles/{candleInterval}/recent
 
         Example  ::
-            { success: true,
-              message: '',
-              result:
-               [ { O: 421.20630125,
-                   H: 424.03951276,
-                   L: 421.20630125,
-                   C: 421.20630125,
-                   V: 0.05187504,
-                   T: '2016-04-08T00:00:00',
-                   BV: 21.87921187 },
-                 { O: 420.206,
-                   H: 420.206,
-                   L: 416.78743422,
-                   C: 416.78743422,
-                   V: 2.42281573,
-                   T: '2016-04-09T00:00:00',
-                   BV: 1012.63286332 }]
+            {'success': True,
+             'message': '',
+             'result': [{'startsAt': '2020-07-12T00:00:00Z', 'open': '0.00421', 'high': '0.00424',
+                         'low': '0.00421', 'close': '0.00421', 'volume': '0.0518',
+                         'quoteVolume': '0.000218'},
+                        ...
+                       ]
             }
 
+        :param market: String literal for the market (ex: LTC-BTC)
+        :type market: str
+        :param tick_interval: One of the TICKINTERVAL_* constants; v3 has no
+            thirty minute candles
+        :type tick_interval: str
         :return: Available tick candles in JSON
         :rtype: dict
         """
+        return self._api_query(path_dict='/markets/{0}/candles/{1}/recent'.format(
+            market, _candle_interval(tick_interval)))
 
-        return self._api_query(path_dict={
-            API_V2_0: '/pub/market/GetTicks'
-        }, options={
-            'marketName': market, 'tickInterval': tick_interval
-        }, protection=PROTECTION_PUB)
+    def get_historical_candles(self, market, tick_interval, year, month=None, day=None):
+        """
+        Used to get the candles of one past period: a day of minute candles,
+        a month of hourly candles or a year of daily candles.
+
+        Endpoint:
+        3.0 /markets/{marketSymbol}/candles/{candleInterval}/historical/{year}/{month}/{day}
+
+        :param market: String literal for the market (ex: LTC-BTC)
+        :type market: str
+        :param tick_interval: One of the TICKINTERVAL_* constants
+        :type tick_interval: str
+        :return: Candles of the period in JSON
+        :rtype: dict
+        """
+        path = '/markets/{0}/candles/{1}/historical/{2}'.format(market, _candle_interval(tick_interval), year)
+        for part in (month, day):
+            if part is None:
+                break
+            path += '/{0}'.format(part)
+        return self._api_query(path_dict=path)
 
     def get_latest_candle(self, market, tick_interval):
         """
@@ -759,26 +1107,44 @@ class Bittrex(object):
         Endpoint:
         1.1 NO EQUIVALENT
         2.0 /pub/market/GetLatestTick
+        3.0 last entry of /markets/{marketSymbol}/candles/{candleInterval}/recent
 
         Example ::
-            { success: true,
-              message: '',
-              result:
-              [ {   O : 0.00350397,
-                    H : 0.00351000,
-                    L : 0.00350000,
-                    C : 0.00350350,
-                    V : 1326.42643480,
-                    T : 2017-11-03T03:18:00,
-                    BV: 4.64416189 } ]
+            {'success': True,
+             'message': '',
+             'result': [{'startsAt': '2017-11-03T03:18:00Z', 'open': '0.00350397', 'high': '0.00351',
+                         'low': '0.0035', 'close': '0.0035035', 'volume': '1326.4264348',
+                         'quoteVolume': '4.64416189'}]
             }
 
         :return: Available latest tick candle in JSON
         :rtype: dict
         """
+        response = self.get_candles(market, tick_interval)
+        if response['success'] and response['result']:
+            response['result'] = response['result'][-1:]
+        return response
 
-        return self._api_query(path_dict={
-            API_V2_0: '/pub/market/GetLatestTick'
-        }, options={
-            'marketName': market, 'tickInterval': tick_interval
-        }, protection=PROTECTION_PUB)
+    def get_market_trades(self, market):
+        """
+        Used to get the most recent trades of a market.
+
+        Endpoint:
+        1.1 /public/getmarkethistory
+        3.0 /markets/{marketSymbol}/trades
+
+        Example ::
+            {'success': True,
+             'message': '',
+             'result': [{'id': '8b1a...', 'executedAt': '2020-07-12T23:54:41.7Z',
+                         'quantity': '0.5', 'rate': '0.00421', 'takerSide': 'BUY'},
+                        ...
+                       ]
+            }
+
+        :param market: String literal for the market (ex: LTC-BTC)
+        :type market: str
+        :return: Recent trades in JSON
+        :rtype: dict
+        """
+        return self._api_query(path_dict='/markets/{marketSymbol}/trades'.format(marketSymbol=market))
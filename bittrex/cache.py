@@ -0,0 +1,238 @@
+"""
+   Response cache shared by every process on a host.
+
+   Reference data such as ``/markets`` and ``/currencies`` is the same for
+   every worker, so fetching it once per process is wasted rate budget and
+   turns a fleet restart into a burst of identical requests.
+   :class:`ResponseCache` keeps successful public GET responses in one
+   SQLite database in WAL mode, which lets any number of processes read
+   while one writes.  Entries expire after a TTL chosen by path pattern,
+   and the oldest are evicted once the stored bodies exceed ``max_bytes``.
+
+   A miss takes an exclusive lock for its key (a byte-range lock on a lock
+   file next to the database, so it works across processes) and checks the
+   database again before fetching.  Processes that missed at the same time
+   wait for the first one and then read its response: each entry is
+   fetched once per TTL however many workers want it.
+
+   Enable it with ``Bittrex(..., cache=ResponseCache('/tmp/bittrex-cache.db'))``.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from fnmatch import fnmatchcase
+
+try:
+    import fcntl
+except ImportError:
+    # no cross-process locking on Windows; fills are then only serialized within a process
+    fcntl = None
+
+# seconds a response stays fresh, by path; the first matching pattern wins
+DEFAULT_TTLS = (
+    ('/currencies', 3600.0),
+    ('/currencies/*', 3600.0),
+    ('/markets', 300.0),
+    ('/markets/*/candles/*/recent', 30.0),
+    ('/markets/*/candles/*/historical/*', 86400.0),
+)
+
+_STRIPES = 1024
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored REAL NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_stored ON responses (stored);
+'''
+
+
+class ResponseCache(object):
+    """
+    Example ::
+        >>> cache = ResponseCache('/var/tmp/bittrex.db', max_bytes=32 * 2 ** 20)
+        >>> my_bittrex = Bittrex(None, None, cache=cache)
+        >>> my_bittrex.get_markets()  # one process fetches, the others read its copy
+        >>> cache.metrics()
+        {'hits': 7, 'misses': 1, 'waits': 3, 'stores': 1, 'evictions': 0, 'errors': 0}
+    """
+
+    def __init__(self, path, max_bytes=64 * 2 ** 20, ttls=DEFAULT_TTLS, default_ttl=None, clock=time.time):
+        """
+        :param path: SQLite database file, shared by every process using the cache
+        :type path: str
+        :param max_bytes: Bound on the stored response bodies
+        :type max_bytes: int
+        :param ttls: ``(path pattern, seconds)`` pairs, patterns in fnmatch syntax
+        :type ttls: tuple
+        :param default_ttl: TTL of paths matching no pattern; None leaves them uncached
+        :type default_ttl: float
+        :param clock: Time source for expiry
+        :type clock: callable
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = tuple(ttls)
+        self.default_ttl = default_ttl
+        self.clock = clock
+
+        self._local = threading.local()
+        # POSIX record locks belong to the process, so threads also take a per-stripe lock
+        self._thread_locks = [threading.Lock() for _ in range(_STRIPES)]
+        self._lock_file = open(path + '.lock', 'a+b') if fcntl is not None else None
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'stores': 0, 'evictions': 0, 'errors': 0}
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def ttl(self, key):
+        """
+        :param key: Request path and query, e.g. ``/markets/LTC-BTC/candles/HOUR_1/recent``
+        :type key: str
+        :return: Seconds to keep the response, None if it is not cached
+        :rtype: float
+        """
+        path = key.split('?', 1)[0]
+        for pattern, seconds in self.ttls:
+            if fnmatchcase(path, pattern):
+                return seconds
+        return self.default_ttl
+
+    def get(self, key):
+        """
+        :return: The cached response, or None if missing or expired
+        :rtype: dict
+        """
+        try:
+            row = self._connection().execute('SELECT body, expires FROM responses WHERE key = ?',
+                                             (key,)).fetchone()
+        except sqlite3.Error:
+            # an unusable cache degrades to fetching
+            self._count('errors')
+            return None
+        if row is None or row[1] <= self.clock():
+            return None
+        return json.loads(row[0])
+
+    def put(self, key, response, ttl):
+        """
+        Store a response and evict the oldest entries beyond ``max_bytes``.
+        """
+        body = json.dumps(response, separators=(',', ':'))
+        now = self.clock()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('INSERT OR REPLACE INTO responses (key, body, size, stored, expires) '
+                               'VALUES (?, ?, ?, ?, ?)', (key, body, len(body), now, now + ttl))
+            evicted = connection.execute('DELETE FROM responses WHERE expires <= ?', (now,)).rowcount
+            total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in connection.execute('SELECT key, size FROM responses WHERE key != ? '
+                                                        'ORDER BY stored', (key,)).fetchall():
+                    connection.execute('DELETE FROM responses WHERE key = ?', (old_key,))
+                    evicted += 1
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        self._count('stores')
+        self._count('evictions', evicted)
+
+    def _acquire(self, stripe):
+        self._thread_locks[stripe].acquire()
+        if self._lock_file is not None:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_EX, 1, stripe)
+
+    def _release(self, stripe):
+        if self._lock_file is not None:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_UN, 1, stripe)
+        self._thread_locks[stripe].release()
+
+    def fetch(self, key, load):
+        """
+        Return the cached response for ``key``, or call ``load`` once across
+        all processes and cache its result if it succeeded.
+
+        :param key: Request path and query
+        :type key: str
+        :param load: Performs the request and returns the response dict
+        :type load: callable
+        :rtype: dict
+        """
+        ttl = self.ttl(key)
+        if ttl is None:
+            return load()
+        response = self.get(key)
+        if response is not None:
+            self._count('hits')
+            return response
+
+        stripe = zlib.crc32(key.encode('utf-8')) % _STRIPES
+        self._acquire(stripe)
+        try:
+            # another process may have filled it while we waited for the lock
+            response = self.get(key)
+            if response is not None:
+                self._count('waits')
+                return response
+            self._count('misses')
+            response = load()
+            if response.get('success'):
+                try:
+                    self.put(key, response, ttl)
+                except sqlite3.Error:
+                    self._count('errors')
+            return response
+        finally:
+            self._release(stripe)
+
+    def clear(self):
+        """
+        Drop every entry.
+        """
+        self._connection().execute('DELETE FROM responses')
+
+    def metrics(self):
+        """
+        ``waits`` counts misses answered by another process's fill,
+        ``errors`` database failures that fell back to fetching.
+
+        :rtype: dict
+        """
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self):
+        """
+        Close this thread's connection and the lock file.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
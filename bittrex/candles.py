@@ -0,0 +1,262 @@
+"""
+   Columnar candle representation.
+
+   ``get_candles`` returns a list of dicts.  The helpers here turn that into a
+   dict of NumPy arrays (one per field) and stack several markets into 2-D
+   arrays of shape ``(markets, candles)`` so that indicators, resampling and
+   backtests can operate on whole columns at once.
+"""
+
+import numpy as np
+
+from bittrex.bittrex import (TICKINTERVAL_ONEMIN, TICKINTERVAL_FIVEMIN, TICKINTERVAL_THIRTYMIN, TICKINTERVAL_HOUR,
+                             TICKINTERVAL_DAY)
+
+COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume', 'quote_volume')
+PRICE_COLUMNS = COLUMNS[1:]
+
+INTERVAL_SECONDS = {
+    TICKINTERVAL_ONEMIN: 60,
+    TICKINTERVAL_FIVEMIN: 300,
+    TICKINTERVAL_THIRTYMIN: 1800,
+    TICKINTERVAL_HOUR: 3600,
+    TICKINTERVAL_DAY: 86400,
+}
+
+# v3 field names first, 2.0 single-letter names second
+_FIELDS = {
+    'time': ('startsAt', 'T'),
+    'open': ('open', 'O'),
+    'high': ('high', 'H'),
+    'low': ('low', 'L'),
+    'close': ('close', 'C'),
+    'volume': ('volume', 'V'),
+    'quote_volume': ('quoteVolume', 'BV'),
+}
+
+
+def _field(candle, column):
+    v3, v2 = _FIELDS[column]
+    return candle[v3] if v3 in candle else candle[v2]
+
+
+def parse_time(value):
+    """
+    :param value: ISO-8601 timestamp as returned by the API
+    :type value: str
+    :rtype: numpy.datetime64
+    """
+    return np.datetime64(value.rstrip('Z'), 's')
+
+
+def candle_row(candle):
+    """
+    Convert a single candle dict (e.g. from ``get_latest_candle``) into a row.
+
+    :param candle: Candle dict in v3 or 2.0 format
+    :type candle: dict
+    :return: ``{column: scalar}`` with the same keys as :data:`COLUMNS`
+    :rtype: dict
+    """
+    row = {'time': parse_time(_field(candle, 'time'))}
+    for column in PRICE_COLUMNS:
+        row[column] = float(_field(candle, column))
+    return row
+
+
+def to_columns(candles):
+    """
+    Convert a candle list into columnar form.
+
+    Example ::
+        >>> columns = to_columns(my_bittrex.get_candles('BTC-LTC', TICKINTERVAL_ONEMIN)['result'])
+        >>> columns['close'][-5:]
+        array([0.0035, 0.00351, 0.00352, 0.0035, 0.00349])
+
+    :param candles: ``result`` of a ``get_candles`` call
+    :type candles: list
+    :return: ``{column: numpy.ndarray}``; ``time`` is ``datetime64[s]``, the rest float64
+    :rtype: dict
+    """
+    columns = {'time': np.array([parse_time(_field(c, 'time')) for c in candles], dtype='datetime64[s]')}
+    for column in PRICE_COLUMNS:
+        columns[column] = np.array([_field(c, column) for c in candles], dtype=np.float64)
+    return columns
+
+
+def append_row(columns, row):
+    """
+    Return new columns with one row appended, replacing the last row instead
+    if it has the same timestamp (the latest candle is still being built).
+
+    :type columns: dict
+    :type row: dict
+    :rtype: dict
+    """
+    replace = len(columns['time']) and columns['time'][-1] == row['time']
+    result = {}
+    for column in COLUMNS:
+        values = columns[column][:-1] if replace else columns[column]
+        result[column] = np.append(values, np.array([row[column]], dtype=values.dtype))
+    return result
+
+
+def stack(column_sets, column='close', length=None):
+    """
+    Stack one column of several markets into a 2-D array, aligned on the most
+    recent candle and left-padded with NaN where a market has less history.
+
+    :param column_sets: Columnar candles per market, in output row order
+    :type column_sets: list
+    :param column: Column to stack
+    :type column: str
+    :param length: Number of most recent candles to keep; defaults to the longest history
+    :type length: int
+    :return: Array of shape ``(len(column_sets), length)``
+    :rtype: numpy.ndarray
+    """
+    if length is None:
+        length = max(len(c[column]) for c in column_sets) if column_sets else 0
+    if column == 'time':
+        out = np.full((len(column_sets), length), np.datetime64('NaT'), dtype='datetime64[s]')
+    else:
+        out = np.full((len(column_sets), length), np.nan)
+    for i, columns in enumerate(column_sets):
+        values = columns[column][-length:] if length else columns[column][:0]
+        if len(values):
+            out[i, -len(values):] = values
+    return out
+
+
+def _width(tick_interval):
+    if tick_interval not in INTERVAL_SECONDS:
+        raise ValueError('unknown tick interval {0!r}'.format(tick_interval))
+    return INTERVAL_SECONDS[tick_interval]
+
+
+def _bucket(times, width):
+    # candles are labelled by their start; every interval divides a UTC day, so buckets align to the epoch
+    seconds = np.asarray(times, dtype='datetime64[s]').astype(np.int64)
+    return (seconds // width * width).astype('datetime64[s]')[()]
+
+
+def resample(columns, tick_interval):
+    """
+    Aggregate finer candles (normally one-minute) into a coarser interval.
+
+    Buckets start on multiples of the interval since the epoch, which is
+    how the API labels its own candles: hours on the hour, days at UTC
+    midnight.  Open is the first candle's, close the last's, high and low
+    the extremes and both volumes the sums.  Minutes without trades have
+    no candle and simply do not contribute; the last bucket may be partial.
+
+    Example ::
+        >>> minutes = to_columns(my_bittrex.get_candles('LTC-BTC', TICKINTERVAL_ONEMIN)['result'])
+        >>> hours = resample(minutes, TICKINTERVAL_HOUR)
+
+    :param columns: Columnar candles in ascending time order
+    :type columns: dict
+    :param tick_interval: Target TICKINTERVAL_* constant
+    :type tick_interval: str
+    :rtype: dict
+    """
+    width = _width(tick_interval)
+    buckets = _bucket(columns['time'], width)
+    if not len(buckets):
+        return dict((c, columns[c][:0].copy()) for c in COLUMNS)
+    starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+    ends = np.concatenate([starts[1:], [len(buckets)]]) - 1
+    return {
+        'time': buckets[starts],
+        'open': columns['open'][starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': columns['close'][ends],
+        'volume': np.add.reduceat(columns['volume'], starts),
+        'quote_volume': np.add.reduceat(columns['quote_volume'], starts),
+    }
+
+
+def _combine(bucket, base, row):
+    if base is None:
+        combined = dict((c, row[c]) for c in PRICE_COLUMNS)
+    else:
+        combined = {
+            'open': base['open'],
+            'high': max(base['high'], row['high']),
+            'low': min(base['low'], row['low']),
+            'close': row['close'],
+            'volume': base['volume'] + row['volume'],
+            'quote_volume': base['quote_volume'] + row['quote_volume'],
+        }
+    combined['time'] = bucket
+    return combined
+
+
+class Resampler(object):
+    """
+    A coarser candle series kept current from one-minute candles.
+
+    The API re-sends the latest minute while it is still trading, so the
+    building minute is held apart from the finished minutes of the open
+    bucket and replaced on every update.  Updates change the open bucket
+    in place; only a new bucket grows the columns.
+
+    Example ::
+        >>> hours = Resampler(TICKINTERVAL_HOUR, minutes)
+        >>> closed = hours.update(candle_row(my_bittrex.get_latest_candle('LTC-BTC', TICKINTERVAL_ONEMIN)['result']))
+        >>> hours.columns['close'][-1]
+
+    :ivar columns: Resampled columns, the last row being the open bucket
+    """
+
+    def __init__(self, tick_interval, columns=None):
+        """
+        :param tick_interval: Target TICKINTERVAL_* constant
+        :type tick_interval: str
+        :param columns: One-minute history to start from
+        :type columns: dict
+        """
+        self.width = _width(tick_interval)
+        self.tick_interval = tick_interval
+        self.columns = {'time': np.empty(0, dtype='datetime64[s]')}
+        for column in PRICE_COLUMNS:
+            self.columns[column] = np.empty(0)
+        # aggregate of the finished minutes of the open bucket, and the minute still building
+        self._base = None
+        self._minute = None
+        if columns is not None and len(columns['time']):
+            self.columns = resample(dict((c, columns[c][:-1]) for c in COLUMNS), tick_interval)
+            if len(self.columns['time']):
+                self._base = dict((c, self.columns[c][-1]) for c in COLUMNS)
+            self.update(dict((c, columns[c][-1]) for c in COLUMNS))
+
+    def update(self, row):
+        """
+        Fold in a one-minute candle.  Rows older than the latest minute are ignored.
+
+        :param row: One-minute candle as returned by :func:`candle_row`
+        :type row: dict
+        :return: The bucket this row closed, or None
+        :rtype: dict
+        """
+        minute = self._minute
+        if minute is not None and row['time'] < minute['time']:
+            return None
+        if minute is not None and row['time'] > minute['time']:
+            self._base = _combine(_bucket(minute['time'], self.width), self._base, minute)
+        self._minute = row
+
+        bucket = _bucket(row['time'], self.width)
+        closed = None
+        if self._base is not None and self._base['time'] != bucket:
+            closed = self._base
+            self._base = None
+        current = _combine(bucket, self._base, row)
+
+        if len(self.columns['time']) and self.columns['time'][-1] == bucket:
+            for column in COLUMNS:
+                self.columns[column][-1] = current[column]
+        else:
+            self.columns = append_row(self.columns, current)
+        return closed
@@ -0,0 +1,173 @@
+"""
+   Vectorized execution cost estimates over array-backed order books.
+
+   Order book snapshots of many markets are packed into ``(markets, levels)``
+   price and quantity arrays, best level first.  :func:`estimate` then walks
+   every book for a whole vector of order sizes in one call and reports the
+   average fill price, worst price touched, slippage against the best price
+   and the fee-inclusive cost or proceeds.
+"""
+
+import numpy as np
+
+from bittrex.bittrex import TRADE_FEE, DIRECTION_BUY, DIRECTION_SELL
+
+
+def _levels(entries):
+    # v3 uses quantity/rate, 1.1 used Quantity/Rate
+    rows = [(float(e['rate'] if 'rate' in e else e['Rate']),
+             float(e['quantity'] if 'quantity' in e else e['Quantity'])) for e in entries]
+    return rows
+
+
+class BookArrays(object):
+    """
+    Bid and ask ladders of many markets as padded 2-D arrays.
+
+    Missing levels have price NaN and quantity 0.
+
+    :ivar markets: Market symbol per row
+    :ivar bid_price: ``(markets, levels)`` descending bid rates
+    :ivar bid_quantity: ``(markets, levels)`` bid quantities
+    :ivar ask_price: ``(markets, levels)`` ascending ask rates
+    :ivar ask_quantity: ``(markets, levels)`` ask quantities
+    """
+
+    def __init__(self, markets, bid_price, bid_quantity, ask_price, ask_quantity):
+        self.markets = list(markets)
+        self.bid_price = np.asarray(bid_price, dtype=np.float64)
+        self.bid_quantity = np.asarray(bid_quantity, dtype=np.float64)
+        self.ask_price = np.asarray(ask_price, dtype=np.float64)
+        self.ask_quantity = np.asarray(ask_quantity, dtype=np.float64)
+        self._index = dict((m, i) for i, m in enumerate(self.markets))
+
+    @classmethod
+    def from_orderbooks(cls, books, depth=None):
+        """
+        Pack decoded order book responses.
+
+        Example ::
+            >>> books = dict((m, my_bittrex.get_orderbook(m)['result']) for m in markets)
+            >>> arrays = BookArrays.from_orderbooks(books, depth=25)
+
+        :param books: ``{market: orderbook}`` with v3 ``bid``/``ask`` or 1.1 ``buy``/``sell`` lists
+        :type books: dict
+        :param depth: Number of levels kept per side; defaults to the deepest book
+        :type depth: int
+        :rtype: BookArrays
+        """
+        markets = sorted(books)
+        sides = {}
+        for side, keys in (('bid', ('bid', 'buy')), ('ask', ('ask', 'sell'))):
+            ladders = []
+            for market in markets:
+                book = books[market]
+                entries = book.get(keys[0], book.get(keys[1])) or []
+                ladders.append(sorted(_levels(entries), reverse=(side == 'bid')))
+            levels = depth or max([len(ladder) for ladder in ladders] + [1])
+            price = np.full((len(markets), levels), np.nan)
+            quantity = np.zeros((len(markets), levels))
+            for i, ladder in enumerate(ladders):
+                ladder = ladder[:levels]
+                if ladder:
+                    price[i, :len(ladder)] = [rate for rate, _ in ladder]
+                    quantity[i, :len(ladder)] = [qty for _, qty in ladder]
+            sides[side] = price, quantity
+        return cls(markets, sides['bid'][0], sides['bid'][1], sides['ask'][0], sides['ask'][1])
+
+    def row(self, market):
+        """
+        :return: Row index of a market
+        :rtype: int
+        """
+        return self._index[market]
+
+    def side(self, direction):
+        """
+        :return: ``(price, quantity)`` of the side a ``direction`` order consumes
+        :rtype: tuple
+        """
+        if direction == DIRECTION_BUY:
+            return self.ask_price, self.ask_quantity
+        return self.bid_price, self.bid_quantity
+
+
+class CostEstimate(object):
+    """
+    Result of :func:`estimate`; every array has shape ``(markets, quantities)``.
+
+    :ivar vwap: Average fill price before fees, NaN when the book is too thin
+    :ivar worst: Price of the deepest level touched
+    :ivar slippage: Relative cost of ``vwap`` against the best price (positive is worse)
+    :ivar notional: Quote amount traded before fees
+    :ivar total: Quote paid including fees for buys, received net of fees for sells
+    :ivar effective: ``total / quantity``, the fee-inclusive average price
+    :ivar fillable: Whether the visible book can absorb the quantity
+    """
+
+    def __init__(self, vwap, worst, slippage, notional, total, effective, fillable):
+        self.vwap = vwap
+        self.worst = worst
+        self.slippage = slippage
+        self.notional = notional
+        self.total = total
+        self.effective = effective
+        self.fillable = fillable
+
+
+def estimate(books, quantities, direction=DIRECTION_BUY, fee=TRADE_FEE):
+    """
+    Walk the book of every market for every order size at once.
+
+    Example ::
+        >>> cost = estimate(arrays, [1, 10, 100], DIRECTION_BUY)
+        >>> cost.slippage[arrays.row('LTC-BTC')]
+        array([0.    , 0.0012, 0.0094])
+
+    :param books: Packed order books
+    :type books: BookArrays
+    :param quantities: Order sizes in market currency, shape ``(quantities,)`` shared by
+        all markets or ``(markets, quantities)``
+    :type quantities: numpy.ndarray
+    :param direction: DIRECTION_BUY walks the asks, DIRECTION_SELL the bids
+    :type direction: str
+    :param fee: Fee rate applied to the notional
+    :type fee: float
+    :rtype: CostEstimate
+    """
+    if direction not in (DIRECTION_BUY, DIRECTION_SELL):
+        raise ValueError('unknown direction {0}'.format(direction))
+    price, quantity = books.side(direction)
+    markets, levels = price.shape
+    quantities = np.asarray(quantities, dtype=np.float64)
+    if quantities.ndim == 1:
+        quantities = np.broadcast_to(quantities, (markets, len(quantities)))
+
+    filled_price = np.nan_to_num(price)
+    cum_qty = np.cumsum(quantity, axis=1)
+    cum_notional = np.cumsum(quantity * filled_price, axis=1)
+
+    # index of the level that completes each order
+    level = np.sum(cum_qty[:, None, :] < quantities[:, :, None] - 1e-15, axis=2)
+    fillable = level < levels
+    level = np.minimum(level, levels - 1)
+
+    before_qty = np.where(level > 0, np.take_along_axis(cum_qty, np.maximum(level - 1, 0), axis=1), 0.0)
+    before_notional = np.where(level > 0, np.take_along_axis(cum_notional, np.maximum(level - 1, 0), axis=1), 0.0)
+    worst = np.take_along_axis(price, level, axis=1)
+    notional = before_notional + (quantities - before_qty) * np.take_along_axis(filled_price, level, axis=1)
+
+    nan = np.full(quantities.shape, np.nan)
+    notional = np.where(fillable, notional, nan)
+    worst = np.where(fillable, worst, nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = notional / quantities
+        best = price[:, :1]
+        if direction == DIRECTION_BUY:
+            slippage = vwap / best - 1.0
+            total = notional * (1.0 + fee)
+        else:
+            slippage = 1.0 - vwap / best
+            total = notional * (1.0 - fee)
+        effective = total / quantities
+    return CostEstimate(vwap, worst, slippage, notional, total, effective, fillable)
@@ -0,0 +1,379 @@
+"""
+   Bulk download of market data into Parquet or Arrow files.
+
+   A run is split into tasks (one market's candles for one day, month or
+   year, one market's recent trades, one summaries snapshot).  Tasks run on
+   a pool of worker threads sharing one client, so a
+   :class:`bittrex.scheduler.RequestScheduler` keeps all of them inside the
+   rate limit.  Every task writes its own file, in row groups of
+   ``row_group_size`` records, under a temporary name that is renamed once
+   complete.  A JSON manifest in the output directory records finished
+   tasks, so an interrupted run picks up where it stopped.
+
+   Command line ::
+
+       bittrex-download --out data --quote BTC --intervals oneMin,hour \\
+           --start 2020-01-01 --end 2020-01-31 --datasets candles,trades
+
+   Writing files requires ``pyarrow`` (``pip install python-bittrex[export]``).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from bittrex.bittrex import (Bittrex, CANDLE_INTERVALS, TICKINTERVAL_ONEMIN, TICKINTERVAL_FIVEMIN,
+                             TICKINTERVAL_HOUR, TICKINTERVAL_DAY)
+from bittrex.scheduler import RequestScheduler
+
+DATASET_CANDLES = 'candles'
+DATASET_TRADES = 'trades'
+DATASET_SUMMARIES = 'summaries'
+DATASETS = (DATASET_CANDLES, DATASET_TRADES, DATASET_SUMMARIES)
+
+FORMAT_PARQUET = 'parquet'
+FORMAT_ARROW = 'arrow'
+
+MANIFEST = 'manifest.json'
+
+_TIME = 'time'
+_FLOAT = 'float'
+_STRING = 'string'
+
+SCHEMAS = {
+    DATASET_CANDLES: (('startsAt', _TIME), ('open', _FLOAT), ('high', _FLOAT), ('low', _FLOAT),
+                      ('close', _FLOAT), ('volume', _FLOAT), ('quoteVolume', _FLOAT)),
+    DATASET_TRADES: (('id', _STRING), ('executedAt', _TIME), ('quantity', _FLOAT), ('rate', _FLOAT),
+                     ('takerSide', _STRING)),
+    DATASET_SUMMARIES: (('symbol', _STRING), ('high', _FLOAT), ('low', _FLOAT), ('volume', _FLOAT),
+                        ('quoteVolume', _FLOAT), ('percentChange', _FLOAT), ('updatedAt', _TIME)),
+}
+
+# the historical endpoint serves a day of minute candles, a month of hourly and a year of daily ones
+_PERIODS = {
+    TICKINTERVAL_ONEMIN: 'day',
+    TICKINTERVAL_FIVEMIN: 'day',
+    TICKINTERVAL_HOUR: 'month',
+    TICKINTERVAL_DAY: 'year',
+}
+
+RECENT = 'recent'
+
+
+class DownloadError(Exception):
+    """
+    Raised when a task's request fails
+    """
+    pass
+
+
+class Task(namedtuple('Task', 'dataset market interval period')):
+    """
+    One request and one output file.
+
+    ``period`` is ``'recent'`` or a ``YYYY``, ``YYYY-MM`` or ``YYYY-MM-DD`` date.
+    """
+
+    @property
+    def key(self):
+        return '/'.join(p for p in self if p)
+
+    def path(self, extension):
+        parts = [p for p in (self.dataset, self.interval, self.market) if p]
+        return os.path.join(*(parts + [self.period + '.' + extension]))
+
+
+def _periods(interval, start, end):
+    unit = _PERIODS[interval]
+    periods = []
+    day = start
+    while day <= end:
+        if unit == 'day':
+            period = day.strftime('%Y-%m-%d')
+        elif unit == 'month':
+            period = day.strftime('%Y-%m')
+        else:
+            period = day.strftime('%Y')
+        if not periods or periods[-1] != period:
+            periods.append(period)
+        day += datetime.timedelta(days=1)
+    return periods
+
+
+def plan(markets, datasets=DATASETS, intervals=(TICKINTERVAL_HOUR,), start=None, end=None):
+    """
+    List the tasks of a run.
+
+    :param markets: Market symbols
+    :type markets: list
+    :param datasets: Any of DATASETS
+    :type datasets: list
+    :param intervals: TICKINTERVAL_* constants for candles
+    :type intervals: list
+    :param start: First day of historical candles; recent candles only if None
+    :type start: datetime.date
+    :param end: Last day of historical candles, defaults to yesterday
+    :type end: datetime.date
+    :rtype: list
+    """
+    tasks = []
+    if DATASET_SUMMARIES in datasets:
+        tasks.append(Task(DATASET_SUMMARIES, None, None, RECENT))
+    for market in markets:
+        if DATASET_TRADES in datasets:
+            tasks.append(Task(DATASET_TRADES, market, None, RECENT))
+        if DATASET_CANDLES in datasets:
+            for interval in intervals:
+                if start is None:
+                    periods = [RECENT]
+                else:
+                    periods = _periods(interval, start, end or datetime.date.today() - datetime.timedelta(days=1))
+                tasks.extend(Task(DATASET_CANDLES, market, interval, p) for p in periods)
+    return tasks
+
+
+def fetch(bittrex, task):
+    """
+    :return: Records of one task
+    :rtype: list
+    :raises DownloadError: if the request fails
+    """
+    if task.dataset == DATASET_SUMMARIES:
+        response = bittrex.get_market_summaries()
+    elif task.dataset == DATASET_TRADES:
+        response = bittrex.get_market_trades(task.market)
+    elif task.period == RECENT:
+        response = bittrex.get_candles(task.market, task.interval)
+    else:
+        response = bittrex.get_historical_candles(task.market, task.interval,
+                                                  *[int(p) for p in task.period.split('-')])
+    if not response['success'] or response['result'] is None:
+        raise DownloadError('{0}: {1}'.format(task.key, response.get('message')))
+    return response['result']
+
+
+# os.replace is atomic on every platform, os.rename only on POSIX (Python 2)
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _arrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('writing Parquet/Arrow files requires pyarrow: pip install python-bittrex[export]')
+    return pyarrow
+
+
+def _record_batch(pa, records, schema):
+    import numpy as np
+    arrays = []
+    for field, kind in schema:
+        values = [r.get(field) for r in records]
+        if kind == _TIME:
+            arrays.append(pa.array(np.array([None if v is None else v.rstrip('Z') for v in values],
+                                            dtype='datetime64[ms]'), type=pa.timestamp('ms', tz='UTC')))
+        elif kind == _FLOAT:
+            arrays.append(pa.array([None if v is None else float(v) for v in values], type=pa.float64()))
+        else:
+            arrays.append(pa.array(values, type=pa.string()))
+    return pa.RecordBatch.from_arrays(arrays, [field for field, _ in schema])
+
+
+def write(records, dataset, path, file_format=FORMAT_PARQUET, row_group_size=65536):
+    """
+    Write records to a Parquet or Arrow IPC file, one row group per
+    ``row_group_size`` records.  The file appears under ``path`` only once
+    it is complete.
+
+    :param records: Decoded API records
+    :type records: list
+    :param dataset: One of DATASETS, selects the schema
+    :type dataset: str
+    :return: Number of rows written
+    :rtype: int
+    """
+    pa = _arrow()
+    schema = SCHEMAS[dataset]
+    partial = path + '.partial'
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+    batches = [_record_batch(pa, records[i:i + row_group_size], schema)
+               for i in range(0, len(records), row_group_size)] or [_record_batch(pa, [], schema)]
+    if file_format == FORMAT_PARQUET:
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(partial, batches[0].schema)
+        try:
+            for batch in batches:
+                writer.write_table(pa.Table.from_batches([batch]), row_group_size=row_group_size)
+        finally:
+            writer.close()
+    elif file_format == FORMAT_ARROW:
+        sink = pa.OSFile(partial, 'wb')
+        writer = pa.ipc.new_file(sink, batches[0].schema)
+        try:
+            for batch in batches:
+                writer.write_batch(batch)
+        finally:
+            writer.close()
+            sink.close()
+    else:
+        raise ValueError('unknown format {0!r}'.format(file_format))
+    _replace(partial, path)
+    return len(records)
+
+
+class Manifest(object):
+    """
+    Finished tasks of an output directory, saved after every task.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.tasks = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.tasks = json.load(f)
+
+    def done(self, task, out_dir):
+        entry = self.tasks.get(task.key)
+        return entry is not None and os.path.exists(os.path.join(out_dir, entry['path']))
+
+    def record(self, task, path, rows):
+        with self._lock:
+            self.tasks[task.key] = {'path': path, 'rows': rows, 'finished': time.time()}
+            partial = self.path + '.partial'
+            with open(partial, 'w') as f:
+                json.dump(self.tasks, f, indent=1, sort_keys=True)
+            _replace(partial, self.path)
+
+
+def download(bittrex, tasks, out_dir, workers=4, file_format=FORMAT_PARQUET, row_group_size=65536,
+             progress=None):
+    """
+    Run tasks in parallel, skipping those the manifest lists as finished.
+
+    :param bittrex: Shared client; give it a RequestScheduler to bound the request rate
+    :type bittrex: Bittrex
+    :param tasks: Result of :func:`plan`
+    :type tasks: list
+    :param out_dir: Output directory, also holds the manifest
+    :type out_dir: str
+    :param progress: Called with ``(task, rows or exception)`` after every task
+    :type progress: callable
+    :return: ``{'done': n, 'skipped': n, 'rows': n, 'failed': [(key, message)]}``
+    :rtype: dict
+    """
+    _arrow()
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    manifest = Manifest(os.path.join(out_dir, MANIFEST))
+    pending = [t for t in tasks if not manifest.done(t, out_dir)]
+    extension = 'parquet' if file_format == FORMAT_PARQUET else 'arrow'
+
+    def run(task):
+        try:
+            relative = task.path(extension)
+            rows = write(fetch(bittrex, task), task.dataset, os.path.join(out_dir, relative), file_format,
+                         row_group_size)
+            manifest.record(task, relative, rows)
+            outcome = rows
+        except Exception as e:
+            outcome = e
+        if progress is not None:
+            progress(task, outcome)
+        return task, outcome
+
+    summary = {'done': 0, 'skipped': len(tasks) - len(pending), 'rows': 0, 'failed': []}
+    pool = ThreadPool(max(1, workers))
+    try:
+        for task, outcome in pool.imap_unordered(run, pending):
+            if isinstance(outcome, Exception):
+                summary['failed'].append((task.key, str(outcome)))
+            else:
+                summary['done'] += 1
+                summary['rows'] += outcome
+    finally:
+        pool.close()
+        pool.join()
+    return summary
+
+
+def _date(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='bittrex-download', description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--out', required=True, help='output directory, reused to resume a run')
+    parser.add_argument('--markets', help='comma separated market symbols, e.g. LTC-BTC,ETH-BTC')
+    parser.add_argument('--quote', help='every active market quoted in this currency, e.g. BTC')
+    parser.add_argument('--datasets', default=','.join(DATASETS), help='any of ' + ','.join(DATASETS))
+    parser.add_argument('--intervals', default=TICKINTERVAL_HOUR,
+                        help='candle intervals, any of ' + ','.join(sorted(CANDLE_INTERVALS)))
+    parser.add_argument('--start', type=_date, help='first day of historical candles, YYYY-MM-DD')
+    parser.add_argument('--end', type=_date, help='last day of historical candles, YYYY-MM-DD')
+    parser.add_argument('--format', default=FORMAT_PARQUET, choices=(FORMAT_PARQUET, FORMAT_ARROW))
+    parser.add_argument('--row-group-size', type=int, default=65536)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--calls-per-second', type=float, default=5.0)
+    return parser
+
+
+def main(argv=None, bittrex=None):
+    """
+    Console entry point of ``bittrex-download``.
+
+    :return: Process exit status
+    :rtype: int
+    """
+    args = _parser().parse_args(argv)
+    if bittrex is None:
+        bittrex = Bittrex(None, None, scheduler=RequestScheduler(calls_per_second=args.calls_per_second))
+    datasets = [d for d in args.datasets.split(',') if d]
+    intervals = [i for i in args.intervals.split(',') if i]
+    unknown = [d for d in datasets if d not in DATASETS] + [i for i in intervals if i not in CANDLE_INTERVALS]
+    if unknown:
+        sys.stderr.write('unknown dataset or interval: {0}\n'.format(', '.join(unknown)))
+        return 2
+
+    if args.markets:
+        markets = [m for m in args.markets.split(',') if m]
+    else:
+        response = bittrex.get_markets()
+        if not response['success']:
+            sys.stderr.write('market list failed: {0}\n'.format(response['message']))
+            return 1
+        markets = sorted(m['symbol'] for m in response['result']
+                         if m.get('status', 'ONLINE') == 'ONLINE' and
+                         (args.quote is None or m.get('quoteCurrencySymbol') == args.quote))
+
+    tasks = plan(markets, datasets, intervals, args.start, args.end)
+
+    def progress(task, outcome):
+        state = 'failed: {0}'.format(outcome) if isinstance(outcome, Exception) else '{0} rows'.format(outcome)
+        sys.stderr.write('{0} {1}\n'.format(task.key, state))
+
+    try:
+        summary = download(bittrex, tasks, args.out, args.workers, args.format, args.row_group_size, progress)
+    except ImportError as e:
+        sys.stderr.write('{0}\n'.format(e))
+        return 2
+    sys.stdout.write('{done} tasks written ({rows} rows), {skipped} already done, {0} failed\n'.format(
+        len(summary['failed']), **summary))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
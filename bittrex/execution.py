@@ -0,0 +1,473 @@
+"""
+   Client-side execution algorithms built on the v3 order endpoints.
+
+   Each algorithm is a small state machine: given the current time and the
+   touch (best bid and ask) it returns the child orders to place and the ones
+   to cancel.  :class:`ExecutionEngine` drives any number of them without
+   blocking the caller.  One cycle runs on a background thread and does the
+   following:
+
+   1. fetch the ticker of every market being worked, in parallel;
+   2. refresh open child orders (one ``get_open_orders`` call per refresh
+      interval, plus ``get_order`` for children that have closed);
+   3. poll every algorithm and send the resulting placements and cancels
+      through ``Bittrex.batch``, up to ``max_batch`` operations per request.
+
+   All requests go through the client, so its ``calls_per_second`` gate or
+   :class:`bittrex.scheduler.RequestScheduler` bounds the request rate.
+"""
+
+import time
+from multiprocessing.pool import ThreadPool
+
+from bittrex.bittrex import (ORDERTYPE_LIMIT, TIMEINEFFECT_GOOD_TIL_CANCELLED, TIMEINEFFECT_IMMEDIATE_OR_CANCEL,
+                             TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED, DIRECTION_BUY, DIRECTION_SELL,
+                             order_payload)
+
+STATE_WORKING = 'WORKING'
+STATE_CANCELLING = 'CANCELLING'
+STATE_DONE = 'DONE'
+STATE_CANCELLED = 'CANCELLED'
+
+_EPSILON = 1e-12
+
+
+class _Child(object):
+
+    def __init__(self, order_id, quantity, price):
+        self.id = order_id
+        self.quantity = quantity
+        self.price = price
+        self.filled = 0.0
+        self.proceeds = 0.0
+        self.commission = 0.0
+        self.open = True
+
+
+class ExecutionAlgo(object):
+    """
+    Tracks child orders and realized fills of one parent order.
+
+    Used directly it sweeps: every cycle the whole remainder is sent as an
+    immediate-or-cancel order at the far touch.  Subclasses override
+    :meth:`decide`, which returns ``(placements, cancels)`` where placements
+    are ``(quantity, price, time_in_effect)`` tuples and cancels are child
+    order ids.
+    """
+
+    def __init__(self, market, direction, quantity, limit_price=None, clock=time.time):
+        """
+        :param market: String literal for the market (ex: LTC-BTC)
+        :type market: str
+        :param direction: DIRECTION_BUY or DIRECTION_SELL
+        :type direction: str
+        :param quantity: Parent quantity in market currency
+        :type quantity: float
+        :param limit_price: Worst price any child may be placed at
+        :type limit_price: float
+        :param clock: Time source; replaced by the engine's when submitted
+        :type clock: callable
+        """
+        if direction not in (DIRECTION_BUY, DIRECTION_SELL):
+            raise ValueError('unknown direction {0}'.format(direction))
+        self.market = market
+        self.direction = direction
+        self.quantity = float(quantity)
+        self.limit_price = limit_price
+        self.clock = clock
+        self.state = STATE_WORKING
+        self.children = {}
+        self.arrival_price = None
+        self.started = None
+        self.finished = None
+        self.placed = 0
+        self.cancels = 0
+        self.rejects = 0
+
+    @property
+    def filled(self):
+        return sum(c.filled for c in self.children.values())
+
+    @property
+    def working(self):
+        """
+        :return: Unfilled quantity of open child orders
+        :rtype: float
+        """
+        return sum(c.quantity - c.filled for c in self.children.values() if c.open)
+
+    @property
+    def remaining(self):
+        """
+        :return: Quantity neither filled nor working
+        :rtype: float
+        """
+        return max(self.quantity - self.filled - self.working, 0.0)
+
+    def open_children(self):
+        return [c for c in self.children.values() if c.open]
+
+    def _cap(self, price):
+        if self.limit_price is None:
+            return price
+        if self.direction == DIRECTION_BUY:
+            return min(price, self.limit_price)
+        return max(price, self.limit_price)
+
+    def cancel(self):
+        """
+        Stop the algorithm; open children are cancelled on the next cycle.
+        """
+        if self.state == STATE_WORKING:
+            self.state = STATE_CANCELLING
+
+    def poll(self, now, bid, ask):
+        """
+        Advance the state machine.
+
+        :return: ``(placements, cancels)``
+        :rtype: tuple
+        """
+        if self.state in (STATE_DONE, STATE_CANCELLED):
+            return [], []
+        if self.started is None:
+            self.started = now
+            self.arrival_price = (bid + ask) / 2.0
+        if self.state == STATE_CANCELLING:
+            children = self.open_children()
+            if not children:
+                self.state = STATE_CANCELLED
+                self.finished = now
+            return [], [c.id for c in children]
+        if self.quantity - self.filled <= _EPSILON:
+            self.state = STATE_DONE
+            self.finished = now
+            return [], [c.id for c in self.open_children()]
+        return self.decide(now, bid, ask)
+
+    def decide(self, now, bid, ask):
+        if self.open_children() or self.remaining <= _EPSILON:
+            return [], []
+        price = self._cap(ask if self.direction == DIRECTION_BUY else bid)
+        return [(self.remaining, price, TIMEINEFFECT_IMMEDIATE_OR_CANCEL)], []
+
+    def on_order(self, view, quantity=None, price=None):
+        """
+        Record the latest v3 view of a child order.
+        """
+        child = self.children.get(view['id'])
+        if child is None:
+            child = _Child(view['id'], float(view.get('quantity', quantity)), price)
+            self.children[view['id']] = child
+            self.placed += 1
+        child.filled = float(view.get('fillQuantity', 0))
+        child.proceeds = float(view.get('proceeds', 0))
+        child.commission = float(view.get('commission', 0))
+        child.open = view.get('status') == 'OPEN'
+
+    def report(self):
+        """
+        Realized fill statistics.
+
+        Example ::
+            {'market': 'LTC-BTC', 'direction': 'BUY', 'state': 'DONE',
+             'quantity': 10.0, 'filled': 10.0, 'average_price': 0.01001,
+             'arrival_price': 0.01, 'slippage_bps': 10.0, 'commission': 0.00025,
+             'children': 5, 'cancels': 1, 'rejects': 0, 'elapsed': 60.2}
+
+        :rtype: dict
+        """
+        filled = self.filled
+        proceeds = sum(c.proceeds for c in self.children.values())
+        average = proceeds / filled if filled > _EPSILON else None
+        slippage = None
+        if average is not None and self.arrival_price:
+            slippage = (average / self.arrival_price - 1.0) * 1e4
+            if self.direction == DIRECTION_SELL:
+                slippage = -slippage
+        end = self.finished if self.finished is not None else self.clock()
+        return {
+            'market': self.market,
+            'direction': self.direction,
+            'state': self.state,
+            'quantity': self.quantity,
+            'filled': filled,
+            'average_price': average,
+            'arrival_price': self.arrival_price,
+            'slippage_bps': slippage,
+            'commission': sum(c.commission for c in self.children.values()),
+            'children': self.placed,
+            'cancels': self.cancels,
+            'rejects': self.rejects,
+            'elapsed': None if self.started is None else end - self.started
+        }
+
+
+class TWAP(ExecutionAlgo):
+    """
+    Spread the parent evenly over ``duration`` seconds in ``slices`` immediate
+    child orders taken at the touch.  Quantity missed in earlier slices is
+    carried into the next one.
+    """
+
+    def __init__(self, market, direction, quantity, duration, slices, limit_price=None, clock=time.time):
+        super(TWAP, self).__init__(market, direction, quantity, limit_price, clock)
+        self.duration = float(duration)
+        self.slices = int(slices)
+
+    def decide(self, now, bid, ask):
+        elapsed = now - self.started
+        due_slices = min(self.slices, int(elapsed * self.slices / self.duration) + 1)
+        due = self.quantity * due_slices / self.slices - self.filled - self.working
+        if due <= _EPSILON or self.open_children():
+            return [], []
+        price = self._cap(ask if self.direction == DIRECTION_BUY else bid)
+        return [(due, price, TIMEINEFFECT_IMMEDIATE_OR_CANCEL)], []
+
+
+class Iceberg(ExecutionAlgo):
+    """
+    Show at most ``display`` at a time, resting at the near touch (the bid
+    for buys, the ask for sells) and repricing when it moves more than
+    ``tolerance`` (relative) away from the working child.
+    """
+
+    def __init__(self, market, direction, quantity, display, limit_price=None, tolerance=0.0, clock=time.time):
+        super(Iceberg, self).__init__(market, direction, quantity, limit_price, clock)
+        self.display = float(display)
+        self.tolerance = tolerance
+
+    def decide(self, now, bid, ask):
+        price = self._cap(bid if self.direction == DIRECTION_BUY else ask)
+        children = self.open_children()
+        stale = [c.id for c in children if abs(c.price - price) > self.tolerance * price + _EPSILON]
+        if stale:
+            return [], stale
+        if children or self.remaining <= _EPSILON:
+            return [], []
+        return [(min(self.display, self.remaining), price, TIMEINEFFECT_GOOD_TIL_CANCELLED)], []
+
+
+class Ladder(ExecutionAlgo):
+    """
+    Post-only ladder: ``levels`` resting children spaced ``spacing``
+    (relative) apart behind the near touch.  Children are sent as
+    ``TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED`` so the exchange rejects any
+    that would cross; prices are also kept ``tick`` inside the far touch to
+    avoid needless rejects.  The whole ladder is re-laid when the touch moves
+    more than ``tolerance`` from its top level.
+    """
+
+    def __init__(self, market, direction, quantity, levels, spacing, tick=1e-8, limit_price=None, tolerance=0.0,
+                 clock=time.time):
+        super(Ladder, self).__init__(market, direction, quantity, limit_price, clock)
+        self.levels = int(levels)
+        self.spacing = spacing
+        self.tick = tick
+        self.tolerance = tolerance
+        self._top = None
+
+    def _prices(self, bid, ask):
+        if self.direction == DIRECTION_BUY:
+            top = min(bid, ask - self.tick)
+            return [self._cap(top * (1.0 - i * self.spacing)) for i in range(self.levels)]
+        top = max(ask, bid + self.tick)
+        return [self._cap(top * (1.0 + i * self.spacing)) for i in range(self.levels)]
+
+    def decide(self, now, bid, ask):
+        prices = self._prices(bid, ask)
+        children = self.open_children()
+        if children:
+            if abs(self._top - prices[0]) > self.tolerance * prices[0] + _EPSILON:
+                return [], [c.id for c in children]
+            return [], []
+        remaining = self.remaining
+        if remaining <= _EPSILON:
+            return [], []
+        self._top = prices[0]
+        size = remaining / self.levels
+        return [(size, p, TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED) for p in prices], []
+
+
+class ExecutionEngine(object):
+    """
+    Drives execution algorithms on a thread pool.
+
+    Example ::
+        >>> engine = ExecutionEngine(my_bittrex)
+        >>> twap = engine.submit(TWAP('LTC-BTC', DIRECTION_BUY, 100, duration=600, slices=20))
+        >>> while engine.active():
+        ...     engine.step()       # returns immediately
+        ...     do_other_work()
+        >>> twap.report()
+    """
+
+    def __init__(self, bittrex, workers=4, max_batch=25, refresh_interval=1.0, clock=time.time):
+        """
+        :param bittrex: Client used for tickers, order lookups and batches
+        :type bittrex: Bittrex
+        :param workers: Threads used for parallel requests within a cycle
+        :type workers: int
+        :param max_batch: Maximum operations per ``batch`` request
+        :type max_batch: int
+        :param refresh_interval: Seconds between open order refreshes
+        :type refresh_interval: float
+        :param clock: Time source
+        :type clock: callable
+        """
+        self.bittrex = bittrex
+        self.max_batch = max_batch
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.algos = []
+        self.errors = []
+        self._last_refresh = None
+        self._cycle_pool = ThreadPool(1)
+        self._io_pool = ThreadPool(workers)
+        self._cycle = None
+
+    def submit(self, algo):
+        """
+        :type algo: ExecutionAlgo
+        :return: The same algorithm, for chaining
+        :rtype: ExecutionAlgo
+        """
+        algo.clock = self.clock
+        self.algos.append(algo)
+        return algo
+
+    def active(self):
+        """
+        :return: Whether any algorithm has not finished or a cycle is still running
+        :rtype: bool
+        """
+        running = self._cycle is not None and not self._cycle.ready()
+        return running or any(a.state in (STATE_WORKING, STATE_CANCELLING) for a in self.algos)
+
+    def step(self):
+        """
+        Start a cycle unless one is already running.  Never blocks.
+
+        :return: True if a new cycle was started
+        :rtype: bool
+        """
+        if self._cycle is not None:
+            if not self._cycle.ready():
+                return False
+            try:
+                self._cycle.get()
+            except Exception as e:
+                self.errors.append(e)
+        self._cycle = self._cycle_pool.apply_async(self.run_cycle)
+        return True
+
+    def run(self, interval=0.5, timeout=None, max_cycles=None):
+        """
+        Blocking convenience loop until every algorithm finishes.
+
+        :param interval: Seconds slept between steps
+        :type interval: float
+        :param timeout: Wall-clock seconds after which still-working algorithms are cancelled
+        :type timeout: float
+        :param max_cycles: Number of cycles after which still-working algorithms are cancelled
+        :type max_cycles: int
+        :return: True if every algorithm finished on its own
+        :rtype: bool
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        cycles = 0
+        finished = True
+        while self.active():
+            if self.step():
+                cycles += 1
+            expired = deadline is not None and time.time() >= deadline
+            if finished and (expired or (max_cycles is not None and cycles >= max_cycles)):
+                finished = False
+                for algo in self.algos:
+                    algo.cancel()
+                # allow a few more cycles for the cancels, then give up
+                deadline = time.time() + max(10 * interval, 1.0)
+                max_cycles = None
+            elif not finished and expired:
+                break
+            time.sleep(interval)
+        if self._cycle is not None:
+            self._cycle.wait()
+        return finished
+
+    def shutdown(self):
+        for pool in (self._cycle_pool, self._io_pool):
+            pool.close()
+            pool.join()
+
+    def _quotes(self, markets):
+        futures = dict((m, self._io_pool.apply_async(self.bittrex.get_market_ticker, (m,))) for m in markets)
+        quotes = {}
+        for market, future in futures.items():
+            response = future.get()
+            if response['success']:
+                ticker = response['result']
+                quotes[market] = float(ticker['bidRate']), float(ticker['askRate'])
+        return quotes
+
+    def _refresh(self, algos):
+        response = self.bittrex.get_open_orders()
+        if not response['success']:
+            return
+        open_orders = dict((o['id'], o) for o in response['result'])
+        closed = []
+        for algo in algos:
+            for child in algo.open_children():
+                if child.id in open_orders:
+                    algo.on_order(open_orders[child.id])
+                else:
+                    closed.append((algo, child.id))
+        lookups = [(algo, self._io_pool.apply_async(self.bittrex.get_order, (order_id,))) for algo, order_id in closed]
+        for algo, future in lookups:
+            response = future.get()
+            if response['success']:
+                algo.on_order(response['result'])
+
+    def run_cycle(self):
+        """
+        Run one full cycle synchronously.
+        """
+        now = self.clock()
+        algos = [a for a in self.algos if a.state in (STATE_WORKING, STATE_CANCELLING)]
+        if not algos:
+            return
+        quotes = self._quotes(set(a.market for a in algos))
+        if self._last_refresh is None or now - self._last_refresh >= self.refresh_interval:
+            self._refresh(algos)
+            self._last_refresh = now
+
+        operations = []
+        for algo in algos:
+            if algo.market not in quotes:
+                continue
+            bid, ask = quotes[algo.market]
+            placements, cancels = algo.poll(now, bid, ask)
+            for order_id in cancels:
+                operations.append((algo, None, None, {'resource': 'ORDER', 'operation': 'DELETE',
+                                                      'payload': {'id': order_id}}))
+            for quantity, price, time_in_effect in placements:
+                payload = order_payload(algo.direction, algo.market, ORDERTYPE_LIMIT, quantity, price, time_in_effect)
+                operations.append((algo, quantity, price, {'resource': 'ORDER', 'operation': 'POST',
+                                                           'payload': payload}))
+
+        chunks = [operations[i:i + self.max_batch] for i in range(0, len(operations), self.max_batch)]
+        futures = [(chunk, self._io_pool.apply_async(self.bittrex.batch, ([op[3] for op in chunk],)))
+                   for chunk in chunks]
+        for chunk, future in futures:
+            response = future.get()
+            results = response['result'] if response['success'] else [None] * len(chunk)
+            for (algo, quantity, price, operation), result in zip(chunk, results):
+                ok = result is not None and 200 <= result['status'] < 300
+                if operation['operation'] == 'DELETE':
+                    algo.cancels += 1
+                    if ok:
+                        algo.on_order(result['payload'])
+                elif ok:
+                    algo.on_order(result['payload'], quantity, price)
+                else:
+                    algo.rejects += 1
@@ -0,0 +1,324 @@
+"""
+   Fixed-point prices and quantities.
+
+   Bittrex quotes every price and quantity with at most 8 decimals, so values
+   are held as integer counts of ``10 ** -8`` (satoshi-style units): exact,
+   cheap to compare and, in :class:`FixedArray` form, vectorized with plain
+   int64 arithmetic.  Per-market precision is applied by snapping to the
+   market's tick (price) and step (quantity), taken from ``/markets``.
+
+   Floats are converted with an explicit rounding direction.  A float that
+   is within binary error of a unit boundary, like ``0.1 + 0.2``, counts as
+   exact, so rounding down does not lose a unit to representation error.
+   Formatting never goes through a float::
+
+       >>> table = PrecisionTable.from_markets(my_bittrex.get_markets()['result'])
+       >>> price, quantity, valid = table.quantize(['LTC-BTC'], [DIRECTION_BUY], [0.0051234567], [1 / 3.0])
+       >>> price.to_strings(), quantity.to_strings()
+       (['0.005123'], ['0.33333333'])
+"""
+
+import numpy as np
+
+from bittrex.bittrex import DIRECTION_BUY, ORDERTYPE_LIMIT, order_payload
+
+SCALE = 8
+UNIT = 10 ** SCALE
+
+ROUND_DOWN = 'down'
+ROUND_UP = 'up'
+ROUND_NEAREST = 'nearest'
+
+# largest magnitude representable in int64 units
+MAX_VALUE = (2 ** 63 - 1) // UNIT
+
+
+def _parse_units(text):
+    text = text.strip()
+    sign = -1 if text.startswith('-') else 1
+    whole, _, fraction = text.lstrip('+-').partition('.')
+    if 'e' in text.lower() or len(fraction.rstrip('0')) > SCALE or not (whole or fraction):
+        raise ValueError('not a decimal with at most {0} places: {1!r}'.format(SCALE, text))
+    return sign * (int(whole or '0') * UNIT + int((fraction + '0' * SCALE)[:SCALE]))
+
+
+def _format_units(units):
+    whole, fraction = divmod(abs(units), UNIT)
+    text = '{0}{1}.{2:08d}'.format('-' if units < 0 else '', whole, fraction).rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def _snap(units, step, rounding):
+    if rounding == ROUND_DOWN:
+        return units // step * step
+    if rounding == ROUND_UP:
+        return -(-units // step) * step
+    if rounding == ROUND_NEAREST:
+        return (units + step // 2) // step * step
+    raise ValueError('unknown rounding {0!r}'.format(rounding))
+
+
+def _units_from_floats(values, rounding):
+    scaled = np.asarray(values, dtype=np.float64) * UNIT
+    if np.any(~np.isfinite(scaled)) or np.any(np.abs(scaled) >= 2.0 ** 63):
+        raise OverflowError('values must be finite and below {0} in magnitude'.format(MAX_VALUE))
+    nearest = np.rint(scaled)
+    if rounding == ROUND_NEAREST:
+        return nearest.astype(np.int64)
+    # within a few ulps of a unit is binary representation error, anything further is a real fraction
+    exact = np.abs(scaled - nearest) <= 4 * np.spacing(np.abs(scaled))
+    if rounding == ROUND_DOWN:
+        return np.where(exact, nearest, np.floor(scaled)).astype(np.int64)
+    if rounding == ROUND_UP:
+        return np.where(exact, nearest, np.ceil(scaled)).astype(np.int64)
+    raise ValueError('unknown rounding {0!r}'.format(rounding))
+
+
+class Fixed(object):
+    """
+    Exact decimal with 8 places.
+
+    Example ::
+        >>> Fixed.parse('0.1') + Fixed.from_float(0.2)
+        Fixed('0.3')
+    """
+
+    __slots__ = ('units',)
+
+    def __init__(self, units=0):
+        """
+        :param units: Value in ``10 ** -8`` units
+        :type units: int
+        """
+        self.units = int(units)
+
+    @classmethod
+    def parse(cls, text):
+        """
+        :param text: Decimal string as returned by the API, e.g. ``'0.00512000'``
+        :type text: str
+        :rtype: Fixed
+        """
+        return cls(_parse_units(text))
+
+    @classmethod
+    def from_float(cls, value, rounding=ROUND_NEAREST):
+        """
+        :param rounding: ROUND_DOWN, ROUND_UP or ROUND_NEAREST
+        :type rounding: str
+        :rtype: Fixed
+        """
+        return cls(int(_units_from_floats(value, rounding)))
+
+    def snap(self, step, rounding=ROUND_DOWN):
+        """
+        :param step: Tick or step size
+        :type step: Fixed
+        :return: Nearest multiple of ``step`` in the rounding direction
+        :rtype: Fixed
+        """
+        return Fixed(_snap(self.units, step.units, rounding))
+
+    def multiply(self, other, rounding=ROUND_NEAREST):
+        """
+        Product rounded back to 8 places, e.g. the notional of price x quantity.
+
+        :rtype: Fixed
+        """
+        return Fixed(_snap(self.units * other.units, UNIT, rounding) // UNIT)
+
+    def __add__(self, other):
+        return Fixed(self.units + other.units)
+
+    def __sub__(self, other):
+        return Fixed(self.units - other.units)
+
+    def __neg__(self):
+        return Fixed(-self.units)
+
+    def __eq__(self, other):
+        return isinstance(other, Fixed) and self.units == other.units
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return self.units < other.units
+
+    def __le__(self, other):
+        return self.units <= other.units
+
+    def __gt__(self, other):
+        return self.units > other.units
+
+    def __ge__(self, other):
+        return self.units >= other.units
+
+    def __hash__(self):
+        return hash(self.units)
+
+    def __float__(self):
+        return self.units / float(UNIT)
+
+    def __str__(self):
+        return _format_units(self.units)
+
+    def __repr__(self):
+        return "Fixed('{0}')".format(self)
+
+
+class FixedArray(object):
+    """
+    Vector of :class:`Fixed` values backed by an int64 array.
+    """
+
+    def __init__(self, units):
+        """
+        :param units: Values in ``10 ** -8`` units
+        :type units: numpy.ndarray
+        """
+        self.units = np.asarray(units, dtype=np.int64)
+
+    @classmethod
+    def parse(cls, texts):
+        """
+        :param texts: Decimal strings
+        :type texts: list
+        :rtype: FixedArray
+        """
+        return cls(np.fromiter((_parse_units(t) for t in texts), dtype=np.int64, count=len(texts)))
+
+    @classmethod
+    def from_floats(cls, values, rounding=ROUND_NEAREST):
+        """
+        :param rounding: ROUND_DOWN, ROUND_UP or ROUND_NEAREST
+        :type rounding: str
+        :raises OverflowError: for non-finite values or magnitudes above MAX_VALUE
+        :rtype: FixedArray
+        """
+        return cls(_units_from_floats(values, rounding))
+
+    def snap(self, step, rounding=ROUND_DOWN):
+        """
+        :param step: Step in units, a scalar or one per element
+        :type step: numpy.ndarray
+        :rtype: FixedArray
+        """
+        return FixedArray(_snap(self.units, np.asarray(step, dtype=np.int64), rounding))
+
+    def to_floats(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        return self.units / float(UNIT)
+
+    def to_strings(self):
+        """
+        :return: Exact decimal strings without trailing zeros
+        :rtype: list
+        """
+        return [_format_units(u) for u in self.units.tolist()]
+
+    def __len__(self):
+        return len(self.units)
+
+    def __getitem__(self, index):
+        units = self.units[index]
+        return FixedArray(units) if np.ndim(units) else Fixed(units)
+
+    def __add__(self, other):
+        return FixedArray(self.units + other.units)
+
+    def __sub__(self, other):
+        return FixedArray(self.units - other.units)
+
+    def __repr__(self):
+        return 'FixedArray({0!r})'.format(self.to_strings())
+
+
+class PrecisionTable(object):
+    """
+    Price tick, quantity step and minimum trade size of every market.
+
+    :ivar symbols: Market symbols
+    :ivar tick: Price tick per market, in units
+    :ivar step: Quantity step per market, in units
+    :ivar minimum: Minimum trade size per market, in units
+    """
+
+    def __init__(self, symbols, tick, step, minimum):
+        self.symbols = list(symbols)
+        self.tick = np.asarray(tick, dtype=np.int64)
+        self.step = np.asarray(step, dtype=np.int64)
+        self.minimum = np.asarray(minimum, dtype=np.int64)
+        self._index = dict((s, i) for i, s in enumerate(self.symbols))
+
+    @classmethod
+    def from_markets(cls, markets, quantity_precision=SCALE):
+        """
+        Build the table from ``get_markets()['result']``.
+
+        v3 reports the price precision (decimals) per market; quantities
+        accept ``quantity_precision`` decimals everywhere.
+
+        :param markets: v3 ``/markets`` rows
+        :type markets: list
+        :param quantity_precision: Decimals of order quantities
+        :type quantity_precision: int
+        :rtype: PrecisionTable
+        """
+        symbols = [m['symbol'] for m in markets]
+        tick = [10 ** (SCALE - min(int(m.get('precision', SCALE)), SCALE)) for m in markets]
+        step = [10 ** (SCALE - quantity_precision)] * len(markets)
+        minimum = [_parse_units(str(m.get('minTradeSize') or '0')) for m in markets]
+        return cls(symbols, tick, step, minimum)
+
+    def rows(self, symbols):
+        """
+        :return: Row index of each market
+        :rtype: numpy.ndarray
+        """
+        return np.fromiter((self._index[s] for s in symbols), dtype=np.intp, count=len(symbols))
+
+    def quantize(self, symbols, directions, prices, quantities):
+        """
+        Snap a batch of orders to their markets' precision.
+
+        Limits round away from a worse fill (buys down, sells up) and
+        quantities round down, so the result never spends more than asked.
+
+        :param symbols: Market per order
+        :type symbols: list
+        :param directions: DIRECTION_BUY or DIRECTION_SELL per order
+        :type directions: list
+        :param prices: Limit rates, floats or a FixedArray
+        :param quantities: Quantities, floats or a FixedArray
+        :return: ``(prices, quantities, valid)`` where ``valid`` marks orders
+            at or above the minimum trade size
+        :rtype: tuple
+        """
+        rows = self.rows(symbols)
+        buy = np.asarray(directions) == DIRECTION_BUY
+        if not isinstance(prices, FixedArray):
+            prices = FixedArray(np.where(buy, _units_from_floats(prices, ROUND_DOWN),
+                                         _units_from_floats(prices, ROUND_UP)))
+        if not isinstance(quantities, FixedArray):
+            quantities = FixedArray.from_floats(quantities, ROUND_DOWN)
+        tick = self.tick[rows]
+        price = np.where(buy, _snap(prices.units, tick, ROUND_DOWN), _snap(prices.units, tick, ROUND_UP))
+        quantity = _snap(quantities.units, self.step[rows], ROUND_DOWN)
+        valid = (quantity >= self.minimum[rows]) & (quantity > 0) & (price > 0)
+        return FixedArray(price), FixedArray(quantity), valid
+
+    def payloads(self, symbols, directions, prices, quantities, order_type=ORDERTYPE_LIMIT, time_in_effect=None):
+        """
+        Quantize a batch and build its ``POST /orders`` bodies with exact decimal strings.
+
+        :return: One payload per valid order, in input order
+        :rtype: list
+        """
+        price, quantity, valid = self.quantize(symbols, directions, prices, quantities)
+        price_text = price.to_strings()
+        quantity_text = quantity.to_strings()
+        return [order_payload(directions[i], symbols[i], order_type, quantity_text[i], price_text[i], time_in_effect)
+                for i in np.flatnonzero(valid)]
@@ -0,0 +1,212 @@
+"""
+   Hedged requests for idempotent public reads.
+
+   A request that has not answered after the ``percentile`` latency of recent
+   requests is probably stuck on a slow connection.  :class:`HedgePolicy`
+   then sends a duplicate, if the rate budget has a slot free right now,
+   and returns whichever answer arrives first.  The slower one is still
+   timed when it lands, which gives the latency saved by each winning hedge.
+   Attempts run on a pool of reused worker threads, and a hedge gives its
+   rate slot back as soon as the call has its answer.
+
+   Enable it on a client with ``Bittrex(..., hedge=HedgePolicy())``; only
+   unauthenticated GETs are hedged.
+"""
+
+import threading
+import time
+from collections import deque
+
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
+
+_PRIMARY = 'primary'
+_HEDGE = 'hedge'
+
+
+class _Call(object):
+    # outcome of both attempts of one hedged call
+
+    def __init__(self):
+        self.results = Queue()
+        self.winner = None
+        self.won_at = None
+        # releases the hedge's rate slot, until it has been released
+        self.release = None
+
+
+class HedgePolicy(object):
+    """
+    Decides when to hedge and keeps the latency statistics.
+    """
+
+    def __init__(self, percentile=95.0, window=256, min_samples=20, initial_delay=1.0, min_delay=0.01,
+                 clock=time.time):
+        """
+        :param percentile: Latency percentile after which a duplicate is sent
+        :type percentile: float
+        :param window: Number of recent latencies the percentile is taken over
+        :type window: int
+        :param min_samples: Samples needed before the percentile replaces ``initial_delay``
+        :type min_samples: int
+        :param initial_delay: Hedge delay in seconds until enough samples exist
+        :type initial_delay: float
+        :param min_delay: Lower bound of the hedge delay in seconds
+        :type min_delay: float
+        :param clock: Time source
+        :type clock: callable
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._delay = initial_delay
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._denied = 0
+        self._saved_total = 0.0
+        self._saved_max = 0.0
+        # idle workers and the attempts handed to them
+        self._idle = 0
+        self._work = Queue()
+
+    def delay(self):
+        """
+        :return: Seconds to wait for the first attempt before hedging
+        :rtype: float
+        """
+        with self._lock:
+            return self._delay
+
+    def _record(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+            if len(self._latencies) >= self.min_samples:
+                ordered = sorted(self._latencies)
+                k = min(int(len(ordered) * self.percentile / 100.0), len(ordered) - 1)
+                self._delay = max(ordered[k], self.min_delay)
+
+    def _release(self, call):
+        with self._lock:
+            release, call.release = call.release, None
+        if release is not None:
+            release()
+
+    def _attempt(self, call, tag, send):
+        started = self.clock()
+        try:
+            outcome = (send(), None)
+        except Exception as e:
+            outcome = (None, e)
+        finally:
+            if tag == _HEDGE:
+                self._release(call)
+        finished = self.clock()
+        self._record(finished - started)
+        with self._lock:
+            if call.winner == _HEDGE and tag == _PRIMARY and outcome[1] is None:
+                # the primary lost to the hedge: how much later than the answer we returned
+                saved = finished - call.won_at
+                self._saved_total += saved
+                self._saved_max = max(self._saved_max, saved)
+        call.results.put((tag, outcome))
+
+    def _worker(self, task):
+        while True:
+            self._attempt(*task)
+            with self._lock:
+                self._idle += 1
+            task = self._work.get()
+
+    def _start(self, call, tag, send):
+        task = (call, tag, send)
+        with self._lock:
+            # an idle worker is claimed here, so it is free when the task is queued
+            spawn = self._idle == 0
+            if not spawn:
+                self._idle -= 1
+        if not spawn:
+            self._work.put(task)
+            return
+        thread = threading.Thread(target=self._worker, args=(task,), name='bittrex-hedge')
+        thread.daemon = True
+        thread.start()
+
+    def call(self, send, admit):
+        """
+        Run ``send`` and hedge it once if it is slow.
+
+        :param send: Performs the request and returns its response
+        :type send: callable
+        :param admit: Called before hedging; returns a callable releasing
+            the rate slot it took, or None when no slot is free
+        :type admit: callable
+        :return: The first successful response
+        """
+        call = _Call()
+        with self._lock:
+            self._calls += 1
+        self._start(call, _PRIMARY, send)
+        pending = 1
+        try:
+            first = call.results.get(timeout=self.delay())
+        except Empty:
+            release = admit()
+            if release is None:
+                with self._lock:
+                    self._denied += 1
+            else:
+                with self._lock:
+                    self._hedged += 1
+                call.release = release
+                self._start(call, _HEDGE, send)
+                pending += 1
+            first = call.results.get()
+        try:
+            pending -= 1
+            # an error only wins if the other attempt fails as well
+            while first[1][1] is not None and pending:
+                first = call.results.get()
+                pending -= 1
+            with self._lock:
+                call.winner = first[0]
+                call.won_at = self.clock()
+                if first[0] == _HEDGE:
+                    self._hedge_wins += 1
+        finally:
+            # a losing hedge still in flight does not keep the slot past the caller
+            self._release(call)
+        response, error = first[1]
+        if error is not None:
+            raise error
+        return response
+
+    def metrics(self):
+        """
+        Example ::
+            {'calls': 1000, 'hedged': 48, 'hedge_rate': 0.048, 'hedge_wins': 31,
+             'denied': 3, 'delay': 0.182, 'saved_total': 12.4, 'saved_max': 1.9}
+
+        ``saved_*`` add up how much later the losing attempt answered each
+        time a hedge won, i.e. the latency the hedge removed.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'calls': self._calls,
+                'hedged': self._hedged,
+                'hedge_rate': self._hedged / float(self._calls) if self._calls else 0.0,
+                'hedge_wins': self._hedge_wins,
+                'denied': self._denied,
+                'delay': self._delay,
+                'saved_total': self._saved_total,
+                'saved_max': self._saved_max
+            }
@@ -0,0 +1,440 @@
+"""
+   Vectorized technical indicators over columnar candles.
+
+   Every batch function takes arrays whose last axis is time, so a single
+   market (1-D) and many markets stacked with :func:`bittrex.candles.stack`
+   (2-D) are handled by the same call.  Rows may be left-padded with NaN for
+   markets with shorter history.  Interior gaps stay NaN in the output; the
+   exponential indicators carry the last observation across a gap so the
+   candles after it are unaffected.
+
+   The ``*State`` classes carry the same indicators forward one candle at a
+   time in O(1), vectorized across markets, so appending the result of
+   ``get_latest_candle`` does not recompute the full window.
+
+   Exponential indicators (EMA, RSI and ATR with Wilder smoothing) are seeded
+   with the first observation, matching ``pandas.Series.ewm(adjust=False)``.
+"""
+
+import numpy as np
+
+_BLOCK = 64
+
+
+def _first_valid(x):
+    if x.shape[-1] == 0:
+        return np.zeros(x.shape[:-1], dtype=np.intp)
+    valid = ~np.isnan(x)
+    first = np.argmax(valid, axis=-1)
+    return np.where(valid.any(axis=-1), first, x.shape[-1])
+
+
+def _backfill_leading(x, first):
+    idx = np.minimum(first, x.shape[-1] - 1)[..., None]
+    seed = np.take_along_axis(x, idx, axis=-1)
+    leading = np.arange(x.shape[-1]) < first[..., None]
+    return np.where(leading, seed, x)
+
+
+def _forward_fill(x):
+    index = np.where(np.isnan(x), 0, np.arange(x.shape[-1]))
+    return np.take_along_axis(x, np.maximum.accumulate(index, axis=-1), axis=-1)
+
+
+def _last(x):
+    # final column, or NaN per row when there is no history at all
+    if x.shape[-1] == 0:
+        return np.full(x.shape[:-1], np.nan)
+    return x[..., -1]
+
+
+def _warmup(out, first, periods):
+    # blank the outputs that do not yet have ``periods`` observations behind them
+    position = np.arange(out.shape[-1]) - first[..., None]
+    out[position < periods] = np.nan
+    return out
+
+
+def _ema_filter(x, alpha):
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t - 1], evaluated blockwise as a
+    # lower-triangular matrix product so the Python loop runs n / _BLOCK times
+    n = x.shape[-1]
+    out = np.empty_like(x)
+    if n == 0:
+        return out
+    beta = 1.0 - alpha
+    k = np.arange(_BLOCK)
+    lag = k[:, None] - k[None, :]
+    weights = np.where(lag >= 0, alpha * beta ** np.clip(lag, 0, None), 0.0)
+    decay = beta ** (k + 1)
+    prev = x[..., 0]
+    for start in range(0, n, _BLOCK):
+        chunk = x[..., start:start + _BLOCK]
+        m = chunk.shape[-1]
+        y = np.matmul(chunk, weights[:m, :m].T) + prev[..., None] * decay[:m]
+        out[..., start:start + m] = y
+        prev = y[..., -1]
+    return out
+
+
+def _smooth(x, alpha, warmup, mask_gaps=True):
+    # a NaN inside the matrix product would spread to every output of its
+    # block, so interior gaps are forward-filled first and blanked afterwards
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] == 0:
+        return x.copy()
+    first = _first_valid(x)
+    gaps = np.isnan(x)
+    out = _ema_filter(_forward_fill(_backfill_leading(x, first)), alpha)
+    if mask_gaps:
+        out[gaps] = np.nan
+    return _warmup(out, first, warmup)
+
+
+def _rolling_sum(x, window):
+    # NaN-aware: any window containing a NaN yields NaN
+    missing = np.isnan(x)
+    filled = np.where(missing, 0.0, x)
+    pad = [(0, 0)] * (x.ndim - 1) + [(1, 0)]
+    csum = np.cumsum(np.pad(filled, pad), axis=-1)
+    cmiss = np.cumsum(np.pad(missing.astype(np.int64), pad), axis=-1)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= window:
+        total = csum[..., window:] - csum[..., :-window]
+        gaps = cmiss[..., window:] - cmiss[..., :-window]
+        out[..., window - 1:] = np.where(gaps == 0, total, np.nan)
+    return out
+
+
+def sma(values, window):
+    """
+    Simple moving average.
+
+    :param values: Prices, time on the last axis
+    :type values: numpy.ndarray
+    :param window: Number of candles averaged
+    :type window: int
+    :rtype: numpy.ndarray
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return _rolling_sum(values, window) / window
+
+
+def ema(values, span):
+    """
+    Exponential moving average with ``alpha = 2 / (span + 1)``.
+
+    :param values: Prices, time on the last axis
+    :type values: numpy.ndarray
+    :param span: EMA span in candles
+    :type span: int
+    :rtype: numpy.ndarray
+    """
+    return _smooth(values, 2.0 / (span + 1), 0)
+
+
+def _gain_loss(change):
+    missing = np.isnan(change)
+    gain = np.where(missing, np.nan, np.where(change > 0, change, 0.0))
+    loss = np.where(missing, np.nan, np.where(change < 0, -change, 0.0))
+    return gain, loss
+
+
+def rsi(close, period=14):
+    """
+    Relative strength index with Wilder smoothing.
+
+    :param close: Close prices, time on the last axis
+    :type close: numpy.ndarray
+    :param period: Smoothing period
+    :type period: int
+    :return: RSI in [0, 100]; NaN during the first ``period`` candles
+    :rtype: numpy.ndarray
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[-1] == 0:
+        return close.copy()
+    change = np.diff(close, axis=-1)
+    alpha = 1.0 / period
+    gain, loss = _gain_loss(change)
+    gain = _smooth(gain, alpha, 0)
+    loss = _smooth(loss, alpha, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    value = np.where(np.isnan(gain), np.nan, value)
+    pad = [(0, 0)] * (close.ndim - 1) + [(1, 0)]
+    out = np.pad(value, pad, constant_values=np.nan)
+    return _warmup(out, _first_valid(close), period)
+
+
+def true_range(high, low, close):
+    """
+    :return: Per-candle true range, the first candle uses ``high - low``
+    :rtype: numpy.ndarray
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    prev = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    prev = np.where(np.isnan(prev), close, prev)
+    return np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev)))
+
+
+def atr(high, low, close, period=14):
+    """
+    Average true range with Wilder smoothing.
+
+    :rtype: numpy.ndarray
+    """
+    return _smooth(true_range(high, low, close), 1.0 / period, period - 1)
+
+
+def vwap(high, low, close, volume, window=None):
+    """
+    Volume-weighted average of the typical price ``(high + low + close) / 3``.
+
+    :param window: Rolling window in candles; cumulative over the whole array if None
+    :type window: int
+    :rtype: numpy.ndarray
+    """
+    typical = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64) +
+               np.asarray(close, dtype=np.float64)) / 3.0
+    volume = np.asarray(volume, dtype=np.float64)
+    if window is None:
+        weighted = np.nancumsum(typical * volume, axis=-1)
+        total = np.nancumsum(volume, axis=-1)
+    else:
+        weighted = _rolling_sum(typical * volume, window)
+        total = _rolling_sum(volume, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = weighted / total
+    return np.where(total > 0, out, np.nan)
+
+
+def bollinger(close, window=20, k=2.0):
+    """
+    Bollinger bands using the population standard deviation.
+
+    :return: ``(middle, upper, lower)``
+    :rtype: tuple
+    """
+    close = np.asarray(close, dtype=np.float64)
+    # shift by the first valid price so the sum of squares does not cancel out
+    first = _first_valid(close)
+    ref = np.take_along_axis(np.nan_to_num(close), np.minimum(first, close.shape[-1] - 1)[..., None], axis=-1) \
+        if close.shape[-1] else close
+    shifted = close - ref
+    mean = _rolling_sum(shifted, window) / window
+    var = np.maximum(_rolling_sum(shifted * shifted, window) / window - mean * mean, 0.0)
+    middle = mean + ref
+    spread = k * np.sqrt(var)
+    return middle, middle + spread, middle - spread
+
+
+class _Ring(object):
+    # fixed-window buffer with running sums; re-summed on every wrap to cap drift
+
+    def __init__(self, window, history):
+        history = np.asarray(history, dtype=np.float64)
+        self.window = window
+        self.buffer = np.zeros(history.shape[:-1] + (window,))
+        self.count = 0
+        self.head = 0
+        self.total = np.zeros(history.shape[:-1])
+        self.total_sq = np.zeros(history.shape[:-1])
+        for i in range(max(0, history.shape[-1] - window), history.shape[-1]):
+            self.push(history[..., i])
+
+    def push(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        old = self.buffer[..., self.head]
+        if self.count >= self.window:
+            self.total = self.total - old
+            self.total_sq = self.total_sq - old * old
+        self.buffer[..., self.head] = values
+        self.total = self.total + values
+        self.total_sq = self.total_sq + values * values
+        self.count = min(self.count + 1, self.window)
+        self.head = (self.head + 1) % self.window
+        if self.head == 0 or np.isnan(old).any():
+            self.total = self.buffer.sum(axis=-1)
+            self.total_sq = (self.buffer * self.buffer).sum(axis=-1)
+
+    @property
+    def full(self):
+        return self.count >= self.window
+
+
+class SMAState(object):
+    """
+    Incremental :func:`sma`.
+
+    Example ::
+        >>> state = SMAState(20, columns['close'])
+        >>> state.update(candle_row(latest)['close'])
+    """
+
+    def __init__(self, window, history):
+        self._ring = _Ring(window, history)
+
+    @property
+    def value(self):
+        if not self._ring.full:
+            return np.full(self._ring.total.shape, np.nan)
+        return self._ring.total / self._ring.window
+
+    def update(self, values):
+        self._ring.push(values)
+        return self.value
+
+
+class EMAState(object):
+    """
+    Incremental :func:`ema`.
+    """
+
+    def __init__(self, span, history):
+        self.alpha = 2.0 / (span + 1)
+        self.value = _last(_smooth(history, self.alpha, 0, mask_gaps=False))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.value = np.where(np.isnan(self.value), values, self.alpha * values + (1 - self.alpha) * self.value)
+        return self.value
+
+
+class RSIState(object):
+    """
+    Incremental :func:`rsi`.
+    """
+
+    def __init__(self, close, period=14):
+        close = np.asarray(close, dtype=np.float64)
+        self.alpha = 1.0 / period
+        self.period = period
+        self.prev = _last(close)
+        gain, loss = _gain_loss(np.diff(close, axis=-1))
+        self.gain = _last(_smooth(gain, self.alpha, 0, mask_gaps=False))
+        self.loss = _last(_smooth(loss, self.alpha, 0, mask_gaps=False))
+        self.seen = np.asarray(np.sum(~np.isnan(close), axis=-1))
+
+    @property
+    def value(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = np.where(self.loss == 0, 100.0, 100.0 - 100.0 / (1.0 + self.gain / self.loss))
+        return np.where(self.seen > self.period, out, np.nan)
+
+    def update(self, close):
+        close = np.asarray(close, dtype=np.float64)
+        change = close - self.prev
+        self.gain = np.where(np.isnan(self.gain), np.maximum(change, 0.0),
+                             self.alpha * np.maximum(change, 0.0) + (1 - self.alpha) * self.gain)
+        self.loss = np.where(np.isnan(self.loss), np.maximum(-change, 0.0),
+                             self.alpha * np.maximum(-change, 0.0) + (1 - self.alpha) * self.loss)
+        self.prev = close
+        self.seen = self.seen + 1
+        return self.value
+
+
+class ATRState(object):
+    """
+    Incremental :func:`atr`.
+    """
+
+    def __init__(self, high, low, close, period=14):
+        self.alpha = 1.0 / period
+        self.period = period
+        close = np.asarray(close, dtype=np.float64)
+        self.prev = _last(close)
+        self.smoothed = _last(_smooth(true_range(high, low, close), self.alpha, 0, mask_gaps=False))
+        self.seen = np.asarray(np.sum(~np.isnan(close), axis=-1))
+
+    @property
+    def value(self):
+        return np.where(self.seen >= self.period, self.smoothed, np.nan)
+
+    def update(self, high, low, close):
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        prev = np.where(np.isnan(self.prev), close, self.prev)
+        tr = np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev)))
+        self.smoothed = np.where(np.isnan(self.smoothed), tr, self.alpha * tr + (1 - self.alpha) * self.smoothed)
+        self.prev = np.asarray(close, dtype=np.float64)
+        self.seen = self.seen + 1
+        return self.value
+
+
+class VWAPState(object):
+    """
+    Incremental :func:`vwap`, cumulative or over a rolling window.
+    """
+
+    def __init__(self, high, low, close, volume, window=None):
+        typical = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64) +
+                   np.asarray(close, dtype=np.float64)) / 3.0
+        volume = np.asarray(volume, dtype=np.float64)
+        self.window = window
+        if window is None:
+            self._weighted = np.nansum(typical * volume, axis=-1)
+            self._volume = np.nansum(volume, axis=-1)
+        else:
+            self._weighted = _Ring(window, typical * volume)
+            self._volume = _Ring(window, volume)
+
+    @property
+    def value(self):
+        if self.window is None:
+            weighted, total = self._weighted, self._volume
+        else:
+            weighted, total = self._weighted.total, self._volume.total
+            if not self._volume.full:
+                return np.full(np.shape(total), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, weighted / total, np.nan)
+
+    def update(self, high, low, close, volume):
+        typical = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64) +
+                   np.asarray(close, dtype=np.float64)) / 3.0
+        volume = np.asarray(volume, dtype=np.float64)
+        if self.window is None:
+            self._weighted = self._weighted + typical * volume
+            self._volume = self._volume + volume
+        else:
+            self._weighted.push(typical * volume)
+            self._volume.push(volume)
+        return self.value
+
+
+class BollingerState(object):
+    """
+    Incremental :func:`bollinger`.
+    """
+
+    def __init__(self, close, window=20, k=2.0):
+        close = np.asarray(close, dtype=np.float64)
+        self.k = k
+        first = _first_valid(close)
+        if close.shape[-1]:
+            self.ref = np.take_along_axis(np.nan_to_num(close), np.minimum(first, close.shape[-1] - 1)[..., None],
+                                          axis=-1)[..., 0]
+        else:
+            self.ref = None
+        self._ring = _Ring(window, close if self.ref is None else close - self.ref[..., None])
+
+    @property
+    def value(self):
+        ring = self._ring
+        if not ring.full:
+            nan = np.full(ring.total.shape, np.nan)
+            return nan, nan, nan
+        mean = ring.total / ring.window
+        spread = self.k * np.sqrt(np.maximum(ring.total_sq / ring.window - mean * mean, 0.0))
+        middle = mean + self.ref
+        return middle, middle + spread, middle - spread
+
+    def update(self, close):
+        close = np.asarray(close, dtype=np.float64)
+        if self.ref is None:
+            self.ref = np.nan_to_num(close)
+        self._ring.push(close - self.ref)
+        return self.value
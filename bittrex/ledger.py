@@ -0,0 +1,248 @@
+"""
+   Local balance ledger answering balance lookups from memory.
+
+   The ledger is seeded by one ``get_balances()`` call and then kept current
+   from our own order activity (reservations, cancels, fills) and, when a
+   balance stream is available, from its sequenced deltas.  A full refresh is
+   forced whenever the data is older than ``max_staleness`` seconds or a gap
+   in the stream sequence is detected.
+
+   A refresh snapshot may lag the stream.  The newest streamed row of each
+   currency is then laid over it; if the snapshot still predates the gap the
+   ledger stays dirty but waits ``resync_backoff`` seconds before asking again,
+   so lookups do not turn into one REST call each.
+"""
+
+import threading
+import time
+
+
+class StaleBalanceError(Exception):
+    """
+    Raised when the ledger cannot be refreshed within its staleness bound
+    """
+    pass
+
+
+def _parse_balance(row):
+    # v3 uses currencySymbol/total/available, 1.1 used Currency/Balance/Available
+    if 'currencySymbol' in row:
+        return row['currencySymbol'], float(row['total']), float(row['available'])
+    return row['Currency'], float(row['Balance'] or 0.0), float(row['Available'] or 0.0)
+
+
+class BalanceLedger(object):
+    """
+    In-memory view of account balances.
+
+    Example ::
+        >>> ledger = BalanceLedger(my_bittrex, max_staleness=30)
+        >>> ledger.available('BTC')
+        0.51
+        >>> ledger.reserve('BTC', 0.1)  # after placing a buy order
+        >>> ledger.available('BTC')
+        0.41
+    """
+
+    def __init__(self, bittrex, max_staleness=60.0, clock=time.time, resync_backoff=5.0):
+        """
+        :param bittrex: Client used for the seed and resync ``get_balances()`` calls
+        :type bittrex: Bittrex
+        :param max_staleness: Maximum age in seconds of data served from memory
+        :type max_staleness: float
+        :param clock: Time source, mostly useful for tests
+        :type clock: callable
+        :param resync_backoff: Seconds between retries while snapshots lag a stream gap
+        :type resync_backoff: float
+        """
+        self.bittrex = bittrex
+        self.max_staleness = max_staleness
+        self.clock = clock
+        self.resync_backoff = resync_backoff
+        self.sequence = None
+        self.last_sync = None
+
+        self._lock = threading.RLock()
+        self._total = {}
+        self._available = {}
+        self._dirty = True
+        self._gap = None
+        self._retry_at = None
+        self._streamed = {}
+
+    def load(self, balances, sequence=None):
+        """
+        Replace the ledger contents with a full balance list.
+
+        :param balances: ``result`` of a ``get_balances()`` call
+        :type balances: list
+        :param sequence: Stream sequence number the snapshot corresponds to, if known
+        :type sequence: int
+        """
+        total = {}
+        available = {}
+        for row in balances:
+            currency, row_total, row_available = _parse_balance(row)
+            total[currency] = row_total
+            available[currency] = row_available
+        with self._lock:
+            complete = True
+            if sequence is not None and self.sequence is not None and sequence < self.sequence:
+                # an older snapshot than what the stream already gave us: keep
+                # the newer streamed rows, it is only usable if it covers the gap
+                for currency, (row_sequence, row_total, row_available) in self._streamed.items():
+                    if row_sequence > sequence:
+                        total[currency] = row_total
+                        available[currency] = row_available
+                complete = self._gap is None or sequence >= self._gap
+                sequence = self.sequence
+            self._total = total
+            self._available = available
+            self.sequence = sequence
+            self.last_sync = self.clock()
+            if complete:
+                self._dirty = False
+                self._gap = None
+                self._retry_at = None
+                self._streamed = {}
+            else:
+                self._retry_at = self.last_sync + self.resync_backoff
+
+    def resync(self):
+        """
+        Force a full refresh through ``get_balances()``.
+
+        :raises StaleBalanceError: if the refresh call fails
+        """
+        response = self.bittrex.get_balances()
+        if not response.get('success', True) or response.get('result') is None:
+            with self._lock:
+                self._dirty = True
+            raise StaleBalanceError('balance refresh failed: {0}'.format(response.get('message')))
+        self.load(response['result'], response.get('sequence'))
+
+    def _ensure_fresh(self):
+        with self._lock:
+            now = self.clock()
+            stale = self.last_sync is None or now - self.last_sync > self.max_staleness or \
+                (self._dirty and (self._retry_at is None or now >= self._retry_at))
+        if stale:
+            self.resync()
+
+    def age(self):
+        """
+        :return: Seconds since the last full sync or stream update, None if never synced
+        :rtype: float
+        """
+        with self._lock:
+            return None if self.last_sync is None else self.clock() - self.last_sync
+
+    def available(self, currency):
+        """
+        Available balance for a currency, answered from memory unless stale.
+
+        :param currency: String literal for the currency (ex: BTC)
+        :type currency: str
+        :rtype: float
+        """
+        self._ensure_fresh()
+        with self._lock:
+            return self._available.get(currency, 0.0)
+
+    def total(self, currency):
+        """
+        Total balance (available plus reserved) for a currency.
+
+        :param currency: String literal for the currency (ex: BTC)
+        :type currency: str
+        :rtype: float
+        """
+        self._ensure_fresh()
+        with self._lock:
+            return self._total.get(currency, 0.0)
+
+    def balances(self):
+        """
+        :return: ``{currency: (total, available)}`` for every known currency
+        :rtype: dict
+        """
+        self._ensure_fresh()
+        with self._lock:
+            return dict((c, (t, self._available.get(c, 0.0))) for c, t in self._total.items())
+
+    def reserve(self, currency, amount):
+        """
+        Hold funds for an order we just placed.
+
+        :param currency: Currency being committed (quote for buys, base for sells)
+        :type currency: str
+        :param amount: Amount committed including fees
+        :type amount: float
+        """
+        with self._lock:
+            self._available[currency] = self._available.get(currency, 0.0) - amount
+
+    def release(self, currency, amount):
+        """
+        Return funds held by an order that was cancelled or only partially filled.
+
+        :param currency: Currency that was committed
+        :type currency: str
+        :param amount: Amount no longer held
+        :type amount: float
+        """
+        with self._lock:
+            self._available[currency] = self._available.get(currency, 0.0) + amount
+
+    def apply_fill(self, spent_currency, spent_amount, received_currency, received_amount):
+        """
+        Book a fill of one of our own orders. The spent amount is assumed to
+        have been reserved when the order was placed.
+
+        :param spent_currency: Currency paid out
+        :type spent_currency: str
+        :param spent_amount: Amount paid out including fees
+        :type spent_amount: float
+        :param received_currency: Currency received
+        :type received_currency: str
+        :param received_amount: Amount received net of fees
+        :type received_amount: float
+        """
+        with self._lock:
+            self._total[spent_currency] = self._total.get(spent_currency, 0.0) - spent_amount
+            self._total[received_currency] = self._total.get(received_currency, 0.0) + received_amount
+            self._available[received_currency] = self._available.get(received_currency, 0.0) + received_amount
+
+    def apply_stream(self, message):
+        """
+        Apply a balance stream delta.
+
+        Example ::
+            {'accountId': '...',
+             'sequence': 42,
+             'delta': {'currencySymbol': 'BTC', 'total': '0.5', 'available': '0.4',
+                       'updatedAt': '2020-01-01T00:00:00Z'}}
+
+        Deltas at or below the current sequence are ignored.  A gap in the
+        sequence marks the ledger dirty so the next lookup resyncs.  Each
+        currency's newest row is kept until a snapshot covering it arrives.
+
+        :param message: Decoded balance stream message
+        :type message: dict
+        """
+        sequence = message.get('sequence')
+        currency, row_total, row_available = _parse_balance(message['delta'])
+        with self._lock:
+            if sequence is not None and self.sequence is not None:
+                if sequence <= self.sequence:
+                    return
+                if sequence > self.sequence + 1:
+                    self._dirty = True
+                    self._gap = max(self._gap or 0, sequence - 1)
+            self._total[currency] = row_total
+            self._available[currency] = row_available
+            if sequence is not None:
+                self.sequence = sequence
+                self._streamed[currency] = (sequence, row_total, row_available)
+            if not self._dirty:
+                self.last_sync = self.clock()
@@ -0,0 +1,332 @@
+"""
+   Adaptive polling of many markets under one request budget.
+
+   Polling every market at the same interval spends most requests on
+   markets that have not moved and too few on the ones that are moving.
+   :class:`PollingPlanner` learns, for each market, how often its price
+   changes and how far it moves per second (exponentially weighted over
+   recent polls), and splits a total ``budget`` of requests per second in
+   proportion to that activity, within ``[min_interval, max_interval]``
+   per market.  Markets are polled from a priority queue ordered by due
+   time, through the client, so its rate limiter still has the last word.
+
+   Example ::
+       >>> planner = PollingPlanner(my_bittrex, ['LTC-BTC', 'ETH-BTC', 'DOGE-BTC'], budget=2.0,
+       ...                          on_update=lambda market, result: print(market, result['lastTradeRate']))
+       >>> planner.start()
+       >>> planner.metrics()['markets']['LTC-BTC']
+       {'interval': 0.8, 'staleness': 0.3, 'change_rate': 0.9, 'volatility': 2.1e-05, ...}
+"""
+
+import heapq
+import math
+import threading
+import time
+from itertools import count
+
+import numpy as np
+
+
+def _last_trade_rate(result):
+    return float(result['lastTradeRate'])
+
+
+def allocate(weights, budget, min_rate, max_rate):
+    """
+    Split ``budget`` requests per second in proportion to ``weights``, with
+    every rate clipped to ``[min_rate, max_rate]`` and what clipping frees
+    or takes spread over the rest.
+
+    :type weights: numpy.ndarray
+    :return: Requests per second per market
+    :rtype: numpy.ndarray
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    n = len(weights)
+    rates = np.zeros(n)
+    if not n:
+        return rates
+    # the floor yields to the budget when both cannot hold
+    min_rate = min(min_rate, budget / float(n))
+    free = np.ones(n, dtype=bool)
+    remaining = float(budget)
+    while free.any():
+        share = remaining * weights[free] / weights[free].sum()
+        low = share < min_rate
+        high = share > max_rate
+        index = np.flatnonzero(free)
+        if not (low.any() or high.any()):
+            rates[index] = share
+            break
+        # fix the side that is further out of bounds first, then redistribute
+        clip = low if (min_rate - share[low]).sum() >= (share[high] - max_rate).sum() else high
+        rates[index[clip]] = min_rate if clip is low else max_rate
+        remaining -= rates[index[clip]].sum()
+        free[index[clip]] = False
+    return rates
+
+
+class PollingPlanner(object):
+    """
+    :ivar markets: Markets polled, in metric order
+    :ivar interval: Current polling interval per market in seconds
+    """
+
+    def __init__(self, bittrex, markets, budget=1.0, fetch=None, price=None, on_update=None, min_interval=1.0,
+                 max_interval=300.0, tolerance=0.001, alpha=0.2, replan_interval=10.0, clock=time.time):
+        """
+        :param bittrex: Client to poll with
+        :type bittrex: bittrex.bittrex.Bittrex
+        :param markets: Market symbols
+        :type markets: list
+        :param budget: Requests per second shared by all markets
+        :type budget: float
+        :param fetch: ``fetch(market)`` returning a response dict, ``get_market_ticker`` by default
+        :type fetch: callable
+        :param price: Extracts the observed price from a result, the last trade rate by default
+        :type price: callable
+        :param on_update: Called with ``(market, result)`` after every successful poll
+        :type on_update: callable
+        :param min_interval: Shortest interval between polls of one market
+        :type min_interval: float
+        :param max_interval: Longest interval, unless the budget cannot cover every market that often
+        :type max_interval: float
+        :param tolerance: Relative move counted as one change when weighing volatility against change rate
+        :type tolerance: float
+        :param alpha: Weight of the newest poll in the activity averages
+        :type alpha: float
+        :param replan_interval: Seconds between reallocations of the budget
+        :type replan_interval: float
+        :param clock: Time source
+        :type clock: callable
+        """
+        self.bittrex = bittrex
+        self.markets = list(markets)
+        self.budget = budget
+        self.fetch = fetch or bittrex.get_market_ticker
+        self.price = price or _last_trade_rate
+        self.on_update = on_update
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.tolerance = tolerance
+        self.alpha = alpha
+        self.replan_interval = replan_interval
+        self.clock = clock
+
+        n = len(self.markets)
+        self.interval = np.full(n, float(max_interval))
+        self._last_poll = np.full(n, np.nan)
+        self._last_success = np.full(n, np.nan)
+        self._last_price = np.full(n, np.nan)
+        # exponentially weighted changes, relative moves and seconds per poll
+        self._changes = np.zeros(n)
+        self._moves = np.zeros(n)
+        self._elapsed = np.zeros(n)
+        self._polls = np.zeros(n, dtype=np.int64)
+        self._changed = np.zeros(n, dtype=np.int64)
+        self._errors = np.zeros(n, dtype=np.int64)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._seq = count()
+        self._heap = []
+        self._due = np.zeros(n)
+        self._planned_at = None
+        self.plan()
+
+    def weights(self):
+        """
+        Expected changes per second of each market: observed price changes
+        plus moves of ``tolerance``.  Markets without history get the median.
+
+        :rtype: numpy.ndarray
+        """
+        known = self._elapsed > 0
+        weights = np.zeros(len(self.markets))
+        weights[known] = (self._changes[known] + self._moves[known] / self.tolerance) / self._elapsed[known]
+        default = float(np.median(weights[known])) if known.any() else 1.0
+        weights[~known] = default if default > 0 else 1.0
+        # a quiet market keeps a little weight so it is still sampled
+        floor = max(weights.max() * 1e-3, 1e-9)
+        return np.maximum(weights, floor)
+
+    def plan(self):
+        """
+        Reallocate the budget and reschedule every market from its last poll.
+
+        :return: Interval per market in seconds
+        :rtype: numpy.ndarray
+        """
+        with self._lock:
+            now = self.clock()
+            rates = allocate(self.weights(), self.budget, 1.0 / self.max_interval, 1.0 / self.min_interval)
+            self.interval = 1.0 / rates
+            polled = ~np.isnan(self._last_poll)
+            self._due = np.where(polled, self._last_poll + self.interval, now)
+            self._heap = [(due, next(self._seq), i) for i, due in enumerate(self._due)]
+            heapq.heapify(self._heap)
+            self._planned_at = now
+            return self.interval.copy()
+
+    def _observe(self, i, now, price):
+        previous, last = self._last_price[i], self._last_success[i]
+        if not np.isnan(previous) and now > last:
+            changed = float(price != previous)
+            move = abs(math.log(price / previous)) if price > 0 and previous > 0 else 0.0
+            if self._elapsed[i] == 0:
+                self._changes[i], self._moves[i], self._elapsed[i] = changed, move, now - last
+            else:
+                a = self.alpha
+                self._changes[i] += a * (changed - self._changes[i])
+                self._moves[i] += a * (move - self._moves[i])
+                self._elapsed[i] += a * (now - last - self._elapsed[i])
+            self._changed[i] += int(changed)
+        self._last_price[i] = price
+        self._last_success[i] = now
+
+    def poll(self, i):
+        """
+        Poll one market now and schedule its next poll.
+
+        :param i: Market index
+        :type i: int
+        :return: The response, None if ``fetch`` raised
+        :rtype: dict
+        """
+        market = self.markets[i]
+        response = None
+        ok = False
+        try:
+            response = self.fetch(market)
+            ok = response['success'] and response['result'] is not None
+        except Exception:
+            # counted as an error below; whatever happens the market is rescheduled
+            ok = False
+        finally:
+            now = self.clock()
+            with self._lock:
+                self._polls[i] += 1
+                self._last_poll[i] = now
+                if ok:
+                    try:
+                        self._observe(i, now, self.price(response['result']))
+                    except (KeyError, TypeError, ValueError):
+                        ok = False
+                if not ok:
+                    self._errors[i] += 1
+                self._due[i] = now + self.interval[i]
+                heapq.heappush(self._heap, (self._due[i], next(self._seq), i))
+        if ok and self.on_update is not None:
+            self.on_update(market, response['result'])
+        return response
+
+    def _pop_due(self, now):
+        with self._lock:
+            while self._heap:
+                due, _, i = self._heap[0]
+                if due != self._due[i]:
+                    # superseded by a later schedule
+                    heapq.heappop(self._heap)
+                    continue
+                if due > now:
+                    return None
+                heapq.heappop(self._heap)
+                # parked until its poll reschedules it
+                self._due[i] = np.inf
+                return i
+            return None
+
+    def next_due(self):
+        """
+        :return: Time of the next scheduled poll, None if nothing is scheduled
+        :rtype: float
+        """
+        with self._lock:
+            while self._heap and self._heap[0][0] != self._due[self._heap[0][2]]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self):
+        """
+        Poll every market that is due, most overdue first.
+
+        :return: Markets polled
+        :rtype: list
+        """
+        if self._planned_at is None or self.clock() - self._planned_at >= self.replan_interval:
+            self.plan()
+        polled = []
+        while True:
+            i = self._pop_due(self.clock())
+            if i is None:
+                return polled
+            self.poll(i)
+            polled.append(self.markets[i])
+
+    def start(self):
+        """
+        Poll on a daemon thread until :meth:`stop`.
+
+        :return: self
+        :rtype: PollingPlanner
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='bittrex-polling-planner')
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            due = self.next_due()
+            wake = self._planned_at + self.replan_interval
+            if due is not None:
+                wake = min(wake, due)
+            self._stop.wait(max(wake - self.clock(), 0.001))
+
+    def stop(self):
+        """
+        Stop the background polling.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def metrics(self):
+        """
+        Per market: ``interval`` planned, ``staleness`` (seconds since the
+        last successful poll, None before it), ``change_rate`` (changes per
+        second), ``volatility`` (relative move per second) and counters.
+        Overall: the ``planned_rate`` in requests per second and the worst
+        and mean staleness.
+
+        :rtype: dict
+        """
+        with self._lock:
+            now = self.clock()
+            staleness = now - self._last_success
+            with np.errstate(invalid='ignore', divide='ignore'):
+                change_rate = np.where(self._elapsed > 0, self._changes / self._elapsed, np.nan)
+                volatility = np.where(self._elapsed > 0, self._moves / self._elapsed, np.nan)
+            markets = {}
+            for i, market in enumerate(self.markets):
+                markets[market] = {
+                    'interval': float(self.interval[i]),
+                    'staleness': None if np.isnan(staleness[i]) else float(staleness[i]),
+                    'change_rate': float(change_rate[i]),
+                    'volatility': float(volatility[i]),
+                    'polls': int(self._polls[i]),
+                    'changes': int(self._changed[i]),
+                    'errors': int(self._errors[i])
+                }
+            seen = staleness[~np.isnan(staleness)]
+            return {
+                'markets': markets,
+                'planned_rate': float((1.0 / self.interval).sum()),
+                'max_staleness': float(seen.max()) if len(seen) else None,
+                'mean_staleness': float(seen.mean()) if len(seen) else None
+            }
@@ -0,0 +1,216 @@
+"""
+   Priority-aware request scheduling for the Bittrex client.
+
+   A single :class:`RequestScheduler` can be shared by any number of threads
+   using the same :class:`bittrex.bittrex.Bittrex` instance.  Requests are
+   granted in priority order (cancels first, market data last) subject to the
+   overall calls-per-second budget and optional per-class concurrency caps.
+"""
+
+import bisect
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+PRIORITY_CANCEL = 0
+PRIORITY_ORDER = 1
+PRIORITY_ACCOUNT = 2
+PRIORITY_MARKET_DATA = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_CANCEL: 'cancel',
+    PRIORITY_ORDER: 'order',
+    PRIORITY_ACCOUNT: 'account',
+    PRIORITY_MARKET_DATA: 'market_data',
+}
+
+
+class RequestExpired(Exception):
+    """
+    Raised when a queued request passes its deadline before it is granted
+    """
+    pass
+
+
+class _ClassStats(object):
+
+    def __init__(self):
+        self.queued = 0
+        self.active = 0
+        self.granted = 0
+        self.expired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def as_dict(self):
+        return {
+            'queued': self.queued,
+            'active': self.active,
+            'granted': self.granted,
+            'expired': self.expired,
+            'wait_total': self.wait_total,
+            'wait_max': self.wait_max,
+            'wait_mean': self.wait_total / self.granted if self.granted else 0.0,
+        }
+
+
+class RequestScheduler(object):
+    """
+    Grants request slots in priority order under a shared rate budget.
+
+    Example ::
+        >>> scheduler = RequestScheduler(calls_per_second=5,
+        ...                              concurrency={PRIORITY_MARKET_DATA: 2},
+        ...                              deadlines={PRIORITY_MARKET_DATA: 3.0})
+        >>> my_bittrex = Bittrex(key, secret, scheduler=scheduler)
+    """
+
+    def __init__(self, calls_per_second=1, concurrency=None, deadlines=None, clock=time.time):
+        """
+        :param calls_per_second: Overall request budget shared by all classes
+        :type calls_per_second: float
+        :param concurrency: Maximum in-flight requests per priority class
+        :type concurrency: dict
+        :param deadlines: Seconds a request of a given class may wait in the
+            queue before being dropped
+        :type deadlines: dict
+        :param clock: Time source, mostly useful for tests
+        :type clock: callable
+        """
+        self.call_rate = 1.0 / calls_per_second
+        self.concurrency = dict(concurrency or {})
+        self.deadlines = dict(deadlines or {})
+        self.clock = clock
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._counter = itertools.count()
+        self._next_slot = None
+        self._stats = dict((priority, _ClassStats()) for priority in PRIORITY_NAMES)
+
+    def _at_cap(self, priority):
+        cap = self.concurrency.get(priority)
+        return cap is not None and self._stats[priority].active >= cap
+
+    def _eligible(self):
+        for ticket in self._queue:
+            if not self._at_cap(ticket[0]):
+                return ticket
+        return None
+
+    def acquire(self, priority=PRIORITY_MARKET_DATA, deadline=None):
+        """
+        Block until a request of the given priority may be dispatched.
+
+        :param priority: One of the PRIORITY_* constants
+        :type priority: int
+        :param deadline: Absolute time after which the request is dropped.
+            Defaults to now plus the configured deadline for the class.
+        :type deadline: float
+        :raises RequestExpired: if the deadline passes while queued
+        """
+        with self._cond:
+            enqueued = self.clock()
+            if deadline is None and priority in self.deadlines:
+                deadline = enqueued + self.deadlines[priority]
+            ticket = (priority, next(self._counter))
+            bisect.insort(self._queue, ticket)
+            stats = self._stats[priority]
+            stats.queued += 1
+
+            while True:
+                now = self.clock()
+                if deadline is not None and now >= deadline:
+                    self._queue.remove(ticket)
+                    stats.queued -= 1
+                    stats.expired += 1
+                    self._cond.notify_all()
+                    raise RequestExpired('{0:s} request expired after {1:.3f}s in queue'.format(
+                        PRIORITY_NAMES[priority], now - enqueued))
+
+                timeout = None
+                if self._eligible() == ticket:
+                    if self._next_slot is None or now >= self._next_slot:
+                        break
+                    timeout = self._next_slot - now
+                if deadline is not None:
+                    remaining = deadline - now
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                self._cond.wait(timeout)
+
+            self._queue.remove(ticket)
+            self._next_slot = max(now, self._next_slot or now) + self.call_rate
+            waited = now - enqueued
+            stats.queued -= 1
+            stats.active += 1
+            stats.granted += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+            self._cond.notify_all()
+
+    def try_acquire(self, priority=PRIORITY_MARKET_DATA):
+        """
+        Take a slot only if one is free right now, without queueing behind
+        other requests.  Used for optional work such as hedged requests.
+
+        :param priority: One of the PRIORITY_* constants
+        :type priority: int
+        :return: True if granted; the caller must then :meth:`release` it
+        :rtype: bool
+        """
+        with self._cond:
+            now = self.clock()
+            if self._queue or self._at_cap(priority) or (self._next_slot is not None and now < self._next_slot):
+                return False
+            self._next_slot = now + self.call_rate
+            stats = self._stats[priority]
+            stats.active += 1
+            stats.granted += 1
+            return True
+
+    def release(self, priority=PRIORITY_MARKET_DATA):
+        """
+        Mark a previously acquired request as finished.
+
+        :param priority: The priority the request was acquired with
+        :type priority: int
+        """
+        with self._cond:
+            self._stats[priority].active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_MARKET_DATA, deadline=None):
+        """
+        Context manager wrapping :meth:`acquire` and :meth:`release`
+        """
+        self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def queue_depth(self):
+        """
+        :return: Number of queued requests per priority class name
+        :rtype: dict
+        """
+        with self._cond:
+            return dict((PRIORITY_NAMES[p], s.queued) for p, s in self._stats.items())
+
+    def metrics(self):
+        """
+        Queue depth, in-flight count and wait-time statistics per class.
+
+        Example ::
+            {'cancel': {'queued': 0, 'active': 0, 'granted': 3, 'expired': 0,
+                        'wait_total': 0.41, 'wait_max': 0.2, 'wait_mean': 0.137},
+             'market_data': {...},
+             ...
+            }
+
+        :rtype: dict
+        """
+        with self._cond:
+            return dict((PRIORITY_NAMES[p], s.as_dict()) for p, s in self._stats.items())
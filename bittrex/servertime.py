@@ -0,0 +1,160 @@
+"""
+   Exchange clock estimate for request timestamps.
+
+   Authenticated requests carry ``Api-Timestamp`` and are rejected when it
+   is too far from the exchange's clock.  :class:`ServerClock` samples
+   ``/ping`` and estimates the offset of the local clock NTP style: the
+   server read its clock somewhere inside the round trip, so it is compared
+   with the local midpoint, and of every burst of samples the one with the
+   shortest round trip, and so the smallest error, is kept.
+
+   Installed on a client, every signed request is stamped with local time
+   plus the current offset::
+
+       >>> server_clock = ServerClock(my_bittrex).install().start()
+       >>> server_clock.metrics()
+       {'offset': 0.84, 'rtt': 0.031, ...}
+"""
+
+import threading
+import time
+
+
+class ServerClock(object):
+    """
+    Offset between the local clock and the exchange's, refreshed in the background.
+    """
+
+    def __init__(self, bittrex, samples=4, refresh_interval=300.0, clock=time.time):
+        """
+        :param bittrex: Client used for the ``/ping`` samples
+        :type bittrex: Bittrex
+        :param samples: Pings per synchronization, the lowest round trip wins
+        :type samples: int
+        :param refresh_interval: Seconds between background synchronizations
+        :type refresh_interval: float
+        :param clock: Local time source
+        :type clock: callable
+        """
+        self.bittrex = bittrex
+        self.samples = samples
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.offset = 0.0
+        self.rtt = None
+        self.last_sync = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._syncs = 0
+        self._errors = 0
+
+    def now(self):
+        """
+        :return: Estimated exchange time in seconds since the epoch
+        :rtype: float
+        """
+        return self.clock() + self.offset
+
+    __call__ = now
+
+    def sample(self):
+        """
+        Take one ``/ping`` measurement.
+
+        :return: ``(offset, rtt)`` in seconds, None if the ping failed
+        :rtype: tuple
+        """
+        bittrex = self.bittrex
+        request_url = bittrex.base_url.format(path='/ping')
+        try:
+            # timed inside the rate slot: waiting for it is not part of the round trip
+            with bittrex.rate_slot():
+                sent = self.clock()
+                response = bittrex.dispatch(request_url, str(int(bittrex.clock() * 1000)), None)
+                received = self.clock()
+        except Exception:
+            return None
+        if not response['success'] or not response['result']:
+            return None
+        server = response['result']['serverTime'] / 1000.0
+        return server - (sent + received) / 2.0, received - sent
+
+    def synchronize(self):
+        """
+        Update the offset from a burst of samples.
+
+        :return: True if at least one sample succeeded
+        :rtype: bool
+        """
+        best = None
+        for _ in range(self.samples):
+            measured = self.sample()
+            if measured is not None and (best is None or measured[1] < best[1]):
+                best = measured
+        with self._lock:
+            if best is None:
+                self._errors += 1
+                return False
+            self.offset, self.rtt = best
+            self.last_sync = self.clock()
+            self._syncs += 1
+        return True
+
+    def install(self):
+        """
+        Make the client stamp its requests with :meth:`now`.
+
+        :return: self
+        :rtype: ServerClock
+        """
+        self.bittrex.clock = self.now
+        return self
+
+    def start(self):
+        """
+        Synchronize now and then every ``refresh_interval`` seconds on a daemon thread.
+
+        :return: self
+        :rtype: ServerClock
+        """
+        self.synchronize()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refresh, name='bittrex-server-clock')
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def _refresh(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.synchronize()
+            except Exception:
+                with self._lock:
+                    self._errors += 1
+
+    def stop(self):
+        """
+        Stop the background refresh.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def metrics(self):
+        """
+        :return: ``offset`` (skew, server minus local) and ``rtt`` of the kept
+            sample in seconds, ``age`` of the estimate, and sync/error counters
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'offset': self.offset,
+                'rtt': self.rtt,
+                'age': None if self.last_sync is None else self.clock() - self.last_sync,
+                'syncs': self._syncs,
+                'errors': self._errors
+            }
@@ -0,0 +1,285 @@
+"""
+   Ticker snapshots shared between local processes.
+
+   One process owns a :class:`SnapshotPublisher`, polls the exchange and
+   writes the ticker matrix of :class:`bittrex.tickers.TickerSnapshot` into a
+   ``multiprocessing.shared_memory`` segment.  Any number of processes attach
+   a :class:`SnapshotReader` by name and read current prices without an API
+   call, a lock or a copy.
+
+   Writes are guarded by a seqlock: the version counter is odd while the
+   publisher is writing, and a reader retries whenever the version is odd or
+   changed under it.  Only the rows of a poll's diff are rewritten.
+
+   Segment layout::
+
+       header   version, rows, capacity, fields (uint64), published_at (float64)
+       symbols  capacity x 32 bytes, NUL padded UTF-8
+       values   capacity x fields float64, rows as in TickerSnapshot.values
+
+   ``multiprocessing.shared_memory`` requires Python 3.8 or later.
+"""
+
+import struct
+import time
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+from bittrex.tickers import FIELDS, TickerSnapshot
+
+_HEADER = struct.Struct('<QQQQd')
+_HEADER_SIZE = 64
+_SYMBOL_SIZE = 32
+
+
+class SnapshotTimeout(Exception):
+    """
+    Raised when a reader cannot get a consistent copy, e.g. the publisher died mid-write
+    """
+    pass
+
+
+def _require_shared_memory():
+    if shared_memory is None:
+        raise RuntimeError('multiprocessing.shared_memory requires Python 3.8 or later')
+
+
+def _tracker(action, segment):
+    try:
+        from multiprocessing import resource_tracker
+    except ImportError:
+        return
+    getattr(resource_tracker, action)(segment._name, 'shared_memory')
+
+
+def _attach(name):
+    # before 3.13 attaching registers the segment with the resource tracker,
+    # which would unlink it as soon as the reader process exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        segment = shared_memory.SharedMemory(name=name)
+        _tracker('unregister', segment)
+        return segment
+
+
+class _Segment(object):
+    # numpy views over one mapped segment
+
+    def __init__(self, segment, capacity, fields):
+        self.segment = segment
+        buf = segment.buf
+        self.header = np.ndarray((4,), dtype=np.uint64, buffer=buf)
+        self.symbols = np.ndarray((capacity,), dtype='S{0}'.format(_SYMBOL_SIZE), buffer=buf, offset=_HEADER_SIZE)
+        self.values = np.ndarray((capacity, fields), dtype=np.float64, buffer=buf,
+                                 offset=_HEADER_SIZE + capacity * _SYMBOL_SIZE)
+
+    @property
+    def version(self):
+        return int(self.header[0])
+
+    def published_at(self):
+        return struct.unpack_from('<d', self.segment.buf, 32)[0]
+
+    def close(self):
+        # drop the views first, the buffer cannot be released while exported
+        del self.header, self.symbols, self.values
+        self.segment.close()
+
+
+class SnapshotPublisher(object):
+    """
+    Single writer of a shared ticker snapshot.
+
+    Example ::
+        >>> publisher = SnapshotPublisher(my_bittrex, name='bittrex-tickers')
+        >>> while True:
+        ...     publisher.poll()
+        ...     time.sleep(1)
+    """
+
+    def __init__(self, bittrex=None, name=None, capacity=2048, snapshot=None, clock=time.time):
+        """
+        :param bittrex: Client polled for tickers; ignored when ``snapshot`` is given
+        :type bittrex: Bittrex
+        :param name: Segment name readers attach to; generated if None
+        :type name: str
+        :param capacity: Maximum number of markets
+        :type capacity: int
+        :param snapshot: Snapshot to publish, defaults to a new TickerSnapshot
+        :type snapshot: TickerSnapshot
+        :param clock: Time source for ``published_at``
+        :type clock: callable
+        """
+        _require_shared_memory()
+        self.snapshot = snapshot or TickerSnapshot(bittrex)
+        self.capacity = capacity
+        self.clock = clock
+        size = _HEADER_SIZE + capacity * (_SYMBOL_SIZE + len(FIELDS) * 8)
+        self._shared = _Segment(shared_memory.SharedMemory(name=name, create=True, size=size),
+                                capacity, len(FIELDS))
+        self._shared.values[:] = np.nan
+        _HEADER.pack_into(self._shared.segment.buf, 0, 0, 0, capacity, len(FIELDS), 0.0)
+        self._published = 0
+
+    @property
+    def name(self):
+        return self._shared.segment.name
+
+    @property
+    def version(self):
+        return self._shared.version
+
+    def poll(self):
+        """
+        Poll the snapshot and publish what changed.
+
+        :rtype: bittrex.tickers.TickerDiff
+        """
+        diff = self.snapshot.poll()
+        self.publish(diff.rows)
+        return diff
+
+    def publish(self, rows=None):
+        """
+        Copy snapshot rows into the segment under the seqlock.
+
+        :param rows: Row indices to write; every row if None
+        :type rows: numpy.ndarray
+        :raises ValueError: if the snapshot outgrew ``capacity``
+        """
+        symbols = self.snapshot.symbols
+        values = self.snapshot.values
+        if len(symbols) > self.capacity:
+            raise ValueError('{0} markets exceed the shared snapshot capacity of {1}'.format(
+                len(symbols), self.capacity))
+        shared = self._shared
+        header = shared.header
+        header[0] += 1
+        try:
+            if len(symbols) > self._published:
+                shared.symbols[self._published:len(symbols)] = [s.encode('utf-8') for s in
+                                                                 symbols[self._published:]]
+            if rows is None:
+                shared.values[:len(values)] = values
+            else:
+                shared.values[rows] = values[rows]
+            header[1] = len(symbols)
+            struct.pack_into('<d', shared.segment.buf, 32, self.clock())
+        finally:
+            header[0] += 1
+        self._published = len(symbols)
+
+    def close(self):
+        """
+        Release and remove the segment.
+        """
+        segment = self._shared.segment
+        self._shared.close()
+        # a reader sharing our resource tracker may have dropped the registration
+        _tracker('register', segment)
+        segment.unlink()
+
+
+class SnapshotReader(object):
+    """
+    Read-only view of a segment written by :class:`SnapshotPublisher`.
+
+    Example ::
+        >>> reader = SnapshotReader('bittrex-tickers')
+        >>> version, symbols, values = reader.read()
+        >>> reader.get('LTC-BTC')['last']
+    """
+
+    def __init__(self, name):
+        """
+        :param name: Segment name of the publisher
+        :type name: str
+        """
+        _require_shared_memory()
+        segment = _attach(name)
+        _, _, capacity, fields, _ = _HEADER.unpack_from(segment.buf, 0)
+        self._shared = _Segment(segment, int(capacity), int(fields))
+        self._symbols = []
+        self._index = {}
+
+    @property
+    def version(self):
+        return self._shared.version
+
+    @property
+    def values(self):
+        """
+        Zero-copy view of the published matrix. It may change while being
+        read; use :meth:`read` for a consistent copy.
+
+        :rtype: numpy.ndarray
+        """
+        return self._shared.values[:int(self._shared.header[1])]
+
+    def read(self, rows=None, timeout=1.0):
+        """
+        Consistent copy of the snapshot.
+
+        :param rows: Row indices to copy; every row if None
+        :type rows: numpy.ndarray
+        :param timeout: Seconds to keep retrying while the publisher writes
+        :type timeout: float
+        :return: ``(version, symbols, values)``
+        :rtype: tuple
+        :raises SnapshotTimeout: if no consistent copy was possible within ``timeout``
+        """
+        shared = self._shared
+        header = shared.header
+        give_up = None
+        while True:
+            before = int(header[0])
+            if not before & 1:
+                count = int(header[1])
+                values = shared.values[:count].copy() if rows is None else shared.values[rows].copy()
+                symbols = shared.symbols[:count].copy()
+                if int(header[0]) == before:
+                    break
+            now = time.time()
+            give_up = give_up or now + timeout
+            if now >= give_up:
+                raise SnapshotTimeout('no consistent snapshot within {0}s'.format(timeout))
+        if count > len(self._symbols):
+            self._symbols.extend(raw.decode('utf-8') for raw in symbols[len(self._symbols):])
+            self._index = dict((s, i) for i, s in enumerate(self._symbols))
+        return before, list(self._symbols[:count]), values
+
+    def row(self, symbol):
+        """
+        :return: Row index of a market
+        :rtype: int
+        """
+        if symbol not in self._index:
+            self.read(rows=[])
+        return self._index[symbol]
+
+    def get(self, symbol, timeout=1.0):
+        """
+        :return: ``{field: value}`` of one market
+        :rtype: dict
+        """
+        _, _, values = self.read(rows=[self.row(symbol)], timeout=timeout)
+        return dict(zip(FIELDS, values[0].tolist()))
+
+    def published_at(self):
+        """
+        :return: Clock time of the last publish, 0 before the first one
+        :rtype: float
+        """
+        return self._shared.published_at()
+
+    def close(self):
+        """
+        Detach from the segment; the publisher owns its removal.
+        """
+        self._shared.close()
@@ -0,0 +1,559 @@
+"""
+   In-process paper-trading exchange speaking the Bittrex v3 REST API.
+
+   :class:`PaperExchange` is a transport for :class:`bittrex.bittrex.Bittrex`,
+   so unchanged client code can be pointed at it::
+
+       >>> exchange = PaperExchange(balances={'BTC': 1.0})
+       >>> exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 100, 0.0051)
+       >>> my_bittrex = Bittrex(None, None, calls_per_second=1e9, transport=exchange)
+       >>> my_bittrex.trade_buy('LTC-BTC', ORDERTYPE_LIMIT, 10, 0.0052)
+
+   Books use price-time priority.  Orders of the simulated account are checked
+   against its balances and pay ``fee`` on the quote notional of every fill;
+   liquidity added with :meth:`PaperExchange.add_liquidity` belongs to an
+   unbounded external account.  Conditional orders trigger on the last trade
+   price of their market.
+"""
+
+import heapq
+import itertools
+from collections import deque
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+
+try:
+    from urlparse import urlparse, parse_qsl
+except ImportError:
+    from urllib.parse import urlparse, parse_qsl
+
+from bittrex.bittrex import (TRADE_FEE, ORDERTYPE_LIMIT, ORDERTYPE_MARKET, TIMEINEFFECT_GOOD_TIL_CANCELLED,
+                             TIMEINEFFECT_IMMEDIATE_OR_CANCEL, TIMEINEFFECT_FILL_OR_KILL,
+                             TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED, DIRECTION_BUY, DIRECTION_SELL, OPERAND_GTE,
+                             OPERAND_LTE)
+
+_RESTING = (TIMEINEFFECT_GOOD_TIL_CANCELLED, TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED)
+
+_EPSILON = 1e-12
+
+# trades kept per market for /markets/{marketSymbol}/trades
+_TAPE = 100
+
+OWNER_ACCOUNT = 'account'
+OWNER_EXTERNAL = 'external'
+
+
+class SimulatorError(Exception):
+    """
+    Rejection of a request, turned into an HTTP error response
+    """
+
+    def __init__(self, code, status=400):
+        super(SimulatorError, self).__init__(code)
+        self.code = code
+        self.status = status
+
+
+def _fmt(value):
+    return '{0:.8f}'.format(value).rstrip('0').rstrip('.') or '0'
+
+
+def _timestamp(epoch):
+    return datetime.utcfromtimestamp(epoch).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def _public(record):
+    return dict((k, v) for k, v in record.items() if not k.startswith('_'))
+
+
+class _Book(object):
+    # one side per heap; entries are (sort key, sequence, order id) with lazy deletion
+
+    def __init__(self):
+        self.bids = []
+        self.asks = []
+        self.last = None
+        self.trades = deque(maxlen=_TAPE)
+
+    def side(self, direction):
+        return self.bids if direction == DIRECTION_BUY else self.asks
+
+    def opposite(self, direction):
+        return self.asks if direction == DIRECTION_BUY else self.bids
+
+
+class PaperExchange(object):
+    """
+    Matching-engine simulator usable as a ``Bittrex`` transport.
+    """
+
+    def __init__(self, balances=None, fee=TRADE_FEE, clock=time.time):
+        """
+        :param balances: Starting balances of the simulated account, ``{currency: amount}``
+        :type balances: dict
+        :param fee: Fee charged on the quote notional of the account's fills
+        :type fee: float
+        :param clock: Time source
+        :type clock: callable
+        """
+        self.fee = fee
+        self.clock = clock
+        self.requests = 0
+
+        self._lock = threading.RLock()
+        self._sequence = itertools.count()
+        self._books = {}
+        self._orders = {}
+        self._conditionals = {}
+        self._total = dict((c, float(v)) for c, v in (balances or {}).items())
+        self._held = {}
+        self._balance_sequence = 0
+
+    # -- transport ---------------------------------------------------------
+
+    def __call__(self, method, request_url, headers, body):
+        url = urlparse(request_url)
+        path = url.path.split('/v3', 1)[-1].rstrip('/')
+        query = dict(parse_qsl(url.query))
+        payload = json.loads(body) if body else None
+        with self._lock:
+            self.requests += 1
+            try:
+                result = self._route(method, path.split('/')[1:], query, payload)
+            except SimulatorError as e:
+                return e.status, {}, {'code': e.code}
+        if isinstance(result, tuple):
+            return 200, result[1], result[0]
+        return 200, {}, result
+
+    def _route(self, method, parts, query, payload):
+        head = parts[0] if parts else ''
+        if method == 'GET' and parts == ['ping']:
+            return {'serverTime': int(self.clock() * 1000)}
+        if head == 'orders':
+            if method == 'POST' and len(parts) == 1:
+                return self._view(self.place(payload))
+            if method == 'GET' and parts[1:] == ['open']:
+                return [self._view(o) for o in self._select(query, open_=True)]
+            if method == 'GET' and parts[1:] == ['closed']:
+                return [self._view(o) for o in self._select(query, open_=False)]
+            if method == 'GET' and len(parts) == 2:
+                return self._view(self._order(parts[1]))
+            if method == 'DELETE' and len(parts) == 2:
+                return self._view(self.cancel(parts[1]))
+        if head == 'conditional-orders':
+            if method == 'POST' and len(parts) == 1:
+                return self.place_conditional(payload)
+            if method == 'GET' and parts[1:] == ['open']:
+                return [_public(c) for c in self._conditionals.values() if c['status'] == 'OPEN']
+            if method == 'DELETE' and len(parts) == 2:
+                return self.cancel_conditional(parts[1])
+        if head == 'batch' and method == 'POST':
+            return [self._batch_operation(op) for op in payload]
+        if head == 'balances':
+            headers = {'Sequence': str(self._balance_sequence)}
+            if method == 'GET' and len(parts) == 1:
+                return [self._balance(c) for c in sorted(self._total)], headers
+            if method == 'GET' and len(parts) == 2:
+                return self._balance(parts[1]), headers
+        if method == 'GET' and parts == ['markets', 'tickers']:
+            return [self.ticker(market) for market in sorted(self._books)]
+        if head == 'markets' and len(parts) == 3 and method == 'GET':
+            if parts[2] == 'orderbook':
+                return self.orderbook(parts[1], int(query.get('depth', 25)))
+            if parts[2] == 'ticker':
+                return self.ticker(parts[1])
+            if parts[2] == 'trades':
+                return self.trades(parts[1])
+        raise SimulatorError('NOT_FOUND', 404)
+
+    def _batch_operation(self, operation):
+        try:
+            if operation.get('resource') != 'ORDER':
+                raise SimulatorError('INVALID_RESOURCE')
+            if operation.get('operation') == 'POST':
+                return {'status': 201, 'payload': self._view(self.place(operation['payload']))}
+            if operation.get('operation') == 'DELETE':
+                return {'status': 200, 'payload': self._view(self.cancel(operation['payload']['id']))}
+            raise SimulatorError('INVALID_OPERATION')
+        except SimulatorError as e:
+            return {'status': e.status, 'payload': {'code': e.code}}
+
+    # -- balances ----------------------------------------------------------
+
+    def _available(self, currency):
+        return self._total.get(currency, 0.0) - self._held.get(currency, 0.0)
+
+    def _adjust(self, currency, total=0.0, held=0.0):
+        self._total[currency] = self._total.get(currency, 0.0) + total
+        self._held[currency] = max(self._held.get(currency, 0.0) + held, 0.0)
+        self._balance_sequence += 1
+
+    def _balance(self, currency):
+        return {
+            'currencySymbol': currency,
+            'total': _fmt(self._total.get(currency, 0.0)),
+            'available': _fmt(self._available(currency)),
+            'updatedAt': _timestamp(self.clock())
+        }
+
+    # -- orders ------------------------------------------------------------
+
+    def _book(self, market):
+        if market not in self._books:
+            self._books[market] = _Book()
+        return self._books[market]
+
+    def _order(self, order_id):
+        if order_id not in self._orders:
+            raise SimulatorError('NOT_FOUND', 404)
+        return self._orders[order_id]
+
+    def _select(self, query, open_):
+        market = query.get('marketSymbol')
+        return [o for o in self._orders.values()
+                if o['owner'] == OWNER_ACCOUNT and (o['status'] == 'OPEN') == open_ and
+                (market is None or o['marketSymbol'] == market)]
+
+    def _view(self, order):
+        now = _timestamp(order['updated'])
+        view = {
+            'id': order['id'],
+            'marketSymbol': order['marketSymbol'],
+            'direction': order['direction'],
+            'type': order['type'],
+            'quantity': _fmt(order['quantity']),
+            'timeInForce': order['timeInForce'],
+            'fillQuantity': _fmt(order['filled']),
+            'commission': _fmt(order['commission']),
+            'proceeds': _fmt(order['proceeds']),
+            'status': order['status'],
+            'createdAt': _timestamp(order['created']),
+            'updatedAt': now
+        }
+        if order['limit'] is not None:
+            view['limit'] = _fmt(order['limit'])
+        if order['status'] == 'CLOSED':
+            view['closedAt'] = now
+        return view
+
+    def _hold_for(self, order, quantity):
+        base, quote = order['marketSymbol'].split('-')
+        if order['direction'] == DIRECTION_BUY:
+            return quote, quantity * order['limit'] * (1.0 + self.fee)
+        return base, quantity
+
+    def add_liquidity(self, market, direction, quantity, rate):
+        """
+        Rest an order from the unbounded external account, e.g. to seed a book.
+
+        :return: The order id
+        :rtype: str
+        """
+        with self._lock:
+            order = self._new_order(market, direction, ORDERTYPE_LIMIT, quantity, rate,
+                                    TIMEINEFFECT_GOOD_TIL_CANCELLED, OWNER_EXTERNAL)
+            self._match(order)
+            return order['id']
+
+    def _new_order(self, market, direction, order_type, quantity, limit, time_in_force, owner):
+        now = self.clock()
+        order = {
+            'id': str(uuid.uuid4()),
+            'marketSymbol': market,
+            'direction': direction,
+            'type': order_type,
+            'quantity': float(quantity),
+            'limit': None if limit is None else float(limit),
+            'timeInForce': time_in_force,
+            'filled': 0.0,
+            'commission': 0.0,
+            'proceeds': 0.0,
+            'status': 'OPEN',
+            'owner': owner,
+            'created': now,
+            'updated': now,
+            'seq': next(self._sequence)
+        }
+        self._orders[order['id']] = order
+        return order
+
+    def place(self, payload):
+        """
+        Accept a v3 ``POST /orders`` body for the simulated account.
+
+        :rtype: dict
+        """
+        with self._lock:
+            try:
+                market = payload['marketSymbol']
+                direction = payload['direction']
+                order_type = payload['type']
+                quantity = float(payload['quantity'])
+                limit = payload.get('limit')
+                time_in_force = payload.get('timeInForce', TIMEINEFFECT_GOOD_TIL_CANCELLED)
+            except (KeyError, TypeError, ValueError):
+                raise SimulatorError('INVALID_ORDER')
+            if direction not in (DIRECTION_BUY, DIRECTION_SELL) or quantity <= 0:
+                raise SimulatorError('INVALID_ORDER')
+            if order_type == ORDERTYPE_LIMIT:
+                if limit is None:
+                    raise SimulatorError('INVALID_LIMIT')
+            elif order_type == ORDERTYPE_MARKET:
+                if time_in_force in _RESTING:
+                    raise SimulatorError('INVALID_TIME_IN_FORCE')
+                limit = None
+            else:
+                raise SimulatorError('INVALID_ORDER_TYPE')
+            if time_in_force not in (TIMEINEFFECT_GOOD_TIL_CANCELLED, TIMEINEFFECT_IMMEDIATE_OR_CANCEL,
+                                     TIMEINEFFECT_FILL_OR_KILL, TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED):
+                raise SimulatorError('INVALID_TIME_IN_FORCE')
+            if time_in_force == TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED:
+                touch = self._live(self._book(market).opposite(direction))
+                if touch is not None and self._crosses({'direction': direction, 'limit': float(limit)}, touch):
+                    raise SimulatorError('POST_ONLY_CROSS_MARKET')
+
+            base, quote = market.split('-')
+            if direction == DIRECTION_SELL and self._available(base) < quantity - _EPSILON:
+                raise SimulatorError('INSUFFICIENT_FUNDS')
+            if direction == DIRECTION_BUY and limit is not None and \
+                    self._available(quote) < quantity * float(limit) * (1.0 + self.fee) - _EPSILON:
+                raise SimulatorError('INSUFFICIENT_FUNDS')
+
+            order = self._new_order(market, direction, order_type, quantity, limit, time_in_force, OWNER_ACCOUNT)
+            if order['limit'] is not None:
+                currency, amount = self._hold_for(order, quantity)
+                self._adjust(currency, held=amount)
+            if time_in_force == TIMEINEFFECT_FILL_OR_KILL and self._fillable(order) < quantity - _EPSILON:
+                self._close(order)
+                return order
+            self._match(order)
+            return order
+
+    def _crosses(self, order, resting):
+        if order['limit'] is None:
+            return True
+        if order['direction'] == DIRECTION_BUY:
+            return resting['limit'] <= order['limit'] + _EPSILON
+        return resting['limit'] >= order['limit'] - _EPSILON
+
+    def _live(self, heap):
+        while heap:
+            resting = self._orders[heap[0][2]]
+            if resting['status'] == 'OPEN':
+                return resting
+            heapq.heappop(heap)
+        return None
+
+    def _fillable(self, order):
+        levels = []
+        for key, seq, order_id in self._book(order['marketSymbol']).opposite(order['direction']):
+            resting = self._orders[order_id]
+            if resting['status'] == 'OPEN' and self._crosses(order, resting):
+                levels.append((key, seq, resting['limit'], resting['quantity'] - resting['filled']))
+        if not (order['owner'] == OWNER_ACCOUNT and order['direction'] == DIRECTION_BUY and order['limit'] is None):
+            return sum(level[3] for level in levels)
+        # market buys can only take what the quote balance pays for, best price first as in _match
+        budget = self._available(order['marketSymbol'].split('-')[1])
+        total = 0.0
+        for _, _, price, quantity in sorted(levels):
+            take = min(quantity, budget / (price * (1.0 + self.fee)))
+            total += take
+            budget -= take * price * (1.0 + self.fee)
+            if budget <= _EPSILON:
+                break
+        return total
+
+    def _match(self, order):
+        book = self._book(order['marketSymbol'])
+        opposite = book.opposite(order['direction'])
+        traded = False
+        while order['quantity'] - order['filled'] > _EPSILON:
+            resting = self._live(opposite)
+            if resting is None or not self._crosses(order, resting):
+                break
+            quantity = min(order['quantity'] - order['filled'], resting['quantity'] - resting['filled'])
+            if order['owner'] == OWNER_ACCOUNT and order['direction'] == DIRECTION_BUY and order['limit'] is None:
+                # market buys are bounded by what the quote balance can pay for
+                quote = order['marketSymbol'].split('-')[1]
+                quantity = min(quantity, self._available(quote) / (resting['limit'] * (1.0 + self.fee)))
+                if quantity <= _EPSILON:
+                    break
+            self._fill(resting, quantity, resting['limit'])
+            self._fill(order, quantity, resting['limit'])
+            book.last = resting['limit']
+            book.trades.append({
+                'id': str(uuid.uuid4()),
+                'executedAt': _timestamp(self.clock()),
+                'quantity': _fmt(quantity),
+                'rate': _fmt(resting['limit']),
+                'takerSide': order['direction']
+            })
+            traded = True
+            if resting['quantity'] - resting['filled'] <= _EPSILON:
+                heapq.heappop(opposite)
+                self._close(resting)
+
+        remaining = order['quantity'] - order['filled']
+        if remaining <= _EPSILON or order['timeInForce'] not in _RESTING:
+            self._close(order)
+        else:
+            key = -order['limit'] if order['direction'] == DIRECTION_BUY else order['limit']
+            heapq.heappush(book.side(order['direction']), (key, order['seq'], order['id']))
+        if traded:
+            self._check_conditionals(order['marketSymbol'], book.last)
+
+    def _fill(self, order, quantity, price):
+        notional = quantity * price
+        order['filled'] += quantity
+        order['proceeds'] += notional
+        order['updated'] = self.clock()
+        if order['owner'] != OWNER_ACCOUNT:
+            return
+        commission = notional * self.fee
+        order['commission'] += commission
+        base, quote = order['marketSymbol'].split('-')
+        if order['direction'] == DIRECTION_BUY:
+            held = 0.0 if order['limit'] is None else -quantity * order['limit'] * (1.0 + self.fee)
+            self._adjust(quote, total=-(notional + commission), held=held)
+            self._adjust(base, total=quantity)
+        else:
+            held = 0.0 if order['limit'] is None else -quantity
+            self._adjust(base, total=-quantity, held=held)
+            self._adjust(quote, total=notional - commission)
+
+    def _close(self, order):
+        if order['status'] == 'CLOSED':
+            return
+        order['status'] = 'CLOSED'
+        order['updated'] = self.clock()
+        remaining = order['quantity'] - order['filled']
+        if order['owner'] == OWNER_ACCOUNT and order['limit'] is not None and remaining > _EPSILON:
+            currency, amount = self._hold_for(order, remaining)
+            self._adjust(currency, held=-amount)
+
+    def cancel(self, order_id):
+        """
+        :rtype: dict
+        """
+        with self._lock:
+            order = self._order(order_id)
+            if order['status'] != 'OPEN':
+                raise SimulatorError('ORDER_NOT_OPEN', 409)
+            self._close(order)
+            return order
+
+    # -- conditional orders ------------------------------------------------
+
+    def place_conditional(self, payload):
+        """
+        Accept a v3 ``POST /conditional-orders`` body.
+
+        :rtype: dict
+        """
+        with self._lock:
+            if payload.get('operand') not in (OPERAND_GTE, OPERAND_LTE) or 'orderToCreate' not in payload:
+                raise SimulatorError('INVALID_CONDITIONAL_ORDER')
+            conditional = {
+                'id': str(uuid.uuid4()),
+                'marketSymbol': payload['marketSymbol'],
+                'operand': payload['operand'],
+                'triggerPrice': payload.get('triggerPrice'),
+                'trailingStopPercent': payload.get('trailingStopPercent'),
+                'orderToCreate': payload['orderToCreate'],
+                'status': 'OPEN',
+                'createdOrderId': None,
+                'createdAt': _timestamp(self.clock()),
+                '_extreme': self._book(payload['marketSymbol']).last
+            }
+            self._conditionals[conditional['id']] = conditional
+            return _public(conditional)
+
+    def cancel_conditional(self, conditional_id):
+        with self._lock:
+            conditional = self._conditionals.get(conditional_id)
+            if conditional is None:
+                raise SimulatorError('NOT_FOUND', 404)
+            conditional['status'] = 'CANCELLED'
+            return _public(conditional)
+
+    def _triggered(self, conditional, price):
+        if conditional['trailingStopPercent'] is not None:
+            extreme = conditional['_extreme']
+            pct = float(conditional['trailingStopPercent']) / 100.0
+            if conditional['operand'] == OPERAND_LTE:
+                extreme = price if extreme is None else max(extreme, price)
+                conditional['_extreme'] = extreme
+                return price <= extreme * (1.0 - pct)
+            extreme = price if extreme is None else min(extreme, price)
+            conditional['_extreme'] = extreme
+            return price >= extreme * (1.0 + pct)
+        trigger = float(conditional['triggerPrice'])
+        return price >= trigger if conditional['operand'] == OPERAND_GTE else price <= trigger
+
+    def _check_conditionals(self, market, price):
+        for conditional in list(self._conditionals.values()):
+            if conditional['status'] != 'OPEN' or conditional['marketSymbol'] != market:
+                continue
+            if self._triggered(conditional, price):
+                conditional['status'] = 'TRIGGERED'
+                try:
+                    conditional['createdOrderId'] = self.place(conditional['orderToCreate'])['id']
+                except SimulatorError as e:
+                    conditional['status'] = 'FAILED'
+                    conditional['failureReason'] = e.code
+
+    def set_last_price(self, market, price):
+        """
+        Move the last trade price of a market, firing conditional orders.
+        """
+        with self._lock:
+            self._book(market).last = float(price)
+            self._check_conditionals(market, float(price))
+
+    # -- market data -------------------------------------------------------
+
+    def _levels(self, heap, depth, descending):
+        levels = {}
+        for _, _, order_id in heap:
+            order = self._orders[order_id]
+            if order['status'] == 'OPEN':
+                levels[order['limit']] = levels.get(order['limit'], 0.0) + order['quantity'] - order['filled']
+        rates = sorted(levels, reverse=descending)[:depth]
+        return [{'quantity': _fmt(levels[r]), 'rate': _fmt(r)} for r in rates]
+
+    def orderbook(self, market, depth=25):
+        """
+        :return: v3 ``/markets/{marketSymbol}/orderbook`` payload
+        :rtype: dict
+        """
+        with self._lock:
+            book = self._book(market)
+            return {'bid': self._levels(book.bids, depth, True), 'ask': self._levels(book.asks, depth, False)}
+
+    def trades(self, market):
+        """
+        :return: v3 ``/markets/{marketSymbol}/trades`` payload, newest first
+        :rtype: list
+        """
+        with self._lock:
+            return list(reversed(self._book(market).trades))
+
+    def ticker(self, market):
+        """
+        :return: v3 ``/markets/{marketSymbol}/ticker`` payload
+        :rtype: dict
+        """
+        with self._lock:
+            book = self._book(market)
+            bid = self._live(book.bids)
+            ask = self._live(book.asks)
+            return {
+                'symbol': market,
+                'lastTradeRate': _fmt(book.last or 0.0),
+                'bidRate': _fmt(bid['limit'] if bid else 0.0),
+                'askRate': _fmt(ask['limit'] if ask else 0.0)
+            }
@@ -0,0 +1,83 @@
+"""
+   Incremental parsing of JSON array responses.
+
+   :func:`iter_array` turns the byte chunks of a response body into its array
+   elements as soon as each one is complete.  Only the unparsed tail is
+   buffered, so memory stays at about one chunk plus one record however long
+   the array is.  Compression is handled below this layer: ``requests``
+   decodes gzip and deflate bodies while streaming them.
+"""
+
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+
+
+class StreamError(Exception):
+    """
+    Raised when a streamed request fails or its body is not a JSON array
+    """
+
+    def __init__(self, message, status=None):
+        super(StreamError, self).__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _skip(buffer, index, extra=''):
+    while index < len(buffer) and (buffer[index] in _WHITESPACE or buffer[index] in extra):
+        index += 1
+    return index
+
+
+def iter_array(chunks, decoder=None):
+    """
+    Yield the elements of a JSON array arriving in pieces.
+
+    Example ::
+        >>> list(iter_array([b'[{"a": 1},', b' {"a": 2}]']))
+        [{'a': 1}, {'a': 2}]
+
+    :param chunks: Iterable of ``bytes`` (UTF-8) or ``str`` pieces of the body
+    :type chunks: iterable
+    :param decoder: JSON decoder, defaults to ``json.JSONDecoder()``
+    :type decoder: json.JSONDecoder
+    :raises StreamError: if the body is not a complete JSON array
+    """
+    decoder = decoder or json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+    chunks = iter(chunks)
+    eof = False
+    while True:
+        index = _skip(buffer, 0)
+        if not started and index < len(buffer):
+            if buffer[index] != '[':
+                raise StreamError('response body is not a JSON array')
+            started = True
+            index += 1
+        while started:
+            index = _skip(buffer, index, ',')
+            if index < len(buffer) and buffer[index] == ']':
+                return
+            try:
+                element, end = decoder.raw_decode(buffer, index)
+            except ValueError:
+                break
+            if end == len(buffer) and not eof:
+                # a number may continue in the next chunk
+                break
+            yield element
+            index = end
+        buffer = buffer[index:]
+        if eof:
+            raise StreamError('truncated JSON array')
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            eof = True
+            buffer += text.decode(b'', final=True)
+            continue
+        buffer += text.decode(chunk) if isinstance(chunk, bytes) else chunk
@@ -0,0 +1,228 @@
+"""
+   Recent trades per market with rolling statistics.
+
+   :class:`TradeTape` keeps the last ``capacity`` trades of every market in
+   one set of 2-D arrays (a ring per row) and, for each market, running
+   sums over the trades of the last ``window`` seconds: count, volume,
+   notional and the buy and sell volume behind the imbalance.  A trade
+   adds to the sums when it arrives and subtracts when it leaves the
+   window or is overwritten, so keeping the statistics current costs O(1)
+   per trade however long the window is.
+
+   Feed it from ``/markets/{marketSymbol}/trades`` with :meth:`TradeTape.poll`,
+   which drops trades already seen, or one trade at a time with
+   :meth:`TradeTape.add_trade` from a stream.
+"""
+
+import time
+
+import numpy as np
+
+from bittrex.bittrex import DIRECTION_BUY
+
+BUY = 1
+SELL = -1
+
+
+def _seconds(value):
+    return np.datetime64(value.rstrip('Z'), 'ms').astype(np.int64) / 1000.0
+
+
+class TradeTape(object):
+    """
+    Example ::
+        >>> tape = TradeTape(['LTC-BTC', 'ETH-BTC'], window=60)
+        >>> tape.poll(my_bittrex)
+        {'LTC-BTC': 12, 'ETH-BTC': 3}
+        >>> tape.stats('LTC-BTC')
+        {'trades': 12, 'volume': 41.5, 'notional': 0.1743, 'buy_volume': 30.0,
+         'sell_volume': 11.5, 'imbalance': 0.446, 'vwap': 0.0042}
+
+    :ivar symbols: Market per row
+    """
+
+    def __init__(self, symbols=(), capacity=512, window=300.0, clock=time.time):
+        """
+        :param symbols: Markets to start with; others are added on first use
+        :type symbols: list
+        :param capacity: Trades kept per market
+        :type capacity: int
+        :param window: Length of the rolling window in seconds
+        :type window: float
+        :param clock: Time source the window ends at
+        :type clock: callable
+        """
+        self.capacity = capacity
+        self.window = window
+        self.clock = clock
+        self.symbols = []
+        self._index = {}
+        self._ids = []
+
+        rows = max(len(symbols), 1)
+        self.time = np.zeros((rows, capacity))
+        self.quantity = np.zeros((rows, capacity))
+        self.rate = np.zeros((rows, capacity))
+        self.side = np.zeros((rows, capacity), dtype=np.int8)
+        # trades written so far and the sequence number of the oldest one in the window
+        self._written = np.zeros(rows, dtype=np.int64)
+        self._start = np.zeros(rows, dtype=np.int64)
+        self._trades = np.zeros(rows, dtype=np.int64)
+        self._volume = np.zeros(rows)
+        self._notional = np.zeros(rows)
+        self._buy = np.zeros(rows)
+        for symbol in symbols:
+            self.row(symbol)
+
+    def row(self, symbol):
+        """
+        :return: Row of a market, adding it if new
+        :rtype: int
+        """
+        if symbol in self._index:
+            return self._index[symbol]
+        m = len(self.symbols)
+        if m == len(self._written):
+            self._grow(2 * m)
+        self.symbols.append(symbol)
+        self._ids.append([set(), [None] * self.capacity])
+        self._index[symbol] = m
+        return m
+
+    def _grow(self, rows):
+        for name in ('time', 'quantity', 'rate', 'side'):
+            old = getattr(self, name)
+            new = np.zeros((rows, self.capacity), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        for name in ('_written', '_start', '_trades', '_volume', '_notional', '_buy'):
+            old = getattr(self, name)
+            new = np.zeros(rows, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _remove(self, m, slot):
+        quantity = self.quantity[m, slot]
+        self._trades[m] -= 1
+        self._volume[m] -= quantity
+        self._notional[m] -= quantity * self.rate[m, slot]
+        if self.side[m, slot] == BUY:
+            self._buy[m] -= quantity
+        self._start[m] += 1
+        if not self._trades[m]:
+            # an empty window restarts the sums, clearing accumulated rounding error
+            self._volume[m] = self._notional[m] = self._buy[m] = 0.0
+
+    def _expire(self, m, now):
+        cutoff = now - self.window
+        while self._start[m] < self._written[m] and self.time[m, self._start[m] % self.capacity] < cutoff:
+            self._remove(m, self._start[m] % self.capacity)
+
+    def add_trade(self, symbol, trade_id, executed_at, quantity, rate, side):
+        """
+        Add one trade.  Trades already on the tape, and trades older than
+        the market's newest one, are ignored.
+
+        :param executed_at: Epoch seconds
+        :type executed_at: float
+        :param side: BUY or SELL, the taker's side
+        :type side: int
+        :return: True if the trade was added
+        :rtype: bool
+        """
+        m = self.row(symbol)
+        seen, ids = self._ids[m]
+        written = self._written[m]
+        if trade_id in seen or (written and executed_at < self.time[m, (written - 1) % self.capacity]):
+            return False
+        slot = written % self.capacity
+        if written - self._start[m] == self.capacity:
+            # overwriting a trade still inside the window
+            self._remove(m, slot)
+        if ids[slot] is not None:
+            seen.discard(ids[slot])
+        ids[slot] = trade_id
+        seen.add(trade_id)
+
+        self.time[m, slot] = executed_at
+        self.quantity[m, slot] = quantity
+        self.rate[m, slot] = rate
+        self.side[m, slot] = side
+        self._written[m] = written + 1
+        self._trades[m] += 1
+        self._volume[m] += quantity
+        self._notional[m] += quantity * rate
+        if side == BUY:
+            self._buy[m] += quantity
+        self._expire(m, executed_at)
+        return True
+
+    def add(self, symbol, trades):
+        """
+        Add a ``get_market_trades`` result.
+
+        :param trades: v3 trade dicts, in any order
+        :type trades: list
+        :return: Number of new trades
+        :rtype: int
+        """
+        parsed = sorted((_seconds(t['executedAt']), i, t) for i, t in enumerate(reversed(trades)))
+        added = 0
+        for executed_at, _, t in parsed:
+            side = BUY if t['takerSide'] == DIRECTION_BUY else SELL
+            added += self.add_trade(symbol, t['id'], executed_at, float(t['quantity']), float(t['rate']), side)
+        return added
+
+    def poll(self, bittrex, symbols=None):
+        """
+        Fetch the recent trades of each market and add the new ones.
+
+        :param bittrex: Client to fetch with
+        :type bittrex: bittrex.bittrex.Bittrex
+        :param symbols: Markets to poll, all known ones by default
+        :type symbols: list
+        :return: ``{symbol: new trades}`` for the markets that answered
+        :rtype: dict
+        """
+        added = {}
+        for symbol in list(self.symbols if symbols is None else symbols):
+            response = bittrex.get_market_trades(symbol)
+            if response['success'] and response['result'] is not None:
+                added[symbol] = self.add(symbol, response['result'])
+        return added
+
+    def stats(self, symbol, now=None):
+        """
+        Rolling statistics of the trades in ``[now - window, now]``.
+
+        ``imbalance`` is ``(buy - sell) / (buy + sell)`` volume; ``vwap`` is
+        notional over volume.  Both are NaN without trades.
+
+        :param now: End of the window, the clock by default
+        :type now: float
+        :rtype: dict
+        """
+        m = self.row(symbol)
+        self._expire(m, self.clock() if now is None else now)
+        volume = self._volume[m]
+        buy = self._buy[m]
+        return {
+            'trades': int(self._trades[m]),
+            'volume': float(volume),
+            'notional': float(self._notional[m]),
+            'buy_volume': float(buy),
+            'sell_volume': float(volume - buy),
+            'imbalance': float((2 * buy - volume) / volume) if volume > 0 else float('nan'),
+            'vwap': float(self._notional[m] / volume) if volume > 0 else float('nan'),
+        }
+
+    def trades(self, symbol):
+        """
+        :return: ``{'time', 'quantity', 'rate', 'side'}`` arrays of the trades kept, oldest first
+        :rtype: dict
+        """
+        m = self.row(symbol)
+        written = self._written[m]
+        order = np.arange(max(written - self.capacity, 0), written) % self.capacity
+        return {'time': self.time[m, order], 'quantity': self.quantity[m, order], 'rate': self.rate[m, order],
+                'side': self.side[m, order]}
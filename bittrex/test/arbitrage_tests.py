@@ -0,0 +1,71 @@
+import time
+import unittest
+
+import numpy as np
+
+from bittrex.arbitrage import CurrencyGraph, ArbitrageScanner
+from bittrex.bittrex import TRADE_FEE, DIRECTION_BUY, DIRECTION_SELL
+from bittrex.tickers import TickerSnapshot
+
+
+def market(base, quote):
+    return {'symbol': base + '-' + quote, 'baseCurrencySymbol': base, 'quoteCurrencySymbol': quote}
+
+
+def ticker(symbol, bid, ask):
+    return {'symbol': symbol, 'bidRate': str(bid), 'askRate': str(ask), 'lastTradeRate': str(bid)}
+
+
+class TestArbitrage(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = CurrencyGraph.from_markets([market('ETH', 'BTC'), market('LTC', 'BTC'), market('LTC', 'ETH'),
+                                                 market('XRP', 'USD')])
+        self.snapshot = TickerSnapshot(summaries=False)
+        self.scanner = ArbitrageScanner(self.graph, self.snapshot)
+
+    def test_graph_enumerates_both_directions(self):
+        self.assertEqual(self.graph.cycles.tolist(), [['BTC', 'ETH', 'LTC'], ['BTC', 'LTC', 'ETH']])
+        self.assertEqual(self.graph.cycles_through([self.graph.market('XRP-USD')]).tolist(), [])
+
+    def test_returns_include_fees_and_update_incrementally(self):
+        self.snapshot.load([ticker('ETH-BTC', 0.0499, 0.05), ticker('LTC-BTC', 0.0051, 0.00511),
+                            ticker('LTC-ETH', 0.1015, 0.1025)])
+        returns = self.scanner.scan()
+        # BTC -> ETH (buy at ask) -> LTC (buy at ask) -> BTC (sell at bid)
+        expected = (1 / 0.05) * (1 / 0.1025) * 0.0051 * (1 - TRADE_FEE) ** 3 - 1
+        self.assertAlmostEqual(returns[0], expected)
+        self.assertEqual(self.scanner.opportunities(), [])
+
+        diff = self.snapshot.load([ticker('ETH-BTC', 0.0499, 0.05), ticker('LTC-BTC', 0.0056, 0.0057),
+                                   ticker('LTC-ETH', 0.1015, 0.1025), ticker('XRP-USD', 0.2, 0.21)])
+        self.assertEqual(self.scanner.update(diff).tolist(), [0, 1])
+        found = self.scanner.opportunities(min_return=0.0, start='LTC')
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0]['path'], ['LTC', 'BTC', 'ETH', 'LTC'])
+        self.assertEqual(found[0]['legs'], [('LTC-BTC', DIRECTION_SELL), ('ETH-BTC', DIRECTION_BUY),
+                                            ('LTC-ETH', DIRECTION_BUY)])
+        np.testing.assert_allclose(self.scanner.returns, ArbitrageScanner(self.graph, self.snapshot).scan())
+
+    def test_missing_prices_give_nan(self):
+        self.snapshot.load([ticker('ETH-BTC', 0.0499, 0.05)])
+        self.assertTrue(np.isnan(self.scanner.scan()).all())
+
+    def test_full_exchange_scan_speed(self):
+        currencies = ['C{0}'.format(i) for i in range(60)]
+        markets = [market(c, q) for q in ('BTC', 'ETH', 'USDT', 'USD') for c in currencies] + \
+            [market('ETH', 'BTC'), market('BTC', 'USDT'), market('ETH', 'USDT'), market('BTC', 'USD')]
+        graph = CurrencyGraph.from_markets(markets)
+        snapshot = TickerSnapshot(summaries=False)
+        rng = np.random.RandomState(1)
+        snapshot.load([ticker(m['symbol'], p, p * 1.001) for m, p in zip(markets, rng.uniform(1, 2, len(markets)))])
+        scanner = ArbitrageScanner(graph, snapshot)
+        start = time.time()
+        returns = scanner.scan()
+        self.assertLess(time.time() - start, 0.1)
+        self.assertEqual(len(returns), len(graph.cycles))
+        self.assertGreater(len(graph.cycles), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from bittrex import backtest, indicators
+from bittrex.bittrex import (TRADE_FEE, ORDERTYPE_LIMIT, TIMEINEFFECT_IMMEDIATE_OR_CANCEL,
+                             TIMEINEFFECT_FILL_OR_KILL)
+
+
+def crossover(columns, fast, slow):
+    return (indicators.sma(columns['close'], fast) > indicators.sma(columns['close'], slow)) * 1.0
+
+
+def make_columns(close):
+    close = np.asarray(close, dtype=np.float64)
+    return {'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+            'volume': np.full(len(close), 100.0)}
+
+
+class TestBacktest(unittest.TestCase):
+
+    def test_market_round_trip_pays_fees(self):
+        columns = make_columns([10, 10, 12, 12, 12])
+        result = backtest.run(columns, lambda c: np.array([1, 1, 0, 0, 0.0]))
+        # bought at the open of candle 1, sold at the open of candle 3
+        expected = (1 - TRADE_FEE) / (1 + TRADE_FEE) * 12 / 10
+        self.assertAlmostEqual(result.equity[0, -1], expected)
+        self.assertEqual(result.fills['side'].tolist(), ['BUY', 'SELL'])
+        self.assertEqual(result.fills['index'].tolist(), [1, 3])
+
+    def test_limit_orders_need_price_through(self):
+        columns = make_columns([10, 10, 10, 10])
+        targets = np.array([1, 1, 1, 1.0])
+        resting = backtest.run(columns, lambda c: targets, order_type=ORDERTYPE_LIMIT, limit_offset=0.05)
+        self.assertEqual(len(resting.fills), 0)
+        columns['low'][2] = 9.0
+        resting = backtest.run(columns, lambda c: targets, order_type=ORDERTYPE_LIMIT, limit_offset=0.05)
+        self.assertEqual(resting.fills['index'].tolist(), [2])
+        self.assertAlmostEqual(resting.fills['price'][0], 9.5)
+        ioc = backtest.run(columns, lambda c: targets, order_type=ORDERTYPE_LIMIT, limit_offset=0.05,
+                           time_in_effect=TIMEINEFFECT_IMMEDIATE_OR_CANCEL)
+        self.assertEqual(len(ioc.fills), 0)
+
+    def test_participation_and_fill_or_kill(self):
+        columns = make_columns([1, 1, 1, 1])
+        columns['volume'][:] = 0.1
+        targets = np.array([1, 1, 1, 1.0])
+        partial = backtest.run(columns, lambda c: targets, participation=1.0,
+                               time_in_effect=TIMEINEFFECT_IMMEDIATE_OR_CANCEL)
+        self.assertAlmostEqual(partial.fills['quantity'].sum(), 0.1)
+        killed = backtest.run(columns, lambda c: targets, participation=1.0,
+                              time_in_effect=TIMEINEFFECT_FILL_OR_KILL)
+        self.assertEqual(len(killed.fills), 0)
+
+    def test_sweep_matches_individual_runs(self):
+        rng = np.random.RandomState(3)
+        columns = make_columns(100 + np.cumsum(rng.normal(size=400)))
+        sets = backtest.grid(fast=[3, 5, 8], slow=[20, 40])
+        swept = backtest.sweep(columns, crossover, sets, processes=2, chunk_size=2)
+        self.assertEqual(swept.equity.shape, (6, 400))
+        for i, params in enumerate(sets):
+            single = backtest.run(columns, crossover, params)
+            np.testing.assert_allclose(swept.equity[i], single.equity[0])
+            self.assertEqual(len(swept.fills_for(i)), len(single.fills))
+
+
+if __name__ == '__main__':
+    unittest.main()
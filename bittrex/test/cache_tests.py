@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from bittrex.bittrex import Bittrex
+from bittrex.cache import ResponseCache, fcntl
+
+
+class CountingTransport(object):
+    """
+    Answers every GET after ``delay`` seconds, counting requests in ``calls``.
+    """
+
+    def __init__(self, calls, delay=0.0):
+        self.calls = calls
+        self.delay = delay
+
+    def __call__(self, method, request_url, headers, body):
+        with self.calls.get_lock():
+            self.calls.value += 1
+        time.sleep(self.delay)
+        if 'missing' in request_url:
+            return 404, {}, {'code': 'MARKET_DOES_NOT_EXIST'}
+        return 200, {}, [{'symbol': 'LTC-BTC', 'url': request_url}]
+
+
+def worker(path, calls, results):
+    bittrex = Bittrex(None, None, calls_per_second=1e9, transport=CountingTransport(calls, delay=0.3),
+                      cache=ResponseCache(path))
+    results.put(bittrex.get_markets()['result'][0]['symbol'])
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.db')
+        self.calls = multiprocessing.Value('i', 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_ttl_and_uncached_paths(self):
+        now = [1000.0]
+        cache = ResponseCache(self.path, clock=lambda: now[0])
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=CountingTransport(self.calls), cache=cache)
+        first = bittrex.get_markets()
+        self.assertEqual(bittrex.get_markets(), first)
+        self.assertEqual(self.calls.value, 1)
+        now[0] += 301
+        bittrex.get_markets()
+        self.assertEqual(self.calls.value, 2)
+
+        # tickers are not cached by default, nor are failures
+        bittrex.get_market_tickers()
+        bittrex.get_market_tickers()
+        bittrex.get_candles('missing', 'hour')
+        bittrex.get_candles('missing', 'hour')
+        self.assertEqual(self.calls.value, 6)
+        self.assertEqual(cache.metrics()['hits'], 1)
+        self.assertEqual(cache.ttl('/markets/LTC-BTC/candles/HOUR_1/recent'), 30.0)
+
+    def test_size_bound_evicts_oldest(self):
+        now = [1000.0]
+        cache = ResponseCache(self.path, max_bytes=250, default_ttl=60, clock=lambda: now[0])
+        for i in range(5):
+            now[0] += 1
+            cache.put('/key/{0}'.format(i), {'success': True, 'result': 'x' * 80}, 60)
+        self.assertIsNone(cache.get('/key/0'))
+        self.assertIsNotNone(cache.get('/key/4'))
+        self.assertEqual(cache.metrics()['evictions'], 3)
+
+    @unittest.skipIf(fcntl is None or 'fork' not in multiprocessing.get_all_start_methods(),
+                     'needs fork and POSIX file locks')
+    def test_processes_share_one_fill(self):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(self.path, self.calls, results)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(10)
+        self.assertEqual([results.get(timeout=1) for _ in processes], ['LTC-BTC'] * 4)
+        self.assertEqual(self.calls.value, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
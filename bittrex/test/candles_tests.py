@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from bittrex.bittrex import TICKINTERVAL_ONEMIN, TICKINTERVAL_FIVEMIN, TICKINTERVAL_HOUR, TICKINTERVAL_DAY
+from bittrex.candles import COLUMNS, resample, Resampler
+
+
+def minutes(n, start='2020-07-12T22:00:00', seed=3, skip=()):
+    rng = np.random.RandomState(seed)
+    close = 0.005 + np.cumsum(rng.normal(scale=1e-5, size=n))
+    keep = np.array([i not in skip for i in range(n)], dtype=bool)
+    columns = {
+        'time': np.datetime64(start, 's') + np.arange(n) * np.timedelta64(60, 's'),
+        'open': close - 2e-6,
+        'high': close + rng.uniform(0, 1e-5, n),
+        'low': close - rng.uniform(0, 1e-5, n),
+        'close': close,
+        'volume': rng.uniform(1, 10, n),
+        'quote_volume': rng.uniform(0.01, 0.05, n),
+    }
+    return dict((c, columns[c][keep]) for c in COLUMNS)
+
+
+def row(columns, i):
+    return dict((c, columns[c][i]) for c in COLUMNS)
+
+
+class TestResample(unittest.TestCase):
+
+    def test_aggregates_aligned_buckets(self):
+        source = minutes(150, start='2020-07-12T22:30:00', skip=(3,))
+        hours = resample(source, TICKINTERVAL_HOUR)
+        self.assertEqual([str(t) for t in hours['time']],
+                         ['2020-07-12T22:00:00', '2020-07-12T23:00:00', '2020-07-13T00:00:00'])
+        first = slice(0, 29)
+        self.assertEqual(hours['open'][0], source['open'][0])
+        self.assertEqual(hours['close'][0], source['close'][28])
+        self.assertEqual(hours['high'][0], source['high'][first].max())
+        self.assertEqual(hours['low'][1], source['low'][29:89].min())
+        self.assertAlmostEqual(hours['volume'][2], source['volume'][89:].sum())
+        self.assertAlmostEqual(hours['quote_volume'][0], source['quote_volume'][first].sum())
+
+        days = resample(source, TICKINTERVAL_DAY)
+        self.assertEqual([str(t) for t in days['time']], ['2020-07-12T00:00:00', '2020-07-13T00:00:00'])
+
+    def test_empty_and_unknown_interval(self):
+        self.assertEqual(len(resample(minutes(0), TICKINTERVAL_HOUR)['time']), 0)
+        self.assertRaises(ValueError, resample, minutes(5), 'week')
+
+
+class TestResampler(unittest.TestCase):
+
+    def test_incremental_matches_batch(self):
+        source = minutes(200, skip=(10, 11, 60))
+        history = dict((c, source[c][:37]) for c in COLUMNS)
+        resampler = Resampler(TICKINTERVAL_FIVEMIN, history)
+        closed = []
+        for i in range(37, len(source['time'])):
+            # the building minute is re-sent with a partial volume before its final value
+            partial = row(source, i)
+            partial['volume'] /= 2
+            for update in (partial, row(source, i)):
+                bucket = resampler.update(update)
+                if bucket is not None:
+                    closed.append(bucket['time'])
+        expected = resample(source, TICKINTERVAL_FIVEMIN)
+        for column in COLUMNS:
+            if column == 'time':
+                np.testing.assert_array_equal(resampler.columns[column], expected[column])
+            else:
+                np.testing.assert_allclose(resampler.columns[column], expected[column])
+        self.assertEqual(closed, list(expected['time'][7:-1]))
+
+    def test_ignores_stale_minutes(self):
+        source = minutes(3)
+        resampler = Resampler(TICKINTERVAL_HOUR)
+        resampler.update(row(source, 2))
+        self.assertIsNone(resampler.update(row(source, 0)))
+        self.assertEqual(resampler.columns['close'][-1], source['close'][2])
+        self.assertRaises(ValueError, Resampler, TICKINTERVAL_ONEMIN + 's')
+
+
+if __name__ == '__main__':
+    unittest.main()
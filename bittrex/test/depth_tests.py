@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+
+from bittrex.bittrex import Bittrex, TRADE_FEE, DIRECTION_BUY, DIRECTION_SELL
+from bittrex.depth import BookArrays, estimate
+from bittrex.simulator import PaperExchange
+
+
+class TestDepthEstimate(unittest.TestCase):
+
+    def setUp(self):
+        self.books = BookArrays.from_orderbooks({
+            'LTC-BTC': {'ask': [{'quantity': '2', 'rate': '11'}, {'quantity': '1', 'rate': '10'}],
+                        'bid': [{'quantity': '5', 'rate': '9'}]},
+            'ETH-BTC': {'sell': [{'Quantity': 10, 'Rate': 20}], 'buy': []},
+        })
+
+    def test_buy_walks_levels(self):
+        cost = estimate(self.books, [0.5, 2, 5], DIRECTION_BUY)
+        row = self.books.row('LTC-BTC')
+        np.testing.assert_allclose(cost.vwap[row, :2], [10.0, 10.5])
+        np.testing.assert_allclose(cost.worst[row, :2], [10.0, 11.0])
+        self.assertAlmostEqual(cost.slippage[row, 1], 0.05)
+        self.assertAlmostEqual(cost.total[row, 1], 21 * (1 + TRADE_FEE))
+        self.assertFalse(cost.fillable[row, 2])
+        self.assertTrue(np.isnan(cost.vwap[row, 2]))
+        self.assertTrue(cost.fillable[self.books.row('ETH-BTC')].all())
+
+    def test_sell_and_per_market_quantities(self):
+        cost = estimate(self.books, [[1.0], [1.0]], DIRECTION_SELL)
+        self.assertAlmostEqual(cost.total[self.books.row('LTC-BTC'), 0], 9 * (1 - TRADE_FEE))
+        self.assertFalse(cost.fillable[self.books.row('ETH-BTC'), 0])
+
+    def test_from_client_orderbook(self):
+        exchange = PaperExchange()
+        exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 3, 0.01)
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=exchange)
+        books = BookArrays.from_orderbooks({'LTC-BTC': bittrex.get_orderbook('LTC-BTC')['result']})
+        self.assertAlmostEqual(estimate(books, [3]).vwap[0, 0], 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
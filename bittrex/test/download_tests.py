@@ -0,0 +1,134 @@
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from bittrex.bittrex import Bittrex, TICKINTERVAL_ONEMIN, TICKINTERVAL_HOUR, TICKINTERVAL_DAY
+from bittrex.download import (plan, download, main, Task, DATASET_CANDLES, DATASET_TRADES, DATASET_SUMMARIES,
+                              FORMAT_ARROW, MANIFEST)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def candles(n):
+    return [{'startsAt': '2020-01-01T{0:02d}:{1:02d}:00Z'.format(i // 60, i % 60), 'open': '0.1', 'high': '0.2',
+             'low': '0.05', 'close': '0.15', 'volume': str(i), 'quoteVolume': '1.5'} for i in range(n)]
+
+
+class MarketTransport(object):
+    """
+    Serves candles, trades and summaries, failing the markets in ``broken``.
+    """
+
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.paths = []
+        self._lock = threading.Lock()
+
+    def __call__(self, method, request_url, headers, body):
+        path = request_url.split('/v3', 1)[1]
+        with self._lock:
+            self.paths.append(path)
+        if any(m in path for m in self.broken):
+            return 503, {}, {'code': 'SERVICE_UNAVAILABLE'}
+        if path == '/markets':
+            return 200, {}, [{'symbol': 'LTC-BTC', 'quoteCurrencySymbol': 'BTC', 'status': 'ONLINE'},
+                             {'symbol': 'ETH-BTC', 'quoteCurrencySymbol': 'BTC', 'status': 'ONLINE'},
+                             {'symbol': 'BTC-USD', 'quoteCurrencySymbol': 'USD', 'status': 'ONLINE'}]
+        if path == '/markets/summaries':
+            return 200, {}, [{'symbol': 'LTC-BTC', 'high': '0.2', 'low': '0.1', 'volume': '10',
+                              'quoteVolume': '1.5', 'percentChange': '-1.2', 'updatedAt': '2020-01-01T00:00:00.5Z'}]
+        if path.endswith('/trades'):
+            return 200, {}, [{'id': 'a', 'executedAt': '2020-01-01T00:00:01.25Z', 'quantity': '1.5',
+                              'rate': '0.005', 'takerSide': 'BUY'}]
+        if '/candles/' in path:
+            return 200, {}, candles(25)
+        return 404, {}, {'code': 'NOT_FOUND'}
+
+
+class TestPlan(unittest.TestCase):
+
+    def test_historical_periods_follow_interval(self):
+        tasks = plan(['LTC-BTC'], [DATASET_CANDLES], [TICKINTERVAL_ONEMIN, TICKINTERVAL_HOUR, TICKINTERVAL_DAY],
+                     datetime.date(2019, 12, 30), datetime.date(2020, 1, 2))
+        periods = dict((i, [t.period for t in tasks if t.interval == i])
+                       for i in (TICKINTERVAL_ONEMIN, TICKINTERVAL_HOUR, TICKINTERVAL_DAY))
+        self.assertEqual(periods[TICKINTERVAL_ONEMIN], ['2019-12-30', '2019-12-31', '2020-01-01', '2020-01-02'])
+        self.assertEqual(periods[TICKINTERVAL_HOUR], ['2019-12', '2020-01'])
+        self.assertEqual(periods[TICKINTERVAL_DAY], ['2019', '2020'])
+
+    def test_recent_without_start(self):
+        tasks = plan(['LTC-BTC'], [DATASET_SUMMARIES, DATASET_TRADES, DATASET_CANDLES], [TICKINTERVAL_HOUR])
+        self.assertEqual([t.key for t in tasks], ['summaries/recent', 'trades/LTC-BTC/recent',
+                                                  'candles/LTC-BTC/hour/recent'])
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.out = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out)
+
+    def test_parquet_row_groups_and_types(self):
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=MarketTransport())
+        tasks = [Task(DATASET_CANDLES, 'LTC-BTC', TICKINTERVAL_HOUR, '2020-01'),
+                 Task(DATASET_TRADES, 'LTC-BTC', None, 'recent')]
+        summary = download(bittrex, tasks, self.out, workers=2, row_group_size=10)
+        self.assertEqual((summary['done'], summary['rows'], summary['failed']), (2, 26, []))
+
+        candle_file = pyarrow.parquet.ParquetFile(os.path.join(self.out, 'candles', 'hour', 'LTC-BTC',
+                                                               '2020-01.parquet'))
+        self.assertEqual(candle_file.metadata.num_row_groups, 3)
+        table = candle_file.read()
+        self.assertEqual(table.num_rows, 25)
+        self.assertEqual(str(table.schema.field('startsAt').type), 'timestamp[ms, tz=UTC]')
+        self.assertEqual(table.column('volume').to_pylist()[-1], 24.0)
+
+        trades = pyarrow.parquet.read_table(os.path.join(self.out, 'trades', 'LTC-BTC', 'recent.parquet'))
+        self.assertEqual(trades.column('rate').to_pylist(), [0.005])
+        self.assertEqual(trades.column('executedAt').to_pylist()[0].microsecond, 250000)
+
+    def test_arrow_format(self):
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=MarketTransport())
+        download(bittrex, [Task(DATASET_SUMMARIES, None, None, 'recent')], self.out, file_format=FORMAT_ARROW)
+        reader = pyarrow.ipc.open_file(os.path.join(self.out, 'summaries', 'recent.arrow'))
+        self.assertEqual(reader.read_all().column('percentChange').to_pylist(), [-1.2])
+
+    def test_resume_skips_finished_tasks(self):
+        tasks = plan(['LTC-BTC', 'ETH-BTC'], [DATASET_CANDLES], [TICKINTERVAL_DAY], datetime.date(2019, 6, 1),
+                     datetime.date(2020, 6, 1))
+        broken = MarketTransport(broken=['ETH-BTC'])
+        summary = download(Bittrex(None, None, calls_per_second=1e9, transport=broken), tasks, self.out)
+        self.assertEqual((summary['done'], len(summary['failed'])), (2, 2))
+        self.assertFalse([f for _, _, files in os.walk(self.out) for f in files if f.endswith('.partial')])
+
+        healed = MarketTransport()
+        summary = download(Bittrex(None, None, calls_per_second=1e9, transport=healed), tasks, self.out)
+        self.assertEqual((summary['done'], summary['skipped'], summary['failed']), (2, 2, []))
+        self.assertTrue(all('ETH-BTC' in p for p in healed.paths))
+
+        # a file deleted since is downloaded again
+        os.remove(os.path.join(self.out, 'candles', 'Day', 'LTC-BTC', '2020.parquet'))
+        summary = download(Bittrex(None, None, calls_per_second=1e9, transport=healed), tasks, self.out)
+        self.assertEqual((summary['done'], summary['skipped']), (1, 3))
+
+    def test_main_selects_markets_by_quote(self):
+        transport = MarketTransport()
+        status = main(['--out', self.out, '--quote', 'BTC', '--datasets', 'trades', '--workers', '2'],
+                      bittrex=Bittrex(None, None, calls_per_second=1e9, transport=transport))
+        self.assertEqual(status, 0)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.out, 'trades'))), ['ETH-BTC', 'LTC-BTC'])
+        self.assertTrue(os.path.exists(os.path.join(self.out, MANIFEST)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from bittrex.bittrex import Bittrex, DIRECTION_BUY, DIRECTION_SELL
+from bittrex.execution import ExecutionEngine, TWAP, Iceberg, Ladder, STATE_DONE, STATE_CANCELLED
+from bittrex.simulator import PaperExchange
+
+
+class TestExecution(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.exchange = PaperExchange(balances={'BTC': 10.0, 'LTC': 100.0})
+        self.exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 100, 0.011)
+        self.exchange.add_liquidity('LTC-BTC', DIRECTION_BUY, 100, 0.009)
+        self.bittrex = Bittrex(None, None, calls_per_second=1e9, transport=self.exchange)
+        self.engine = ExecutionEngine(self.bittrex, refresh_interval=0, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+    def test_twap_slices_over_time(self):
+        twap = self.engine.submit(TWAP('LTC-BTC', DIRECTION_BUY, 10, duration=100, slices=4))
+        self.engine.run_cycle()
+        self.assertAlmostEqual(twap.filled, 2.5)
+        self.now = 60
+        self.engine.run_cycle()
+        self.assertAlmostEqual(twap.filled, 7.5)
+        self.now = 99
+        self.engine.run_cycle()
+        self.engine.run_cycle()
+        report = twap.report()
+        self.assertEqual(report['state'], STATE_DONE)
+        self.assertAlmostEqual(report['average_price'], 0.011)
+        self.assertAlmostEqual(report['slippage_bps'], (0.011 / 0.010 - 1) * 1e4)
+        self.assertEqual(report['children'], 3)
+
+    def test_iceberg_reprices_and_refills(self):
+        iceberg = self.engine.submit(Iceberg('LTC-BTC', DIRECTION_SELL, 5, display=2))
+        self.engine.run_cycle()
+        children = iceberg.open_children()
+        self.assertEqual([(c.quantity, c.price) for c in children], [(2.0, 0.011)])
+        # a better offer moves the touch; the child is cancelled then replaced
+        self.exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 1, 0.0105)
+        self.engine.run_cycle()
+        self.assertEqual(iceberg.open_children(), [])
+        self.engine.run_cycle()
+        self.assertEqual([c.price for c in iceberg.open_children()], [0.0105])
+        # someone lifts our child; the next cycle shows the next slice
+        self.exchange.add_liquidity('LTC-BTC', DIRECTION_BUY, 3, 0.0105)
+        self.engine.run_cycle()
+        self.engine.run_cycle()
+        self.assertAlmostEqual(iceberg.filled, 2.0)
+        self.assertAlmostEqual(iceberg.working, 2.0)
+
+    def test_ladder_is_post_only_and_cancellable(self):
+        ladder = self.engine.submit(Ladder('LTC-BTC', DIRECTION_BUY, 3, levels=3, spacing=0.01))
+        self.engine.run_cycle()
+        prices = sorted(c.price for c in ladder.open_children())
+        self.assertEqual(len(prices), 3)
+        self.assertTrue(all(p < 0.011 for p in prices))
+        self.assertEqual(ladder.filled, 0)
+        ladder.cancel()
+        self.engine.run_cycle()
+        self.engine.run_cycle()
+        self.assertEqual(ladder.state, STATE_CANCELLED)
+        self.assertEqual(self.bittrex.get_open_orders()['result'], [])
+
+    def test_step_is_non_blocking(self):
+        twap = self.engine.submit(TWAP('LTC-BTC', DIRECTION_BUY, 1, duration=0.001, slices=1))
+        self.assertTrue(self.engine.run(interval=0.001, timeout=5))
+        self.assertEqual(twap.state, STATE_DONE)
+        self.assertEqual(self.engine.errors, [])
+
+    def test_run_gives_up_on_stuck_algo(self):
+        stuck = self.engine.submit(TWAP('LTC-BTC', DIRECTION_BUY, 1, duration=1, slices=1, limit_price=0.001))
+        self.assertFalse(self.engine.run(interval=0.001, max_cycles=3))
+        self.assertEqual(stuck.state, STATE_CANCELLED)
+        self.assertEqual(stuck.report()['elapsed'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from bittrex.bittrex import DIRECTION_BUY, DIRECTION_SELL, order_payload
+from bittrex.fixedpoint import (Fixed, FixedArray, PrecisionTable, ROUND_DOWN, ROUND_UP, ROUND_NEAREST)
+
+MARKETS = [
+    {'symbol': 'LTC-BTC', 'precision': 6, 'minTradeSize': '0.01'},
+    {'symbol': 'BTC-USD', 'precision': 3, 'minTradeSize': '0.0001'},
+]
+
+
+class TestFixed(unittest.TestCase):
+
+    def test_parse_and_format_are_exact(self):
+        self.assertEqual(str(Fixed.parse('0.00512000')), '0.00512')
+        self.assertEqual(str(Fixed.parse('-12')), '-12')
+        self.assertEqual(Fixed.parse('0.1') + Fixed.parse('0.2'), Fixed.parse('0.3'))
+        self.assertEqual(str(Fixed.from_float(0.1 + 0.2, ROUND_DOWN)), '0.3')
+        self.assertEqual(str(Fixed.from_float(0.29, ROUND_DOWN)), '0.29')
+        self.assertEqual(str(Fixed.from_float(1 / 3.0, ROUND_UP)), '0.33333334')
+        self.assertRaises(ValueError, Fixed.parse, '0.000000001')
+        self.assertRaises(ValueError, Fixed.parse, '1e-5')
+
+    def test_snap_and_multiply(self):
+        tick = Fixed.parse('0.001')
+        self.assertEqual(str(Fixed.parse('1.2345').snap(tick, ROUND_DOWN)), '1.234')
+        self.assertEqual(str(Fixed.parse('1.2345').snap(tick, ROUND_UP)), '1.235')
+        self.assertEqual(str(Fixed.parse('1.2345').snap(tick, ROUND_NEAREST)), '1.235')
+        self.assertEqual(str(Fixed.parse('0.00512').multiply(Fixed.parse('3'))), '0.01536')
+
+
+class TestFixedArray(unittest.TestCase):
+
+    def test_vectorized_round_trip(self):
+        texts = ['0.1', '123456.78901234', '0', '-0.5']
+        array = FixedArray.parse(texts)
+        self.assertEqual(array.to_strings(), texts)
+        np.testing.assert_allclose(array.to_floats(), [0.1, 123456.78901234, 0, -0.5])
+        floats = FixedArray.from_floats([0.1 + 0.2, 2.675, 1e-9], ROUND_DOWN)
+        self.assertEqual(floats.to_strings(), ['0.3', '2.675', '0'])
+        self.assertEqual(floats[1], Fixed.parse('2.675'))
+        self.assertRaises(OverflowError, FixedArray.from_floats, [1e12])
+
+    def test_directed_rounding_of_large_values(self):
+        values = [20000.666666666668, 9999.999999996, 123456.1 + 0.2]
+        self.assertEqual(FixedArray.from_floats(values, ROUND_DOWN).to_strings(),
+                         ['20000.66666666', '9999.99999999', '123456.3'])
+        self.assertEqual(FixedArray.from_floats(values, ROUND_UP).to_strings(),
+                         ['20000.66666667', '10000', '123456.3'])
+        down = FixedArray.from_floats(values, ROUND_DOWN).to_floats()
+        self.assertTrue((down <= np.array(values)).all())
+
+    def test_quantize_batch_per_market(self):
+        table = PrecisionTable.from_markets(MARKETS)
+        symbols = ['LTC-BTC', 'LTC-BTC', 'BTC-USD', 'BTC-USD']
+        directions = [DIRECTION_BUY, DIRECTION_SELL, DIRECTION_BUY, DIRECTION_SELL]
+        price, quantity, valid = table.quantize(symbols, directions, [0.0051239, 0.0051231, 9123.4567, 9123.4561],
+                                                [1 / 3.0, 0.005, 0.00012345, 2.0])
+        self.assertEqual(price.to_strings(), ['0.005123', '0.005124', '9123.456', '9123.457'])
+        self.assertEqual(quantity.to_strings(), ['0.33333333', '0.005', '0.00012345', '2'])
+        self.assertEqual(valid.tolist(), [True, False, True, True])
+        payloads = table.payloads(symbols, directions, price, quantity)
+        self.assertEqual([(p['limit'], p['quantity']) for p in payloads],
+                         [('0.005123', '0.33333333'), ('9123.456', '0.00012345'), ('9123.457', '2')])
+
+
+class TestOrderPayload(unittest.TestCase):
+
+    def test_floats_are_written_without_artifacts(self):
+        order = order_payload(DIRECTION_BUY, 'LTC-BTC', 'LIMIT', 0.1 + 0.2, 1e-05)
+        self.assertEqual((order['quantity'], order['limit']), ('0.3', '0.00001'))
+        order = order_payload(DIRECTION_BUY, 'LTC-BTC', 'LIMIT', Fixed.parse('1.5'), '0.0051')
+        self.assertEqual((order['quantity'], order['limit']), ('1.5', '0.0051'))
+
+
+if __name__ == '__main__':
+    unittest.main()
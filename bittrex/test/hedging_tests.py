@@ -0,0 +1,118 @@
+import threading
+import time
+import unittest
+
+from bittrex.bittrex import Bittrex
+from bittrex.hedging import HedgePolicy
+from bittrex.scheduler import RequestScheduler
+
+
+class SlowFirstTransport(object):
+    """
+    The first request of every pair stalls for ``stall`` seconds.
+    """
+
+    def __init__(self, stall):
+        self.stall = stall
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, method, request_url, headers, body):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call % 2 == 1:
+            time.sleep(self.stall)
+        return 200, {}, {'call': call}
+
+
+class DelayTransport(object):
+    """
+    Request ``n`` takes ``delays[n]`` seconds.
+    """
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, method, request_url, headers, body):
+        with self._lock:
+            delay = self.delays[self.calls]
+            self.calls += 1
+            call = self.calls
+        time.sleep(delay)
+        return 200, {}, {'call': call}
+
+
+class TestHedging(unittest.TestCase):
+
+    def test_hedge_wins_over_stalled_request(self):
+        transport = SlowFirstTransport(0.5)
+        hedge = HedgePolicy(initial_delay=0.02)
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=transport, hedge=hedge)
+        start = time.time()
+        actual = bittrex.get_market_ticker('LTC-BTC')
+        self.assertLess(time.time() - start, 0.4)
+        self.assertEqual(actual['result'], {'call': 2})
+        metrics = hedge.metrics()
+        self.assertEqual((metrics['calls'], metrics['hedged'], metrics['hedge_wins']), (1, 1, 1))
+        self.assertEqual(metrics['hedge_rate'], 1.0)
+        deadline = time.time() + 5
+        while hedge.metrics()['saved_total'] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(hedge.metrics()['saved_total'], 0.3)
+
+    def test_primary_win_saves_nothing(self):
+        transport = DelayTransport([0.1, 0.3])
+        hedge = HedgePolicy(initial_delay=0.02)
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=transport, hedge=hedge)
+        self.assertEqual(bittrex.get_market_ticker('LTC-BTC')['result'], {'call': 1})
+        # let the losing hedge land
+        time.sleep(0.4)
+        metrics = hedge.metrics()
+        self.assertEqual((metrics['hedged'], metrics['hedge_wins']), (1, 0))
+        self.assertEqual((metrics['saved_total'], metrics['saved_max']), (0.0, 0.0))
+
+    def test_losing_hedge_returns_slot_and_workers_are_reused(self):
+        transport = DelayTransport([0.1, 0.5] + [0.0] * 20)
+        hedge = HedgePolicy(initial_delay=0.02)
+        scheduler = RequestScheduler(calls_per_second=1e6)
+        bittrex = Bittrex(None, None, scheduler=scheduler, transport=transport, hedge=hedge)
+        self.assertEqual(bittrex.get_market_ticker('LTC-BTC')['result'], {'call': 1})
+        # the hedge is still in flight, its slot is not
+        self.assertEqual(scheduler.metrics()['market_data']['active'], 0)
+        threads = threading.active_count()
+        for _ in range(20):
+            bittrex.get_market_ticker('LTC-BTC')
+        self.assertLessEqual(threading.active_count(), threads)
+        self.assertEqual(hedge.metrics()['hedged'], 1)
+
+    def test_hedges_stay_within_rate_budget(self):
+        transport = SlowFirstTransport(0.2)
+        hedge = HedgePolicy(initial_delay=0.02)
+        bittrex = Bittrex(None, None, calls_per_second=2, transport=transport, hedge=hedge)
+        self.assertEqual(bittrex.get_market_ticker('LTC-BTC')['result'], {'call': 1})
+        self.assertEqual(hedge.metrics()['denied'], 1)
+        self.assertEqual(transport.calls, 1)
+
+    def test_scheduler_budget_and_private_calls(self):
+        transport = SlowFirstTransport(0.2)
+        hedge = HedgePolicy(initial_delay=0.02)
+        scheduler = RequestScheduler(calls_per_second=1e6)
+        bittrex = Bittrex(None, None, scheduler=scheduler, transport=transport, hedge=hedge)
+        self.assertEqual(bittrex.get_markets()['result'], {'call': 2})
+        self.assertEqual(scheduler.metrics()['market_data']['granted'], 2)
+        self.assertEqual(scheduler.metrics()['market_data']['active'], 0)
+        bittrex.get_balances()
+        self.assertEqual(hedge.metrics()['calls'], 1)
+
+    def test_delay_follows_latency_percentile(self):
+        hedge = HedgePolicy(percentile=50, min_samples=4, initial_delay=1.0)
+        for latency in (0.1, 0.2, 0.3, 0.4):
+            hedge._record(latency)
+        self.assertEqual(hedge.delay(), 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
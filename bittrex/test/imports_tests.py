@@ -0,0 +1,43 @@
+import subprocess
+import sys
+import unittest
+
+# cold import of the client, measured by ``python -X importtime``; importing
+# requests alone costs about twice this
+IMPORT_BUDGET_US = 60000
+
+LAZY_MODULES = ('requests', 'json', 'Crypto', 'numpy')
+
+
+def cold_import(statement):
+    script = '{0}; import sys; print(",".join(sorted(sys.modules)))'.format(statement)
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', script],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = process.communicate()
+    timings = {}
+    for line in err.decode().splitlines()[1:]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        timings[name.strip()] = int(cumulative)
+    return set(out.decode().strip().split(',')), timings
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_client_import_is_lazy(self):
+        modules, timings = cold_import('import bittrex.bittrex')
+        self.assertEqual([m for m in LAZY_MODULES if m in modules], [])
+        self.assertLess(timings['bittrex'], IMPORT_BUDGET_US)
+
+    def test_dependencies_load_on_first_use(self):
+        modules, _ = cold_import('from bittrex.bittrex import Bittrex; '
+                                 'Bittrex(None, None, transport=lambda *a: (200, {}, [])).get_markets()')
+        self.assertNotIn('requests', modules)
+        modules, _ = cold_import('from bittrex.bittrex import Bittrex; '
+                                 'Bittrex(None, None, transport=lambda *a: (200, {}, {})).batch([])')
+        self.assertIn('json', modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+
+import numpy as np
+
+from bittrex import indicators
+from bittrex.candles import to_columns, stack, candle_row, append_row
+
+
+def reference_ema(values, alpha):
+    out = [values[0]]
+    for v in values[1:]:
+        out.append(alpha * v + (1 - alpha) * out[-1])
+    return np.array(out)
+
+
+class TestIndicators(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        self.close = 100 + np.cumsum(rng.normal(size=300))
+        self.high = self.close + rng.uniform(0, 1, 300)
+        self.low = self.close - rng.uniform(0, 1, 300)
+        self.volume = rng.uniform(1, 10, 300)
+
+    def test_sma_and_ema_match_reference(self):
+        sma = indicators.sma(self.close, 20)
+        self.assertTrue(np.isnan(sma[18]))
+        self.assertAlmostEqual(sma[19], self.close[:20].mean())
+        self.assertAlmostEqual(sma[-1], self.close[-20:].mean())
+        np.testing.assert_allclose(indicators.ema(self.close, 12), reference_ema(self.close, 2.0 / 13))
+
+    def test_batch_across_markets_with_padding(self):
+        short = {'close': self.close[-100:]}
+        full = {'close': self.close}
+        matrix = stack([full, short])
+        self.assertEqual(matrix.shape, (2, 300))
+        ema = indicators.ema(matrix, 10)
+        np.testing.assert_allclose(ema[0], indicators.ema(self.close, 10))
+        self.assertTrue(np.isnan(ema[1, :200]).all())
+        np.testing.assert_allclose(ema[1, 200:], indicators.ema(self.close[-100:], 10))
+        rsi = indicators.rsi(matrix, 14)
+        np.testing.assert_allclose(rsi[1, 200:], indicators.rsi(self.close[-100:], 14), equal_nan=True)
+
+    def test_interior_gap_only_blanks_its_candle(self):
+        close = self.close.copy()
+        close[100] = np.nan
+        ema = indicators.ema(close, 20)
+        np.testing.assert_allclose(ema[:100], indicators.ema(self.close[:100], 20))
+        self.assertTrue(np.isnan(ema[100]))
+        self.assertFalse(np.isnan(ema[101:]).any())
+        rsi = indicators.rsi(close, 14)
+        np.testing.assert_allclose(rsi[:100], indicators.rsi(self.close[:100], 14), equal_nan=True)
+        self.assertFalse(np.isnan(rsi[102:]).any())
+        high, low = self.high.copy(), self.low.copy()
+        high[100] = low[100] = np.nan
+        atr = indicators.atr(high, low, close, 14)
+        self.assertFalse(np.isnan(atr[64:100]).any())
+        self.assertFalse(np.isnan(atr[102:]).any())
+
+    def test_incremental_from_empty_history(self):
+        empty = np.array([])
+        states = [indicators.EMAState(12, empty), indicators.RSIState(empty, 14),
+                  indicators.ATRState(empty, empty, empty, 14), indicators.BollingerState(empty, 20)]
+        ema, rsi, atr, bands = states
+        for i in range(60):
+            ema.update(self.close[i])
+            rsi.update(self.close[i])
+            atr.update(self.high[i], self.low[i], self.close[i])
+            bands.update(self.close[i])
+        head = slice(0, 60)
+        self.assertAlmostEqual(ema.value, indicators.ema(self.close[head], 12)[-1])
+        self.assertAlmostEqual(rsi.value, indicators.rsi(self.close[head], 14)[-1])
+        self.assertAlmostEqual(atr.value, indicators.atr(self.high[head], self.low[head], self.close[head], 14)[-1])
+        self.assertAlmostEqual(bands.value[0], self.close[40:60].mean())
+
+    def test_bollinger_and_vwap(self):
+        middle, upper, lower = indicators.bollinger(self.close, 20, 2.0)
+        self.assertAlmostEqual(upper[-1] - middle[-1], 2 * self.close[-20:].std())
+        vwap = indicators.vwap(self.high, self.low, self.close, self.volume, window=5)
+        typical = (self.high + self.low + self.close)[-5:] / 3
+        self.assertAlmostEqual(vwap[-1], (typical * self.volume[-5:]).sum() / self.volume[-5:].sum())
+
+    def test_incremental_matches_batch(self):
+        head = slice(0, 250)
+        sma = indicators.SMAState(20, self.close[head])
+        ema = indicators.EMAState(12, self.close[head])
+        rsi = indicators.RSIState(self.close[head], 14)
+        atr = indicators.ATRState(self.high[head], self.low[head], self.close[head], 14)
+        vwap = indicators.VWAPState(self.high[head], self.low[head], self.close[head], self.volume[head], 30)
+        bands = indicators.BollingerState(self.close[head], 20)
+        for i in range(250, 300):
+            sma.update(self.close[i])
+            ema.update(self.close[i])
+            rsi.update(self.close[i])
+            atr.update(self.high[i], self.low[i], self.close[i])
+            vwap.update(self.high[i], self.low[i], self.close[i], self.volume[i])
+            bands.update(self.close[i])
+        self.assertAlmostEqual(sma.value, indicators.sma(self.close, 20)[-1])
+        self.assertAlmostEqual(ema.value, indicators.ema(self.close, 12)[-1])
+        self.assertAlmostEqual(rsi.value, indicators.rsi(self.close, 14)[-1])
+        self.assertAlmostEqual(atr.value, indicators.atr(self.high, self.low, self.close, 14)[-1])
+        self.assertAlmostEqual(vwap.value, indicators.vwap(self.high, self.low, self.close, self.volume, 30)[-1])
+        self.assertAlmostEqual(bands.value[1], indicators.bollinger(self.close, 20)[1][-1])
+
+
+class TestCandles(unittest.TestCase):
+
+    def test_to_columns_and_append(self):
+        columns = to_columns([
+            {'startsAt': '2020-01-01T00:00:00Z', 'open': '1', 'high': '2', 'low': '0.5', 'close': '1.5',
+             'volume': '10', 'quoteVolume': '15'},
+            {'T': '2020-01-01T00:01:00', 'O': 1.5, 'H': 1.6, 'L': 1.4, 'C': 1.4, 'V': 3, 'BV': 4.5},
+        ])
+        self.assertEqual(columns['close'].tolist(), [1.5, 1.4])
+        row = candle_row({'T': '2020-01-01T00:01:00', 'O': 1.5, 'H': 1.7, 'L': 1.4, 'C': 1.7, 'V': 4, 'BV': 6})
+        self.assertEqual(append_row(columns, row)['close'].tolist(), [1.5, 1.7])
+
+
+if __name__ == '__main__':
+    unittest.main()
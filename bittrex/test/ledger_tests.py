@@ -0,0 +1,85 @@
+import unittest
+
+from bittrex.ledger import BalanceLedger, StaleBalanceError
+
+
+class FakeBittrex(object):
+
+    def __init__(self, balances):
+        self.balances = balances
+        self.sequence = None
+        self.calls = 0
+
+    def get_balances(self):
+        self.calls += 1
+        if self.balances is None:
+            return {'success': False, 'message': 'NO_API_RESPONSE', 'result': None}
+        return {'success': True, 'message': '', 'result': self.balances, 'sequence': self.sequence}
+
+
+class TestBalanceLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.bittrex = FakeBittrex([
+            {'currencySymbol': 'BTC', 'total': '1.0', 'available': '0.8'},
+            {'currencySymbol': 'LTC', 'total': '10', 'available': '10'},
+        ])
+        self.ledger = BalanceLedger(self.bittrex, max_staleness=30, clock=lambda: self.now)
+
+    def test_served_from_memory_until_stale(self):
+        self.assertEqual(self.ledger.available('BTC'), 0.8)
+        self.assertEqual(self.ledger.available('LTC'), 10.0)
+        self.assertEqual(self.ledger.available('ETH'), 0.0)
+        self.assertEqual(self.bittrex.calls, 1)
+        self.now += 31
+        self.ledger.available('BTC')
+        self.assertEqual(self.bittrex.calls, 2)
+
+    def test_order_lifecycle(self):
+        self.ledger.resync()
+        self.ledger.reserve('BTC', 0.3)
+        self.assertAlmostEqual(self.ledger.available('BTC'), 0.5)
+        self.ledger.apply_fill('BTC', 0.2, 'LTC', 5)
+        self.ledger.release('BTC', 0.1)
+        self.assertAlmostEqual(self.ledger.available('BTC'), 0.6)
+        self.assertAlmostEqual(self.ledger.total('BTC'), 0.8)
+        self.assertAlmostEqual(self.ledger.available('LTC'), 15.0)
+
+    def test_stream_sequence(self):
+        self.ledger.load(self.bittrex.balances, sequence=10)
+        self.ledger.apply_stream({'sequence': 10, 'delta': {'currencySymbol': 'BTC', 'total': '9', 'available': '9'}})
+        self.assertEqual(self.ledger.available('BTC'), 0.8)
+        self.ledger.apply_stream({'sequence': 11, 'delta': {'currencySymbol': 'BTC', 'total': '2', 'available': '2'}})
+        self.assertEqual(self.ledger.available('BTC'), 2.0)
+        self.assertEqual(self.bittrex.calls, 0)
+        # a gap forces a resync on next lookup
+        self.ledger.apply_stream({'sequence': 13, 'delta': {'currencySymbol': 'BTC', 'total': '3', 'available': '3'}})
+        self.assertEqual(self.ledger.available('BTC'), 0.8)
+        self.assertEqual(self.bittrex.calls, 1)
+
+    def test_lagging_snapshot_backs_off(self):
+        self.ledger.load(self.bittrex.balances, sequence=10)
+        self.ledger.apply_stream({'sequence': 11, 'delta': {'currencySymbol': 'LTC', 'total': '4', 'available': '4'}})
+        self.ledger.apply_stream({'sequence': 14, 'delta': {'currencySymbol': 'BTC', 'total': '3', 'available': '3'}})
+        # the snapshot predates both the gap and the streamed rows
+        self.bittrex.sequence = 9
+        self.assertEqual(self.ledger.available('BTC'), 3.0)
+        self.assertEqual(self.ledger.available('LTC'), 4.0)
+        self.assertEqual(self.bittrex.calls, 1)
+        self.now += 6
+        self.bittrex.sequence = 13
+        self.assertEqual(self.ledger.available('BTC'), 3.0)
+        self.assertEqual(self.bittrex.calls, 2)
+        self.now += 6
+        self.ledger.available('BTC')
+        self.assertEqual(self.bittrex.calls, 2)
+        self.assertEqual(self.ledger.sequence, 14)
+
+    def test_failed_refresh_raises(self):
+        self.bittrex.balances = None
+        self.assertRaises(StaleBalanceError, self.ledger.available, 'BTC')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import time
+import unittest
+
+import numpy as np
+
+from bittrex.polling import PollingPlanner, allocate
+
+
+class FakeMarkets(object):
+    """
+    Tickers whose last trade rate changes with a per-market probability per second.
+    """
+
+    def __init__(self, clock, activity, seed=2):
+        self.clock = clock
+        self.activity = activity
+        self.rng = np.random.RandomState(seed)
+        self.prices = dict((m, 1.0) for m in activity)
+        self.updated = dict((m, 0.0) for m in activity)
+        self.requests = 0
+
+    def __call__(self, market):
+        self.requests += 1
+        now = self.clock()
+        elapsed = now - self.updated[market]
+        for _ in range(int(elapsed)):
+            if self.rng.uniform() < self.activity[market]:
+                self.prices[market] *= np.exp(self.rng.normal(scale=0.002))
+        self.updated[market] += int(elapsed)
+        if market == 'BROKEN-BTC':
+            return {'success': False, 'message': 'NO_API_RESPONSE', 'result': None}
+        return {'success': True, 'message': '', 'result': {'symbol': market, 'lastTradeRate': str(self.prices[market])}}
+
+
+class TestAllocate(unittest.TestCase):
+
+    def test_clipped_rates_keep_the_budget(self):
+        rates = allocate([100.0, 1.0, 1.0, 0.001], 2.0, 0.01, 1.0)
+        self.assertAlmostEqual(rates.sum(), 2.0)
+        self.assertEqual(rates[0], 1.0)
+        self.assertEqual(rates[3], 0.01)
+        self.assertAlmostEqual(rates[1], rates[2])
+        # a floor the budget cannot pay for is lowered
+        np.testing.assert_allclose(allocate([1.0, 5.0], 0.1, 1.0, 10.0), [0.05, 0.05])
+
+
+class TestPollingPlanner(unittest.TestCase):
+
+    def test_budget_follows_activity(self):
+        now = [0.0]
+        clock = lambda: now[0]
+        markets = FakeMarkets(clock, {'FAST-BTC': 0.9, 'MID-BTC': 0.2, 'SLOW-BTC': 0.0, 'BROKEN-BTC': 0.5})
+        updates = []
+        planner = PollingPlanner(None, sorted(markets.activity), budget=1.0, fetch=markets,
+                                 on_update=lambda market, result: updates.append(market), min_interval=1.0,
+                                 max_interval=60.0, replan_interval=10.0, clock=clock)
+        while now[0] < 1200:
+            now[0] = max(now[0], planner.next_due())
+            planner.run_pending()
+            now[0] += 1e-6
+
+        metrics = planner.metrics()
+        per_market = metrics['markets']
+        self.assertLess(per_market['FAST-BTC']['interval'], per_market['MID-BTC']['interval'])
+        self.assertLess(per_market['MID-BTC']['interval'], per_market['SLOW-BTC']['interval'])
+        self.assertAlmostEqual(metrics['planned_rate'], 1.0)
+        self.assertLess(abs(markets.requests - 1200) / 1200.0, 0.1)
+        self.assertGreater(per_market['FAST-BTC']['polls'], 4 * per_market['SLOW-BTC']['polls'])
+        self.assertLessEqual(per_market['SLOW-BTC']['staleness'], 60.0)
+        self.assertEqual(per_market['SLOW-BTC']['changes'], 0)
+        self.assertIsNone(per_market['BROKEN-BTC']['staleness'])
+        self.assertEqual(per_market['BROKEN-BTC']['errors'], per_market['BROKEN-BTC']['polls'])
+        self.assertNotIn('BROKEN-BTC', updates)
+
+    def test_raising_fetch_stays_scheduled(self):
+        now = [0.0]
+        clock = lambda: now[0]
+        markets = FakeMarkets(clock, {'LTC-BTC': 1.0})
+
+        def fetch(market):
+            if market == 'DOWN-BTC':
+                raise IOError('connection reset')
+            return markets(market)
+
+        planner = PollingPlanner(None, ['DOWN-BTC', 'LTC-BTC'], budget=1.0, fetch=fetch, min_interval=1.0,
+                                 max_interval=10.0, clock=clock)
+        while now[0] < 30:
+            now[0] = max(now[0], planner.next_due())
+            planner.run_pending()
+            now[0] += 1e-6
+        down = planner.metrics()['markets']['DOWN-BTC']
+        self.assertGreater(down['polls'], 3)
+        self.assertEqual(down['errors'], down['polls'])
+        self.assertGreater(planner.metrics()['markets']['LTC-BTC']['polls'], 3)
+
+    def test_background_thread_polls_every_market(self):
+        markets = FakeMarkets(lambda: 0.0, {'LTC-BTC': 1.0, 'ETH-BTC': 1.0})
+        planner = PollingPlanner(None, ['LTC-BTC', 'ETH-BTC'], budget=100.0, fetch=markets, min_interval=0.01)
+        planner.start()
+        try:
+            deadline = 50
+            while deadline and min(m['polls'] for m in planner.metrics()['markets'].values()) < 3:
+                deadline -= 1
+                time.sleep(0.02)
+        finally:
+            planner.stop()
+        self.assertGreaterEqual(min(m['polls'] for m in planner.metrics()['markets'].values()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
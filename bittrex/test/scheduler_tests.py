@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+
+from bittrex.bittrex import Bittrex
+from bittrex.scheduler import (RequestScheduler, RequestExpired, PRIORITY_CANCEL, PRIORITY_ORDER,
+                               PRIORITY_MARKET_DATA)
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def test_priority_order(self):
+        # the clock stands still until every waiter is queued, so no slot can
+        # open while the threads below are still starting
+        released = threading.Event()
+        now = [0.0]
+
+        def clock():
+            if released.is_set():
+                now[0] += 1
+            return now[0]
+
+        scheduler = RequestScheduler(calls_per_second=4, clock=clock)
+        granted = []
+        scheduler.acquire(PRIORITY_MARKET_DATA)
+        scheduler.release(PRIORITY_MARKET_DATA)
+
+        def worker(priority):
+            with scheduler.slot(priority):
+                granted.append(priority)
+
+        threads = [threading.Thread(target=worker, args=(p,))
+                   for p in (PRIORITY_MARKET_DATA, PRIORITY_MARKET_DATA, PRIORITY_ORDER, PRIORITY_CANCEL)]
+        for i, t in enumerate(threads):
+            t.start()
+            while sum(scheduler.queue_depth().values()) < i + 1:
+                time.sleep(0.001)
+        released.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(granted, [PRIORITY_CANCEL, PRIORITY_ORDER, PRIORITY_MARKET_DATA, PRIORITY_MARKET_DATA])
+
+    def test_deadline_drops_stale_request(self):
+        scheduler = RequestScheduler(calls_per_second=2, deadlines={PRIORITY_MARKET_DATA: 0.05})
+        scheduler.acquire(PRIORITY_CANCEL)
+        self.assertRaises(RequestExpired, scheduler.acquire, PRIORITY_MARKET_DATA)
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics['market_data']['expired'], 1)
+        self.assertEqual(metrics['market_data']['queued'], 0)
+        self.assertEqual(metrics['cancel']['active'], 1)
+
+    def test_concurrency_cap_lets_other_classes_through(self):
+        scheduler = RequestScheduler(calls_per_second=1000, concurrency={PRIORITY_CANCEL: 1})
+        scheduler.acquire(PRIORITY_CANCEL)
+        start = time.time()
+        with scheduler.slot(PRIORITY_MARKET_DATA):
+            pass
+        self.assertLess(time.time() - start, 0.5)
+        self.assertRaises(RequestExpired, scheduler.acquire, PRIORITY_CANCEL, time.time() + 0.05)
+
+    def test_try_acquire_never_waits(self):
+        now = [0.0]
+        scheduler = RequestScheduler(calls_per_second=2, clock=lambda: now[0])
+        self.assertTrue(scheduler.try_acquire(PRIORITY_MARKET_DATA))
+        self.assertFalse(scheduler.try_acquire(PRIORITY_MARKET_DATA))
+        now[0] = 0.5
+        self.assertTrue(scheduler.try_acquire(PRIORITY_MARKET_DATA))
+        self.assertEqual(scheduler.metrics()['market_data']['active'], 2)
+
+    def test_client_reports_expired_request(self):
+        scheduler = RequestScheduler(calls_per_second=1, deadlines={PRIORITY_MARKET_DATA: 0.01})
+        scheduler.acquire(PRIORITY_CANCEL)
+        bittrex = Bittrex(None, None, scheduler=scheduler)
+        actual = bittrex.get_markets()
+        self.assertFalse(actual['success'])
+        self.assertEqual(actual['message'], 'REQUEST_EXPIRED')
+
+
+if __name__ == '__main__':
+    unittest.main()
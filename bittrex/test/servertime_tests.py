@@ -0,0 +1,98 @@
+import time
+import unittest
+
+from bittrex.bittrex import Bittrex
+from bittrex.servertime import ServerClock
+
+
+class FakeExchange(object):
+    """
+    Ping replies from a clock ``skew`` seconds ahead, taking the given round trips.
+    """
+
+    def __init__(self, skew, rtts):
+        self.now = 1000.0
+        self.skew = skew
+        self.rtts = list(rtts)
+        self.stamps = []
+
+    def clock(self):
+        return self.now
+
+    def __call__(self, method, request_url, headers, body):
+        if request_url.endswith('/ping'):
+            rtt = self.rtts.pop(0) if self.rtts else 0.1
+            if rtt is None:
+                return 503, {}, None
+            # the server reads its clock a quarter into the trip, not at the midpoint
+            server = self.now + rtt / 4.0 + self.skew
+            self.now += rtt
+            return 200, {}, {'serverTime': int(round(server * 1000))}
+        self.stamps.append(int(headers['Api-Timestamp']) / 1000.0)
+        return 200, {}, []
+
+
+class SlowPing(object):
+    """
+    Real-time ping taking ``delay`` seconds, from a server ``skew`` seconds ahead.
+    """
+
+    def __init__(self, skew, delay):
+        self.skew = skew
+        self.delay = delay
+
+    def __call__(self, method, request_url, headers, body):
+        time.sleep(self.delay / 2.0)
+        server = time.time() + self.skew
+        time.sleep(self.delay / 2.0)
+        return 200, {}, {'serverTime': int(round(server * 1000))}
+
+
+class TestServerClock(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = FakeExchange(skew=2.5, rtts=[0.4, 0.02, None, 0.2])
+        self.bittrex = Bittrex('key', 'secret', calls_per_second=1e9, transport=self.exchange)
+        self.server_clock = ServerClock(self.bittrex, samples=4, clock=self.exchange.clock)
+
+    def test_lowest_rtt_sample_wins(self):
+        self.assertTrue(self.server_clock.synchronize())
+        metrics = self.server_clock.metrics()
+        self.assertAlmostEqual(metrics['rtt'], 0.02)
+        # error is bounded by half the round trip of the kept sample
+        self.assertAlmostEqual(metrics['offset'], 2.5 - 0.005, places=3)
+        self.assertEqual(metrics['syncs'], 1)
+        self.assertEqual(metrics['age'], 0)
+
+    def test_install_stamps_signed_requests(self):
+        self.server_clock.install().synchronize()
+        self.bittrex.get_balances()
+        self.assertAlmostEqual(self.exchange.stamps[-1], self.exchange.now + self.server_clock.offset, places=2)
+
+    def test_failed_sync_keeps_offset(self):
+        self.exchange.rtts = [None] * 4
+        self.assertFalse(self.server_clock.synchronize())
+        self.assertEqual(self.server_clock.offset, 0.0)
+        self.assertEqual(self.server_clock.metrics()['errors'], 1)
+
+    def test_background_refresh(self):
+        server_clock = ServerClock(self.bittrex, samples=1, refresh_interval=0.01, clock=self.exchange.clock)
+        server_clock.start()
+        deadline = time.time() + 5
+        while server_clock.metrics()['syncs'] < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        server_clock.stop()
+        self.assertGreaterEqual(server_clock.metrics()['syncs'], 3)
+
+    def test_rate_gate_wait_is_not_round_trip(self):
+        bittrex = Bittrex('key', 'secret', calls_per_second=2, transport=SlowPing(skew=2.5, delay=0.02))
+        server_clock = ServerClock(bittrex, samples=1)
+        bittrex.ping()
+        # the gate holds this sample back about half a second
+        offset, rtt = server_clock.sample()
+        self.assertLess(rtt, 0.1)
+        self.assertAlmostEqual(offset, 2.5, delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import multiprocessing
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+
+from bittrex.sharedsnapshot import SnapshotPublisher, SnapshotReader, SnapshotTimeout
+from bittrex.tickers import TickerSnapshot, LAST
+
+
+def ticker(symbol, last):
+    return {'symbol': symbol, 'bidRate': str(last - 1), 'askRate': str(last + 1), 'lastTradeRate': str(last)}
+
+
+def read_last(name, symbol, queue):
+    reader = SnapshotReader(name)
+    queue.put(reader.get(symbol)['last'])
+    reader.close()
+
+
+class TestSharedSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = TickerSnapshot(summaries=False)
+        self.publisher = SnapshotPublisher(snapshot=self.snapshot, capacity=4, clock=lambda: 123.0)
+        self.reader = SnapshotReader(self.publisher.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.publisher.close()
+
+    def test_reader_sees_published_rows(self):
+        self.assertEqual(self.reader.read()[1], [])
+        diff = self.snapshot.load([ticker('LTC-BTC', 10), ticker('ETH-BTC', 20)])
+        self.publisher.publish(diff.rows)
+        version, symbols, values = self.reader.read()
+        self.assertEqual(version, self.publisher.version)
+        self.assertEqual(version % 2, 0)
+        self.assertEqual(symbols, ['LTC-BTC', 'ETH-BTC'])
+        self.assertEqual(values[1, LAST], 20.0)
+        self.assertEqual(self.reader.published_at(), 123.0)
+
+        diff = self.snapshot.load([ticker('LTC-BTC', 11), ticker('ETH-BTC', 20), ticker('XRP-BTC', 3)])
+        self.publisher.publish(diff.rows)
+        self.assertEqual(self.reader.get('LTC-BTC')['last'], 11.0)
+        self.assertEqual(self.reader.get('XRP-BTC')['ask'], 4.0)
+        np.testing.assert_array_equal(self.reader.values, self.snapshot.values)
+
+    def test_other_process_reads_snapshot(self):
+        self.publisher.publish(self.snapshot.load([ticker('LTC-BTC', 10)]).rows)
+        queue = multiprocessing.Queue()
+        child = multiprocessing.Process(target=read_last, args=(self.publisher.name, 'LTC-BTC', queue))
+        child.start()
+        self.assertEqual(queue.get(timeout=10), 10.0)
+        child.join()
+
+    def test_unrelated_reader_does_not_remove_segment(self):
+        self.publisher.publish(self.snapshot.load([ticker('LTC-BTC', 10)]).rows)
+        script = ('from bittrex.sharedsnapshot import SnapshotReader; '
+                  'r = SnapshotReader({0!r}); print(r.get("LTC-BTC")["last"]); r.close()').format(self.publisher.name)
+        self.assertEqual(subprocess.check_output([sys.executable, '-c', script]).strip(), b'10.0')
+        self.assertEqual(self.reader.get('LTC-BTC')['bid'], 9.0)
+
+    def test_torn_write_is_never_returned(self):
+        self.publisher.publish(self.snapshot.load([ticker('LTC-BTC', 10)]).rows)
+        self.publisher._shared.header[0] += 1  # writer stuck mid-update
+        self.assertRaises(SnapshotTimeout, self.reader.read, None, 0.01)
+
+    def test_capacity(self):
+        self.snapshot.load([ticker(str(i), i + 1) for i in range(5)])
+        self.assertRaises(ValueError, self.publisher.publish)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+from bittrex.bittrex import (Bittrex, TRADE_FEE, ORDERTYPE_LIMIT, ORDERTYPE_MARKET, TIMEINEFFECT_FILL_OR_KILL,
+                             TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED,
+                             TIMEINEFFECT_IMMEDIATE_OR_CANCEL, CONDITIONTYPE_STOP_LOSS_FIXED,
+                             CONDITIONTYPE_STOP_LOSS_PERCENTAGE, DIRECTION_BUY, DIRECTION_SELL)
+from bittrex.ledger import BalanceLedger
+from bittrex.simulator import PaperExchange
+
+
+class TestPaperExchange(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = PaperExchange(balances={'BTC': 1.0, 'LTC': 50.0})
+        self.exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 10, 0.011)
+        self.exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 10, 0.010)
+        self.exchange.add_liquidity('LTC-BTC', DIRECTION_BUY, 10, 0.009)
+        self.bittrex = Bittrex(None, None, calls_per_second=1e9, transport=self.exchange)
+
+    def balance(self, currency):
+        return float(self.bittrex.get_balance(currency)['result']['available'])
+
+    def test_limit_buy_walks_book_in_price_order(self):
+        actual = self.bittrex.trade_buy('LTC-BTC', ORDERTYPE_LIMIT, 15, 0.011)
+        self.assertTrue(actual['success'])
+        order = actual['result']
+        self.assertEqual(order['status'], 'CLOSED')
+        self.assertAlmostEqual(float(order['proceeds']), 10 * 0.010 + 5 * 0.011)
+        self.assertAlmostEqual(self.balance('LTC'), 65.0)
+        self.assertAlmostEqual(self.balance('BTC'), 1.0 - float(order['proceeds']) * (1 + TRADE_FEE))
+
+    def test_resting_order_cancel_releases_funds(self):
+        order = self.bittrex.buy_limit('LTC-BTC', 10, 0.0095)['result']
+        self.assertEqual(order['status'], 'OPEN')
+        self.assertAlmostEqual(self.balance('BTC'), 1.0 - 10 * 0.0095 * (1 + TRADE_FEE))
+        self.assertEqual([o['id'] for o in self.bittrex.get_open_orders('LTC-BTC')['result']], [order['id']])
+        self.assertEqual(self.bittrex.cancel(order['id'])['result']['status'], 'CLOSED')
+        self.assertAlmostEqual(self.balance('BTC'), 1.0)
+        self.assertEqual(self.bittrex.get_order(order['id'])['result']['fillQuantity'], '0')
+        self.assertEqual(self.bittrex.cancel(order['id'])['message'], 'ORDER_NOT_OPEN')
+
+    def test_time_in_force(self):
+        killed = self.bittrex.trade_buy('LTC-BTC', ORDERTYPE_LIMIT, 25, 0.011, TIMEINEFFECT_FILL_OR_KILL)['result']
+        self.assertEqual(killed['fillQuantity'], '0')
+        partial = self.bittrex.trade_buy('LTC-BTC', ORDERTYPE_LIMIT, 25, 0.010,
+                                         TIMEINEFFECT_IMMEDIATE_OR_CANCEL)['result']
+        self.assertEqual(partial['fillQuantity'], '10')
+        self.assertEqual(partial['status'], 'CLOSED')
+        sold = self.bittrex.trade_sell('LTC-BTC', ORDERTYPE_MARKET, 4)['result']
+        self.assertEqual(sold['fillQuantity'], '4')
+
+    def test_market_sell_leaves_resting_holds(self):
+        self.bittrex.trade_sell('LTC-BTC', ORDERTYPE_LIMIT, 48, 0.02)
+        self.assertTrue(self.bittrex.trade_sell('LTC-BTC', ORDERTYPE_MARKET, 2)['success'])
+        self.assertAlmostEqual(self.balance('LTC'), 0.0)
+        self.assertEqual(self.bittrex.trade_sell('LTC-BTC', ORDERTYPE_MARKET, 2)['message'], 'INSUFFICIENT_FUNDS')
+
+    def test_fill_or_kill_market_buy_respects_balance(self):
+        exchange = PaperExchange(balances={'BTC': 0.05})
+        exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 10, 0.01)
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=exchange)
+        killed = bittrex.trade_buy('LTC-BTC', ORDERTYPE_MARKET, 6, None, TIMEINEFFECT_FILL_OR_KILL)['result']
+        self.assertEqual(killed['fillQuantity'], '0')
+        filled = bittrex.trade_buy('LTC-BTC', ORDERTYPE_MARKET, 4, None, TIMEINEFFECT_FILL_OR_KILL)['result']
+        self.assertEqual(filled['fillQuantity'], '4')
+
+    def test_post_only_rejects_crossing_order(self):
+        actual = self.bittrex.trade_buy('LTC-BTC', ORDERTYPE_LIMIT, 1, 0.010,
+                                        TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED)
+        self.assertEqual(actual['message'], 'POST_ONLY_CROSS_MARKET')
+        resting = self.bittrex.trade_buy('LTC-BTC', ORDERTYPE_LIMIT, 1, 0.0095,
+                                         TIMEINEFFECT_POST_ONLY_GOOD_TIL_CANCELLED)['result']
+        self.assertEqual(resting['status'], 'OPEN')
+
+    def test_rejects_insufficient_funds(self):
+        actual = self.bittrex.trade_sell('LTC-BTC', ORDERTYPE_LIMIT, 100, 0.02)
+        self.assertFalse(actual['success'])
+        self.assertEqual(actual['message'], 'INSUFFICIENT_FUNDS')
+
+    def test_stop_loss_triggers_on_trade(self):
+        stop = self.bittrex.trade_sell('LTC-BTC', ORDERTYPE_MARKET, 5, None, TIMEINEFFECT_IMMEDIATE_OR_CANCEL,
+                                       CONDITIONTYPE_STOP_LOSS_FIXED, 0.0095)['result']
+        self.exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 1, 0.009)
+        self.assertAlmostEqual(self.balance('LTC'), 45.0)
+        self.assertEqual(self.exchange._conditionals[stop['id']]['status'], 'TRIGGERED')
+
+    def test_trailing_stop_percent_is_a_decimal_string(self):
+        stop = self.bittrex.trade_sell('LTC-BTC', ORDERTYPE_MARKET, 5, None, TIMEINEFFECT_IMMEDIATE_OR_CANCEL,
+                                       CONDITIONTYPE_STOP_LOSS_PERCENTAGE, 2.5)['result']
+        self.assertEqual(self.exchange._conditionals[stop['id']]['trailingStopPercent'], '2.5')
+
+    def test_ledger_reads_sequenced_balances(self):
+        ledger = BalanceLedger(self.bittrex)
+        self.assertEqual(ledger.available('LTC'), 50.0)
+        self.assertIsNotNone(ledger.sequence)
+
+    def test_many_round_trips(self):
+        for i in range(500):
+            order = self.bittrex.buy_limit('LTC-BTC', 0.01, 0.005)['result']
+            self.assertEqual(self.bittrex.cancel(order['id'])['result']['status'], 'CLOSED')
+        self.assertEqual(self.bittrex.get_open_orders('LTC-BTC')['result'], [])
+        self.assertAlmostEqual(self.balance('BTC'), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import gzip
+import json
+import threading
+import tracemalloc
+import unittest
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from bittrex.bittrex import Bittrex, DIRECTION_SELL, requests_stream_transport
+from bittrex.simulator import PaperExchange
+from bittrex.streaming import StreamError, iter_array
+
+RECORDS = [{'symbol': u'LTC-BTC', 'volume': 12.5, 'note': u'été'}, [1, 2], 123, u'x', None, True]
+
+
+class GzipHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = json.dumps(RECORDS).encode('utf-8')
+        self.send_response(200)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestIterArray(unittest.TestCase):
+
+    def test_any_chunking_gives_the_same_records(self):
+        body = json.dumps(RECORDS).encode('utf-8')
+        for size in (1, 2, 3, 7, len(body)):
+            chunks = [body[i:i + size] for i in range(0, len(body), size)]
+            self.assertEqual(list(iter_array(chunks)), RECORDS)
+        self.assertEqual(list(iter_array([' [ ', '12', '3 , 4', '5]  '])), [123, 45])
+        self.assertEqual(list(iter_array(['[]'])), [])
+
+    def test_malformed_bodies(self):
+        self.assertRaises(StreamError, list, iter_array([b'{"code": "X"}']))
+        self.assertRaises(StreamError, list, iter_array([b'[1, 2']))
+        self.assertRaises(StreamError, list, iter_array([]))
+
+    def test_memory_stays_bounded(self):
+        def chunks(count):
+            yield b'['
+            for i in range(count):
+                yield json.dumps({'id': i, 'symbol': 'LTC-BTC', 'rate': '0.00512000'}).encode() + b','
+            yield b'{}]'
+
+        tracemalloc.start()
+        try:
+            seen = sum(1 for _ in iter_array(chunks(20000)))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(seen, 20001)
+        # the body is over 1 MB
+        self.assertLess(peak, 256 * 1024)
+
+
+class TestClientStream(unittest.TestCase):
+
+    def test_stream_through_buffered_transport(self):
+        exchange = PaperExchange()
+        exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 1, 0.011)
+        exchange.add_liquidity('ETH-BTC', DIRECTION_SELL, 1, 0.05)
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=exchange)
+        self.assertEqual([t['symbol'] for t in bittrex.stream('/markets/tickers', chunk_size=16)],
+                         ['ETH-BTC', 'LTC-BTC'])
+        with self.assertRaises(StreamError) as raised:
+            list(bittrex.stream('/nowhere'))
+        self.assertEqual((raised.exception.message, raised.exception.status), ('NOT_FOUND', 404))
+
+    def test_gzip_is_negotiated_and_decoded(self):
+        server = HTTPServer(('127.0.0.1', 0), GzipHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            bittrex = Bittrex(None, None, calls_per_second=1e9, stream_transport=requests_stream_transport)
+            bittrex.base_url = 'http://127.0.0.1:{0}/v3{{path}}'.format(server.server_address[1])
+            self.assertEqual(list(bittrex.stream('/markets/summaries', chunk_size=8)), RECORDS)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from bittrex.bittrex import Bittrex, DIRECTION_BUY, DIRECTION_SELL, ORDERTYPE_LIMIT
+from bittrex.simulator import PaperExchange
+from bittrex.tape import TradeTape, BUY, SELL
+
+
+class TestTradeTape(unittest.TestCase):
+
+    def test_rolling_stats_match_recomputation(self):
+        rng = np.random.RandomState(5)
+        tape = TradeTape(['LTC-BTC'], capacity=50, window=30.0)
+        times = np.cumsum(rng.uniform(0, 2, 400))
+        quantity = rng.uniform(0.1, 5, 400)
+        rate = rng.uniform(0.004, 0.005, 400)
+        side = np.where(rng.uniform(size=400) < 0.6, BUY, SELL)
+        for i in range(400):
+            self.assertTrue(tape.add_trade('LTC-BTC', str(i), times[i], quantity[i], rate[i], side[i]))
+            if i % 37 == 0:
+                # the window covers the last 30 seconds and at most the last 50 trades
+                first = max(i - 49, 0)
+                live = np.arange(first, i + 1)[times[first:i + 1] >= times[i] - 30.0]
+                stats = tape.stats('LTC-BTC', now=times[i])
+                self.assertEqual(stats['trades'], len(live))
+                self.assertAlmostEqual(stats['volume'], quantity[live].sum())
+                self.assertAlmostEqual(stats['notional'], (quantity[live] * rate[live]).sum())
+                buy = quantity[live][side[live] == BUY].sum()
+                self.assertAlmostEqual(stats['buy_volume'], buy)
+                self.assertAlmostEqual(stats['imbalance'], (2 * buy - quantity[live].sum()) / quantity[live].sum())
+        self.assertEqual(len(tape.trades('LTC-BTC')['time']), 50)
+        np.testing.assert_array_equal(tape.trades('LTC-BTC')['time'], times[-50:])
+
+        quiet = tape.stats('LTC-BTC', now=times[-1] + 31)
+        self.assertEqual((quiet['trades'], quiet['volume']), (0, 0.0))
+        self.assertTrue(np.isnan(quiet['vwap']))
+
+    def test_duplicates_and_late_trades_are_dropped(self):
+        tape = TradeTape(window=60)
+        self.assertTrue(tape.add_trade('ETH-BTC', 'a', 100.0, 1.0, 0.03, BUY))
+        self.assertFalse(tape.add_trade('ETH-BTC', 'a', 101.0, 1.0, 0.03, BUY))
+        self.assertFalse(tape.add_trade('ETH-BTC', 'b', 99.0, 1.0, 0.03, SELL))
+        self.assertTrue(tape.add_trade('ETH-BTC', 'c', 100.0, 2.0, 0.03, SELL))
+        self.assertEqual(tape.stats('ETH-BTC', now=100.0)['trades'], 2)
+
+    def test_poll_deduplicates_trades_endpoint(self):
+        now = [1594598400.0]
+        exchange = PaperExchange(balances={'BTC': 10.0, 'LTC': 100.0}, clock=lambda: now[0])
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=exchange)
+        exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 10, 0.0051)
+        exchange.add_liquidity('LTC-BTC', DIRECTION_BUY, 10, 0.0049)
+        tape = TradeTape(['LTC-BTC'], window=60, clock=lambda: now[0])
+
+        bittrex.trade_buy('LTC-BTC', ORDERTYPE_LIMIT, 2, 0.0051)
+        self.assertEqual(tape.poll(bittrex), {'LTC-BTC': 1})
+        now[0] += 1
+        bittrex.trade_sell('LTC-BTC', ORDERTYPE_LIMIT, 3, 0.0049)
+        self.assertEqual(tape.poll(bittrex), {'LTC-BTC': 1})
+        self.assertEqual(tape.poll(bittrex), {'LTC-BTC': 0})
+
+        stats = tape.stats('LTC-BTC')
+        self.assertEqual((stats['trades'], stats['buy_volume'], stats['sell_volume']), (2, 2.0, 3.0))
+        self.assertAlmostEqual(stats['vwap'], (2 * 0.0051 + 3 * 0.0049) / 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from bittrex.bittrex import Bittrex, DIRECTION_BUY, DIRECTION_SELL
+from bittrex.simulator import PaperExchange
+from bittrex.tickers import TickerSnapshot, TickerError, BID, ASK, LAST, VOLUME
+
+
+def ticker(symbol, bid, ask, last):
+    return {'symbol': symbol, 'bidRate': str(bid), 'askRate': str(ask), 'lastTradeRate': str(last)}
+
+
+class TestTickerSnapshot(unittest.TestCase):
+
+    def test_only_changed_rows_are_reported(self):
+        snapshot = TickerSnapshot()
+        first = snapshot.load([ticker('LTC-BTC', 1, 2, 1.5), ticker('ETH-BTC', 10, 11, 10.5)],
+                              [{'symbol': 'LTC-BTC', 'volume': '100', 'percentChange': '1.5'}])
+        self.assertEqual(sorted(first.symbols), ['ETH-BTC', 'LTC-BTC'])
+        self.assertEqual(first.added, ['LTC-BTC', 'ETH-BTC'])
+        self.assertEqual(snapshot.values[snapshot.row('LTC-BTC'), VOLUME], 100.0)
+        self.assertTrue(np.isnan(snapshot.values[snapshot.row('ETH-BTC'), VOLUME]))
+
+        diff = snapshot.load([ticker('LTC-BTC', 1, 2, 1.5), ticker('ETH-BTC', 10, 10.8, 10.5)],
+                             [{'symbol': 'LTC-BTC', 'volume': '100', 'percentChange': '1.5'}])
+        self.assertEqual(diff.symbols, ['ETH-BTC'])
+        self.assertEqual(diff.values[0, ASK], 10.8)
+        self.assertEqual(diff.as_dict()['ETH-BTC']['bid'], 10.0)
+
+        self.assertEqual(len(snapshot.load([ticker('LTC-BTC', 1, 2, 1.5), ticker('ETH-BTC', 10, 10.8, 10.5)],
+                                           [{'symbol': 'LTC-BTC', 'volume': '100', 'percentChange': '1.5'}])), 0)
+
+    def test_rows_are_stable_across_listings(self):
+        snapshot = TickerSnapshot(summaries=False)
+        snapshot.load([ticker('LTC-BTC', 1, 2, 1.5), ticker('ETH-BTC', 10, 11, 10.5)])
+        row = snapshot.row('ETH-BTC')
+        diff = snapshot.load([ticker('ETH-BTC', 10, 11, 10.5), ticker('XRP-BTC', 3, 4, 3.5)])
+        self.assertEqual(snapshot.row('ETH-BTC'), row)
+        self.assertEqual(diff.added, ['XRP-BTC'])
+        self.assertEqual(diff.removed, ['LTC-BTC'])
+        self.assertEqual(sorted(diff.symbols), ['LTC-BTC', 'XRP-BTC'])
+        self.assertTrue(np.isnan(snapshot.values[snapshot.row('LTC-BTC')]).all())
+
+    def test_poll_uses_one_request(self):
+        exchange = PaperExchange()
+        exchange.add_liquidity('LTC-BTC', DIRECTION_BUY, 1, 0.009)
+        exchange.add_liquidity('LTC-BTC', DIRECTION_SELL, 1, 0.011)
+        exchange.add_liquidity('ETH-BTC', DIRECTION_SELL, 1, 0.05)
+        snapshot = TickerSnapshot(Bittrex(None, None, calls_per_second=1e9, transport=exchange), summaries=False)
+        diff = snapshot.poll()
+        self.assertEqual(exchange.requests, 1)
+        self.assertEqual(len(diff), 2)
+        self.assertEqual(snapshot.column('bid')[snapshot.row('LTC-BTC')], 0.009)
+        exchange.add_liquidity('LTC-BTC', DIRECTION_BUY, 1, 0.0095)
+        self.assertEqual(snapshot.poll().symbols, ['LTC-BTC'])
+        self.assertEqual(snapshot.values[snapshot.row('ETH-BTC'), LAST], 0.0)
+        self.assertEqual(snapshot.values[snapshot.row('LTC-BTC'), BID], 0.0095)
+
+        snapshot.summaries = True
+        self.assertRaises(TickerError, snapshot.poll)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+import numpy as np
+
+from bittrex.bittrex import (Bittrex, CONDITIONTYPE_GREATER_THAN, CONDITIONTYPE_LESS_THAN,
+                             CONDITIONTYPE_STOP_LOSS_FIXED, CONDITIONTYPE_STOP_LOSS_PERCENTAGE, DIRECTION_BUY,
+                             DIRECTION_SELL, ORDERTYPE_LIMIT, ORDERTYPE_MARKET, order_payload)
+from bittrex.simulator import PaperExchange
+from bittrex.triggers import TriggerEngine
+
+
+class Reference(object):
+    """
+    Evaluates every trigger on every tick.
+    """
+
+    def __init__(self):
+        self.triggers = {}
+
+    def add(self, trigger_id, condition_type, target, direction, price):
+        self.triggers[trigger_id] = [condition_type, target, direction, price]
+
+    def tick(self, price):
+        fired = set()
+        for trigger_id, (condition_type, target, direction, extreme) in list(self.triggers.items()):
+            sell = direction == DIRECTION_SELL
+            if condition_type == CONDITIONTYPE_STOP_LOSS_PERCENTAGE:
+                extreme = max(extreme, price) if sell else min(extreme, price)
+                self.triggers[trigger_id][3] = extreme
+                level = extreme * (1 - target / 100.0) if sell else extreme * (1 + target / 100.0)
+            else:
+                level = target
+            if condition_type == CONDITIONTYPE_GREATER_THAN:
+                hit = price >= level
+            elif condition_type == CONDITIONTYPE_LESS_THAN:
+                hit = price <= level
+            else:
+                hit = price <= level if sell else price >= level
+            if hit:
+                fired.add(trigger_id)
+                del self.triggers[trigger_id]
+        return fired
+
+
+class TestTriggerEngine(unittest.TestCase):
+
+    def test_matches_exhaustive_evaluation(self):
+        rng = np.random.RandomState(11)
+        engine = TriggerEngine()
+        reference = Reference()
+        price = 100.0
+        conditions = [CONDITIONTYPE_GREATER_THAN, CONDITIONTYPE_LESS_THAN, CONDITIONTYPE_STOP_LOSS_FIXED,
+                      CONDITIONTYPE_STOP_LOSS_PERCENTAGE]
+        removed = 0
+        for step in range(3000):
+            price = round(price * np.exp(rng.normal(scale=0.01)), 2)
+            for _ in range(rng.randint(0, 4)):
+                condition_type = conditions[rng.randint(4)]
+                direction = DIRECTION_SELL if rng.uniform() < 0.5 else DIRECTION_BUY
+                if condition_type == CONDITIONTYPE_STOP_LOSS_PERCENTAGE:
+                    target = float(rng.choice([1.0, 2.0, 3.5]))
+                else:
+                    target = round(price * rng.uniform(0.9, 1.1), 2)
+                trigger_id = engine.add('LTC-BTC', condition_type, target, direction=direction, price=price)
+                reference.add(trigger_id, condition_type, target, direction, price)
+            if step % 50 == 0 and engine.triggers:
+                victim = sorted(engine.triggers)[0]
+                self.assertTrue(engine.remove(victim))
+                del reference.triggers[victim]
+                removed += 1
+            fired = engine.tick('LTC-BTC', price)
+            self.assertEqual(set(t.id for t in fired), reference.tick(price))
+            self.assertTrue(all(t.fired_at == price for t in fired))
+        self.assertEqual(set(engine.triggers), set(reference.triggers))
+        self.assertGreater(removed, 10)
+
+    def test_trailing_stop_needs_anchor(self):
+        engine = TriggerEngine()
+        self.assertRaises(ValueError, engine.add, 'LTC-BTC', CONDITIONTYPE_STOP_LOSS_PERCENTAGE, 5.0)
+        engine.tick('LTC-BTC', 10.0)
+        engine.add('LTC-BTC', CONDITIONTYPE_STOP_LOSS_PERCENTAGE, 5.0)
+        self.assertEqual(engine.tick('LTC-BTC', 12.0), [])
+        self.assertEqual(len(engine.tick('LTC-BTC', 11.4)), 1)
+        self.assertRaises(ValueError, engine.add, 'LTC-BTC', 'SOMETIMES', 1.0)
+
+    def test_dispatch_places_and_cancels_in_batches(self):
+        exchange = PaperExchange(balances={'BTC': 1.0, 'LTC': 100.0})
+        bittrex = Bittrex(None, None, calls_per_second=1e9, transport=exchange)
+        exchange.add_liquidity('LTC-BTC', DIRECTION_BUY, 100, 0.0049)
+        resting = bittrex.trade_sell('LTC-BTC', ORDERTYPE_LIMIT, 5, 0.006)['result']['id']
+
+        engine = TriggerEngine(bittrex, max_batch=2)
+        for _ in range(3):
+            engine.add('LTC-BTC', CONDITIONTYPE_LESS_THAN, 0.005,
+                       order=order_payload(DIRECTION_SELL, 'LTC-BTC', ORDERTYPE_MARKET, 1))
+        engine.add('LTC-BTC', CONDITIONTYPE_STOP_LOSS_FIXED, 0.005, cancel=resting, direction=DIRECTION_SELL)
+        engine.add('LTC-BTC', CONDITIONTYPE_GREATER_THAN, 0.0055, cancel=resting)
+
+        fired = engine.update({'LTC-BTC': 0.0049})
+        self.assertEqual(len(fired), 4)
+        outcomes = engine.dispatch(fired)
+        self.assertEqual([o[1]['operation'] for o in outcomes].count('POST'), 3)
+        self.assertTrue(all(result['status'] in (200, 201) for _, _, result in outcomes))
+        self.assertEqual(bittrex.get_order(resting)['result']['status'], 'CLOSED')
+        self.assertEqual(len(engine.triggers), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from bittrex.arbitrage import CurrencyGraph
+from bittrex.tickers import TickerSnapshot
+from bittrex.valuation import PortfolioValuer
+
+
+def market(base, quote):
+    return {'symbol': base + '-' + quote, 'baseCurrencySymbol': base, 'quoteCurrencySymbol': quote}
+
+
+def ticker(symbol, bid, ask):
+    return {'symbol': symbol, 'bidRate': str(bid), 'askRate': str(ask), 'lastTradeRate': str(bid)}
+
+
+class TestPortfolioValuer(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = CurrencyGraph.from_markets([market('BTC', 'USD'), market('ETH', 'BTC'), market('ETH', 'USD'),
+                                                 market('DOGE', 'BTC'), market('USDT', 'USD'), market('XYZ', 'ABC')])
+        self.snapshot = TickerSnapshot(summaries=False)
+        self.valuer = PortfolioValuer(self.graph, self.snapshot, target='USD')
+        self.snapshot.load([ticker('BTC-USD', 10000, 10010), ticker('ETH-BTC', 0.03, 0.0301),
+                            ticker('ETH-USD', 290, 291), ticker('DOGE-BTC', 3e-7, 3.1e-7),
+                            ticker('USDT-USD', 0.999, 1.001)])
+
+    def test_best_route_per_currency(self):
+        rates = self.valuer.revalue()
+        self.assertEqual(self.valuer.rate('USD'), 1.0)
+        # ETH is worth more sold for BTC than directly for USD
+        self.assertAlmostEqual(self.valuer.rate('ETH'), 0.03 * 10000)
+        self.assertEqual(self.valuer.route('ETH'), ['ETH-BTC', 'BTC-USD'])
+        self.assertAlmostEqual(self.valuer.rate('DOGE'), 3e-7 * 10000)
+        self.assertTrue(np.isnan(rates[self.valuer.currencies.index('XYZ')]))
+        self.assertIsNone(self.valuer.route('XYZ'))
+
+    def test_value_from_balance_rows(self):
+        self.valuer.revalue()
+        balances = [{'currencySymbol': 'BTC', 'total': '0.5', 'available': '0.5'},
+                    {'currencySymbol': 'ETH', 'total': '2', 'available': '1'},
+                    {'currencySymbol': 'XYZ', 'total': '7', 'available': '7'},
+                    {'currencySymbol': 'NEW', 'total': '1', 'available': '1'},
+                    {'currencySymbol': 'USDT', 'total': '0', 'available': '0'}]
+        valuation = self.valuer.value(balances)
+        self.assertAlmostEqual(valuation['total'], 0.5 * 10000 + 2 * 300)
+        self.assertEqual(valuation['unpriced'], ['NEW', 'XYZ'])
+        self.assertEqual(sorted(valuation['assets']), ['BTC', 'ETH', 'XYZ'])
+        self.assertAlmostEqual(valuation['assets']['ETH']['value'], 600)
+
+    def test_update_reprices_routes_through_changed_markets(self):
+        self.valuer.revalue()
+        diff = self.snapshot.load([ticker('BTC-USD', 10000, 10010), ticker('ETH-BTC', 0.03, 0.0301),
+                                   ticker('ETH-USD', 310, 311), ticker('DOGE-BTC', 3e-7, 3.1e-7),
+                                   ticker('USDT-USD', 0.999, 1.001)])
+        routes = self.valuer.update(diff)
+        self.assertEqual(sorted(set(self.valuer.route_currency[routes])),
+                         sorted(self.valuer.currencies.index(c) for c in ('BTC', 'ETH')))
+        self.assertAlmostEqual(self.valuer.rate('ETH'), 310)
+        self.assertEqual(self.valuer.route('ETH'), ['ETH-USD'])
+        # BTC can now also go BTC -> ETH -> USD: 1 / 0.0301 * 310 > 10000
+        self.assertAlmostEqual(self.valuer.rate('BTC'), 310 / 0.0301)
+        np.testing.assert_allclose(self.valuer.rates,
+                                   PortfolioValuer(self.graph, self.snapshot, target='USD').revalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
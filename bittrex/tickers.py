@@ -0,0 +1,163 @@
+"""
+   Whole-exchange ticker snapshots as a symbol-indexed matrix.
+
+   One ``/markets/tickers`` call (plus, optionally, one ``/markets/summaries``
+   call for the 24 hour figures) replaces a ``get_market_ticker`` request per
+   market.  Every poll is loaded into a ``(markets, FIELDS)`` float matrix and
+   compared with the previous one, so consumers only handle the rows that
+   actually moved.
+
+   Rows are stable: a market keeps its row for the life of the snapshot, new
+   listings are appended and delisted markets are blanked to NaN.
+"""
+
+import numpy as np
+
+FIELDS = ('bid', 'ask', 'last', 'high', 'low', 'volume', 'quote_volume', 'change')
+
+BID, ASK, LAST, HIGH, LOW, VOLUME, QUOTE_VOLUME, CHANGE = range(len(FIELDS))
+
+# v3 keys feeding each column, split by the endpoint that returns them
+_TICKER_KEYS = ((BID, 'bidRate'), (ASK, 'askRate'), (LAST, 'lastTradeRate'))
+_SUMMARY_KEYS = ((HIGH, 'high'), (LOW, 'low'), (VOLUME, 'volume'), (QUOTE_VOLUME, 'quoteVolume'),
+                 (CHANGE, 'percentChange'))
+
+
+class TickerError(Exception):
+    """
+    Raised when a snapshot request fails
+    """
+    pass
+
+
+def _number(value):
+    return np.nan if value is None else float(value)
+
+
+class TickerDiff(object):
+    """
+    Rows that differ from the previous snapshot.
+
+    :ivar rows: Row indices into :attr:`TickerSnapshot.values`
+    :ivar symbols: Market symbol per changed row
+    :ivar values: ``(changed, FIELDS)`` new values
+    :ivar added: Symbols seen for the first time
+    :ivar removed: Symbols missing from this poll, their rows are now NaN
+    """
+
+    def __init__(self, rows, symbols, values, added, removed):
+        self.rows = rows
+        self.symbols = symbols
+        self.values = values
+        self.added = added
+        self.removed = removed
+
+    def __len__(self):
+        return len(self.rows)
+
+    def as_dict(self):
+        """
+        :return: ``{symbol: {field: value}}`` for the changed rows
+        :rtype: dict
+        """
+        return dict((symbol, dict(zip(FIELDS, row.tolist()))) for symbol, row in zip(self.symbols, self.values))
+
+
+class TickerSnapshot(object):
+    """
+    Latest ticker of every market.
+
+    Example ::
+        >>> snapshot = TickerSnapshot(my_bittrex)
+        >>> diff = snapshot.poll()
+        >>> for symbol, row in zip(diff.symbols, diff.values):
+        ...     print(symbol, row[BID], row[ASK])
+        >>> snapshot.column('last')[snapshot.row('LTC-BTC')]
+    """
+
+    def __init__(self, bittrex=None, summaries=True):
+        """
+        :param bittrex: Client used by :meth:`poll`
+        :type bittrex: Bittrex
+        :param summaries: Also request ``/markets/summaries`` for the 24 hour columns
+        :type summaries: bool
+        """
+        self.bittrex = bittrex
+        self.summaries = summaries
+        self.symbols = []
+        self.values = np.empty((0, len(FIELDS)))
+        self._index = {}
+
+    def row(self, symbol):
+        """
+        :return: Row index of a market
+        :rtype: int
+        """
+        return self._index[symbol]
+
+    def column(self, field):
+        """
+        :param field: One of FIELDS
+        :type field: str
+        :return: View of one column across all markets
+        :rtype: numpy.ndarray
+        """
+        return self.values[:, FIELDS.index(field)]
+
+    def poll(self):
+        """
+        Fetch all tickers (and summaries) and load them.
+
+        :raises TickerError: if a request fails
+        :rtype: TickerDiff
+        """
+        tickers = self._fetch(self.bittrex.get_market_tickers)
+        summaries = self._fetch(self.bittrex.get_market_summaries) if self.summaries else None
+        return self.load(tickers, summaries)
+
+    @staticmethod
+    def _fetch(call):
+        response = call()
+        if not response['success'] or response['result'] is None:
+            raise TickerError('ticker snapshot failed: {0}'.format(response.get('message')))
+        return response['result']
+
+    def load(self, tickers, summaries=None):
+        """
+        Replace the snapshot with decoded ``/markets/tickers`` (and summaries) results.
+
+        Columns without a source keep NaN, so loading without summaries leaves
+        the 24 hour columns empty.
+
+        :param tickers: ``result`` of ``get_market_tickers()``
+        :type tickers: list
+        :param summaries: ``result`` of ``get_market_summaries()``
+        :type summaries: list
+        :return: Rows that changed since the previous load
+        :rtype: TickerDiff
+        """
+        added = []
+        for record in list(tickers) + list(summaries or []):
+            if record['symbol'] not in self._index:
+                self._index[record['symbol']] = len(self.symbols)
+                self.symbols.append(record['symbol'])
+                added.append(record['symbol'])
+
+        values = np.full((len(self.symbols), len(FIELDS)), np.nan)
+        seen = np.zeros(len(self.symbols), dtype=bool)
+        for records, keys in ((tickers, _TICKER_KEYS), (summaries or (), _SUMMARY_KEYS)):
+            for record in records:
+                i = self._index[record['symbol']]
+                seen[i] = True
+                for column, key in keys:
+                    values[i, column] = _number(record.get(key))
+
+        previous = np.full(values.shape, np.nan)
+        previous[:len(self.values)] = self.values
+        same = (values == previous) | (np.isnan(values) & np.isnan(previous))
+        rows = np.flatnonzero(~same.all(axis=1))
+        removed = [self.symbols[i] for i in np.flatnonzero(~seen[:len(self.values)])
+                   if not np.isnan(self.values[i]).all()]
+
+        self.values = values
+        return TickerDiff(rows, [self.symbols[i] for i in rows], values[rows], added, removed)
@@ -0,0 +1,334 @@
+"""
+   Client-side price triggers: alerts, stops and trailing stops.
+
+   Triggers mirror the ``CONDITIONTYPE_*`` constants of ``trade_buy`` and
+   ``trade_sell`` but are held locally, so thousands of them cost nothing
+   until they fire.  Each market keeps two sorted indexes, one for triggers
+   that fire when the price falls to their level (less-than alerts, sell
+   stops) and one for triggers that fire when it rises to it.  A tick finds
+   the fired triggers with one bisection per index, O(log n + k).
+
+   Trailing stops (``CONDITIONTYPE_STOP_LOSS_PERCENTAGE``) whose peak has
+   been overtaken by the price all share that price as their new peak, so
+   they are merged into one group ordered by trail percent.  Only the
+   group's tightest stop sits in the index; a new high moves each group at
+   most once, however many stops it holds.
+
+   Fired triggers become ``POST /orders`` and ``DELETE /orders`` operations
+   sent through ``Bittrex.batch``.
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import count
+
+from bittrex.bittrex import (CONDITIONTYPE_GREATER_THAN, CONDITIONTYPE_LESS_THAN, CONDITIONTYPE_STOP_LOSS_FIXED,
+                             CONDITIONTYPE_STOP_LOSS_PERCENTAGE, DIRECTION_SELL)
+
+
+class Trigger(object):
+    """
+    :ivar id: Identifier returned by :meth:`TriggerEngine.add`
+    :ivar market: Market symbol
+    :ivar condition_type: One of the CONDITIONTYPE_* constants
+    :ivar target: Trigger price, or trail percent for trailing stops
+    :ivar order: ``order_payload`` placed when fired, or None
+    :ivar cancel: Order id cancelled when fired, or None
+    :ivar fired_at: Price of the tick that fired it
+    """
+
+    __slots__ = ('id', 'market', 'condition_type', 'target', 'order', 'cancel', 'active', 'fired_at')
+
+    def __init__(self, trigger_id, market, condition_type, target, order, cancel):
+        self.id = trigger_id
+        self.market = market
+        self.condition_type = condition_type
+        self.target = target
+        self.order = order
+        self.cancel = cancel
+        self.active = True
+        self.fired_at = None
+
+    def operations(self):
+        """
+        :return: ``Bittrex.batch`` operations of this trigger, cancel first
+        :rtype: list
+        """
+        operations = []
+        if self.cancel is not None:
+            operations.append({'resource': 'ORDER', 'operation': 'DELETE', 'payload': {'id': self.cancel}})
+        if self.order is not None:
+            operations.append({'resource': 'ORDER', 'operation': 'POST', 'payload': self.order})
+        return operations
+
+
+class _Trail(object):
+    # trailing stops sharing one peak, tightest trail first
+
+    __slots__ = ('peak', 'heap')
+
+    def __init__(self, peak):
+        self.peak = peak
+        self.heap = []
+
+    def key(self):
+        return self.peak - abs(self.peak) * self.heap[0][0] / 100.0
+
+
+class _Side(object):
+    """
+    Triggers of one market and direction, in key space: prices are
+    multiplied by a sign (+1 falling, -1 rising) so that both sides fire
+    when ``key >= sign * price``.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+        # trailing groups by descending peak, with their negated peaks for bisection
+        self.trails = []
+        self.negated_peaks = []
+
+    def insert(self, key, entry):
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.entries.insert(i, entry)
+
+    def remove(self, key, entry):
+        i = bisect_left(self.keys, key)
+        while self.entries[i] is not entry:
+            i += 1
+        del self.keys[i]
+        del self.entries[i]
+
+    def _drop_trail(self, trail):
+        i = bisect_left(self.negated_peaks, -trail.peak)
+        while self.trails[i] is not trail:
+            i += 1
+        del self.trails[i]
+        del self.negated_peaks[i]
+
+    def raise_peaks(self, x):
+        """
+        Merge the trailing groups whose peak is below ``x`` into one at ``x``.
+        """
+        start = bisect_right(self.negated_peaks, -x)
+        overtaken = self.trails[start:]
+        if not overtaken:
+            return
+        del self.trails[start:]
+        del self.negated_peaks[start:]
+        for trail in overtaken:
+            self.remove(trail.key(), trail)
+        # small-to-large: push the smaller heaps into the largest one
+        merged = max(overtaken, key=lambda t: len(t.heap))
+        for trail in overtaken:
+            if trail is not merged:
+                for item in trail.heap:
+                    heapq.heappush(merged.heap, item)
+        merged.peak = x
+        self._push_trail(merged)
+
+    def _push_trail(self, trail):
+        i = bisect_right(self.negated_peaks, -trail.peak)
+        self.trails.insert(i, trail)
+        self.negated_peaks.insert(i, -trail.peak)
+        self.insert(trail.key(), trail)
+
+    def add_trailing(self, x, percent, seq, trigger):
+        i = bisect_left(self.negated_peaks, -x)
+        if i < len(self.trails) and self.trails[i].peak == x:
+            trail = self.trails[i]
+            self.remove(trail.key(), trail)
+            heapq.heappush(trail.heap, (percent, seq, trigger))
+            self.insert(trail.key(), trail)
+        else:
+            trail = _Trail(x)
+            trail.heap.append((percent, seq, trigger))
+            self._push_trail(trail)
+
+    def fire(self, x):
+        """
+        :return: Active triggers whose key is at or above ``x``
+        :rtype: list
+        """
+        start = bisect_left(self.keys, x)
+        hit = self.entries[start:]
+        if not hit:
+            return []
+        del self.keys[start:]
+        del self.entries[start:]
+        fired = []
+        for entry in hit:
+            if isinstance(entry, Trigger):
+                if entry.active:
+                    fired.append(entry)
+                continue
+            # cancelled stops are dropped lazily when they reach the top
+            heap = entry.heap
+            while heap and (not heap[0][2].active or entry.key() >= x):
+                _, _, trigger = heapq.heappop(heap)
+                if trigger.active:
+                    fired.append(trigger)
+            if heap:
+                self.insert(entry.key(), entry)
+            else:
+                self._drop_trail(entry)
+        return fired
+
+
+class TriggerEngine(object):
+    """
+    Example ::
+        >>> engine = TriggerEngine(my_bittrex)
+        >>> engine.add('LTC-BTC', CONDITIONTYPE_STOP_LOSS_PERCENTAGE, 5.0,
+        ...            order=order_payload(DIRECTION_SELL, 'LTC-BTC', ORDERTYPE_MARKET, 10), price=0.0051)
+        >>> engine.add('LTC-BTC', CONDITIONTYPE_GREATER_THAN, 0.006, cancel=stop_order_id)
+        >>> fired = engine.update({'LTC-BTC': 0.00482})
+        >>> engine.dispatch(fired)
+    """
+
+    def __init__(self, bittrex=None, max_batch=25):
+        """
+        :param bittrex: Client used by :meth:`dispatch`
+        :type bittrex: bittrex.bittrex.Bittrex
+        :param max_batch: Maximum operations per ``batch`` request
+        :type max_batch: int
+        """
+        self.bittrex = bittrex
+        self.max_batch = max_batch
+        self.triggers = {}
+        self.prices = {}
+        self._sides = {}
+        self._keys = {}
+        self._ids = count(1)
+
+    def _side(self, market, sign):
+        sides = self._sides.get(market)
+        if sides is None:
+            sides = self._sides[market] = {1: _Side(), -1: _Side()}
+        return sides[sign]
+
+    def add(self, market, condition_type, target, order=None, cancel=None, direction=None, price=None):
+        """
+        Register a trigger.
+
+        Less-than triggers and sell stops fire when the price falls to
+        ``target``, greater-than triggers and buy stops when it rises to it.
+        A trailing stop follows the best price seen since it was added,
+        starting from ``price`` or the market's last tick.
+
+        :param market: String literal for the market (ex: LTC-BTC)
+        :type market: str
+        :param condition_type: CONDITIONTYPE_GREATER_THAN, CONDITIONTYPE_LESS_THAN,
+            CONDITIONTYPE_STOP_LOSS_FIXED or CONDITIONTYPE_STOP_LOSS_PERCENTAGE
+        :type condition_type: str
+        :param target: Trigger price, or the trail in percent for CONDITIONTYPE_STOP_LOSS_PERCENTAGE
+        :type target: float
+        :param order: ``order_payload`` to place when fired
+        :type order: dict
+        :param cancel: Order id to cancel when fired
+        :type cancel: str
+        :param direction: Side a stop protects, defaults to the order's direction
+        :type direction: str
+        :param price: Current price, anchors trailing stops
+        :type price: float
+        :return: Trigger id
+        :rtype: int
+        """
+        direction = direction or (order or {}).get('direction', DIRECTION_SELL)
+        if condition_type == CONDITIONTYPE_GREATER_THAN:
+            sign = -1
+        elif condition_type == CONDITIONTYPE_LESS_THAN:
+            sign = 1
+        elif condition_type in (CONDITIONTYPE_STOP_LOSS_FIXED, CONDITIONTYPE_STOP_LOSS_PERCENTAGE):
+            # stop losses trigger against the position: sells on the way down, buys on the way up
+            sign = 1 if direction == DIRECTION_SELL else -1
+        else:
+            raise ValueError('unsupported condition type {0!r}'.format(condition_type))
+
+        trigger = Trigger(next(self._ids), market, condition_type, target, order, cancel)
+        side = self._side(market, sign)
+        if condition_type == CONDITIONTYPE_STOP_LOSS_PERCENTAGE:
+            anchor = price if price is not None else self.prices.get(market)
+            if anchor is None:
+                raise ValueError('trailing stop on {0} needs a price to start from'.format(market))
+            if not 0 < target < 100:
+                raise ValueError('trail must be between 0 and 100 percent')
+            side.add_trailing(sign * anchor, target, trigger.id, trigger)
+        else:
+            key = sign * target
+            side.insert(key, trigger)
+            self._keys[trigger.id] = (side, key)
+        self.triggers[trigger.id] = trigger
+        return trigger.id
+
+    def remove(self, trigger_id):
+        """
+        Drop a trigger that has not fired.
+
+        :return: False if it was unknown or already fired
+        :rtype: bool
+        """
+        trigger = self.triggers.pop(trigger_id, None)
+        if trigger is None:
+            return False
+        trigger.active = False
+        if trigger_id in self._keys:
+            side, key = self._keys.pop(trigger_id)
+            side.remove(key, trigger)
+        return True
+
+    def tick(self, market, price):
+        """
+        Apply one price.
+
+        :return: Triggers fired by it, in no particular order
+        :rtype: list
+        """
+        self.prices[market] = price
+        sides = self._sides.get(market)
+        if sides is None:
+            return []
+        fired = []
+        for sign, side in sides.items():
+            x = sign * price
+            side.raise_peaks(x)
+            fired.extend(side.fire(x))
+        for trigger in fired:
+            trigger.active = False
+            trigger.fired_at = price
+            del self.triggers[trigger.id]
+            self._keys.pop(trigger.id, None)
+        return fired
+
+    def update(self, prices):
+        """
+        :param prices: ``{market: price}``, e.g. last trade rates of a ticker poll
+        :type prices: dict
+        :return: Triggers fired
+        :rtype: list
+        """
+        fired = []
+        for market, price in prices.items():
+            fired.extend(self.tick(market, price))
+        return fired
+
+    def dispatch(self, fired):
+        """
+        Send the orders and cancels of fired triggers in batches.
+
+        :param fired: Result of :meth:`tick` or :meth:`update`
+        :type fired: list
+        :return: ``(trigger, operation, result)`` per operation; result is
+            the batch entry, or None if its request failed
+        :rtype: list
+        """
+        operations = [(trigger, operation) for trigger in fired for operation in trigger.operations()]
+        outcomes = []
+        for i in range(0, len(operations), self.max_batch):
+            chunk = operations[i:i + self.max_batch]
+            response = self.bittrex.batch([operation for _, operation in chunk])
+            results = response['result'] if response['success'] else [None] * len(chunk)
+            outcomes.extend((trigger, operation, result) for (trigger, operation), result in zip(chunk, results))
+        return outcomes
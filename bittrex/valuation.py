@@ -0,0 +1,198 @@
+"""
+   Portfolio valuation in one currency over the whole market graph.
+
+   :class:`PortfolioValuer` enumerates, once, every route of up to
+   ``max_hops`` markets from each currency to the target (for example
+   DOGE -> BTC -> USD).  Routes are priced together from the ticker matrix
+   of a :class:`bittrex.tickers.TickerSnapshot`, each leg at the price it
+   would actually fill (bid when selling, ask when buying), and every
+   currency takes its best route.  After a poll only the routes through
+   markets in the diff are repriced.
+
+   Example ::
+       >>> graph = CurrencyGraph.from_markets(my_bittrex.get_markets()['result'])
+       >>> snapshot = TickerSnapshot(my_bittrex, summaries=False)
+       >>> valuer = PortfolioValuer(graph, snapshot, target='USD')
+       >>> valuer.update(snapshot.poll())
+       >>> valuer.value(my_bittrex.get_balances()['result'])['total']
+"""
+
+import numpy as np
+
+from bittrex.arbitrage import LegPrices
+
+
+def _amounts(balances):
+    # {currency: amount}, or balance rows in v3 (currencySymbol/total) or 1.1 (Currency/Balance) form
+    if isinstance(balances, dict):
+        return balances.items()
+    return [(r['currencySymbol'], float(r['total'])) if 'currencySymbol' in r
+            else (r['Currency'], float(r['Balance'] or 0.0)) for r in balances]
+
+
+class PortfolioValuer(object):
+    """
+    Best conversion rate of every currency into ``target``.
+
+    :ivar currencies: Currencies of the graph, sorted
+    :ivar rates: Target units per unit of each currency, NaN without a priced route
+    :ivar route_currency: Currency index of each route
+    :ivar route_market: ``(routes, max_hops)`` market per leg, -1 past the route's end
+    :ivar route_sell: ``(routes, max_hops)`` True where the leg sells the market's base currency
+    """
+
+    def __init__(self, graph, snapshot, target='BTC', max_hops=2):
+        """
+        :param graph: Markets to convert through
+        :type graph: bittrex.arbitrage.CurrencyGraph
+        :param snapshot: Source of bid and ask prices
+        :type snapshot: bittrex.tickers.TickerSnapshot
+        :param target: Currency to value in
+        :type target: str
+        :param max_hops: Longest route in markets
+        :type max_hops: int
+        """
+        self.graph = graph
+        self.target = target
+        self.max_hops = max_hops
+        self.prices = LegPrices(graph, snapshot)
+        self.currencies = sorted(set(graph.base) | set(graph.quote) | set([target]))
+        self._index = dict((c, i) for i, c in enumerate(self.currencies))
+
+        links = {}
+        for m, (b, q) in enumerate(zip(graph.base, graph.quote)):
+            links.setdefault(b, []).append((q, m, True))
+            links.setdefault(q, []).append((b, m, False))
+
+        currency, markets, sells = [], [], []
+
+        def walk(here, visited, legs):
+            if here == target:
+                currency.append(self._index[visited[0]])
+                markets.append([m for m, _ in legs] + [-1] * (max_hops - len(legs)))
+                sells.append([s for _, s in legs] + [False] * (max_hops - len(legs)))
+                return
+            if len(legs) == max_hops:
+                return
+            for there, m, sell in links.get(here, ()):
+                if there not in visited:
+                    walk(there, visited + [there], legs + [(m, sell)])
+
+        for c in self.currencies:
+            walk(c, [c], [])
+
+        # routes are grouped by currency, in currency order
+        self.route_currency = np.array(currency, dtype=np.intp)
+        self.route_market = np.array(markets, dtype=np.intp).reshape(-1, max_hops)
+        self.route_sell = np.array(sells, dtype=bool).reshape(-1, max_hops)
+        self.route_rates = np.full(len(currency), np.nan)
+        self.rates = np.full(len(self.currencies), np.nan)
+        self._offsets = np.searchsorted(self.route_currency, np.arange(len(self.currencies) + 1))
+
+        # routes through each market, as a CSR index for incremental updates
+        legs = self.route_market.ravel()
+        used = np.flatnonzero(legs >= 0)
+        order = used[np.argsort(legs[used], kind='stable')]
+        self._routes_by_market = order // max_hops
+        self._market_offsets = np.concatenate([[0], np.cumsum(np.bincount(legs[used], minlength=len(graph.symbols)))])
+
+    def _price(self, routes):
+        markets = self.route_market[routes]
+        rates = self.prices.rates(np.maximum(markets, 0), self.route_sell[routes])
+        return np.prod(np.where(markets >= 0, rates, 1.0), axis=-1)
+
+    def _best(self):
+        rates = np.full(len(self.currencies), np.nan)
+        routed = np.flatnonzero(np.diff(self._offsets))
+        if len(routed):
+            rates[routed] = np.fmax.reduceat(self.route_rates, self._offsets[routed])
+        self.rates = rates
+
+    def revalue(self):
+        """
+        Reprice every route.
+
+        :return: Rate per currency
+        :rtype: numpy.ndarray
+        """
+        self.prices.map_rows()
+        self.route_rates = self._price(np.arange(len(self.route_currency)))
+        self._best()
+        return self.rates
+
+    def update(self, diff):
+        """
+        Reprice the routes through markets that changed in a poll.
+
+        :param diff: Result of ``TickerSnapshot.poll()`` or ``load()``
+        :type diff: bittrex.tickers.TickerDiff
+        :return: Indices of the repriced routes
+        :rtype: numpy.ndarray
+        """
+        self.prices.map_rows()
+        graph = self.graph
+        parts = [self._routes_by_market[self._market_offsets[m]:self._market_offsets[m + 1]]
+                 for m in (graph.market(s) for s in diff.symbols if graph.has_market(s))]
+        routes = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+        if len(routes):
+            self.route_rates[routes] = self._price(routes)
+            self._best()
+        return routes
+
+    def rate(self, currency):
+        """
+        :return: Target units per unit of ``currency``, NaN if no route is priced
+        :rtype: float
+        """
+        i = self._index.get(currency)
+        return float(self.rates[i]) if i is not None else float('nan')
+
+    def route(self, currency):
+        """
+        :return: Markets of the best route, e.g. ``['DOGE-BTC', 'BTC-USD']``; None if unpriced
+        :rtype: list
+        """
+        i = self._index.get(currency)
+        if i is None or np.isnan(self.rates[i]):
+            return None
+        start, end = self._offsets[i], self._offsets[i + 1]
+        best = start + int(np.nanargmax(self.route_rates[start:end]))
+        return [self.graph.symbols[m] for m in self.route_market[best] if m >= 0]
+
+    def vector(self, balances):
+        """
+        :param balances: ``{currency: amount}`` or ``get_balances()['result']``
+        :return: Amount per currency in :attr:`currencies` order, and the currencies not in the graph
+        :rtype: tuple
+        """
+        amounts = np.zeros(len(self.currencies))
+        unknown = []
+        for currency, amount in _amounts(balances):
+            if currency in self._index:
+                amounts[self._index[currency]] += float(amount)
+            elif amount:
+                unknown.append(currency)
+        return amounts, unknown
+
+    def value(self, balances):
+        """
+        Example ::
+            {'total': 1523.4, 'unpriced': ['XYZ'],
+             'assets': {'BTC': {'balance': 0.1, 'rate': 9213.0, 'value': 921.3},
+                        'DOGE': {'balance': 2e5, 'rate': 0.003008, 'value': 601.6}, ...}}
+
+        :param balances: ``{currency: amount}`` or ``get_balances()['result']``
+        :return: Value per held currency and their total; ``unpriced`` lists
+            held currencies without a priced route, which the total leaves out
+        :rtype: dict
+        """
+        amounts, unknown = self.vector(balances)
+        values = amounts * self.rates
+        held = np.flatnonzero(amounts)
+        priced = ~np.isnan(values[held])
+        return {
+            'total': float(values[held[priced]].sum()),
+            'unpriced': sorted(unknown + [self.currencies[i] for i in held[~priced]]),
+            'assets': dict((self.currencies[i], {'balance': float(amounts[i]), 'rate': float(self.rates[i]),
+                                                 'value': float(values[i])}) for i in held)
+        }
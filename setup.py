@@ -9,6 +9,13 @@ setup(name='python-bittrex',
       packages=['bittrex'],
       modules=['bittrex'],
       install_requires=['requests'],
+      extras_require={
+          'numpy': ['numpy'],
+          'export': ['numpy', 'pyarrow'],
+      },
+      entry_points={
+          'console_scripts': ['bittrex-download=bittrex.download:main'],
+      },
       description='Python bindings for bittrex API.',
       author='Eric Somdahl',
       author_email='eric@corsairconsulting.com',